@@ -0,0 +1,108 @@
+"""add sppt_latest table
+
+Revision ID: 3b9a1c7d52e4
+Revises: 776ccb9cef9c
+Create Date: 2026-10-18 11:03:27.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9a1c7d52e4'
+down_revision: Union[str, None] = '776ccb9cef9c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+NOP_KEYS = ["KD_PROPINSI", "KD_DATI2", "KD_KECAMATAN", "KD_KELURAHAN", "KD_BLOK", "NO_URUT", "KD_JNS_OP"]
+NOP_COLUMNS = ", ".join(NOP_KEYS)
+
+# Tanggal pembayaran terakhir untuk tahun SPPT terbaru (baris sppt alias s)
+LAST_PAYMENT_SQL = (
+    "(SELECT MAX(p.TGL_PEMBAYARAN_SPPT) FROM pembayaran_sppt p WHERE "
+    + " AND ".join(f"p.{k} = s.{k}" for k in NOP_KEYS)
+    + " AND p.THN_PAJAK_SPPT = s.THN_PAJAK_SPPT)"
+)
+
+
+def _call_refresh(row: str) -> str:
+    return f"CALL sppt_latest_refresh({', '.join(f'{row}.{k}' for k in NOP_KEYS)})"
+
+
+def _create_triggers(source: str, prefix: str) -> None:
+    """Setiap perubahan baris di tabel sumber menghitung ulang sppt_latest untuk NOP-nya"""
+    op.execute(f"CREATE TRIGGER trg_{prefix}_ai AFTER INSERT ON {source} FOR EACH ROW {_call_refresh('NEW')}")
+    op.execute(
+        f"CREATE TRIGGER trg_{prefix}_au AFTER UPDATE ON {source} FOR EACH ROW "
+        f"BEGIN {_call_refresh('OLD')}; {_call_refresh('NEW')}; END"
+    )
+    op.execute(f"CREATE TRIGGER trg_{prefix}_ad AFTER DELETE ON {source} FOR EACH ROW {_call_refresh('OLD')}")
+
+
+def _drop_triggers(prefix: str) -> None:
+    for suffix in ("ai", "au", "ad"):
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{prefix}_{suffix}")
+
+
+def upgrade() -> None:
+    op.create_table('sppt_latest',
+    sa.Column('KD_PROPINSI', sqlmodel.sql.sqltypes.AutoString(length=6), nullable=False),
+    sa.Column('KD_DATI2', sqlmodel.sql.sqltypes.AutoString(length=6), nullable=False),
+    sa.Column('KD_KECAMATAN', sqlmodel.sql.sqltypes.AutoString(length=9), nullable=False),
+    sa.Column('KD_KELURAHAN', sqlmodel.sql.sqltypes.AutoString(length=9), nullable=False),
+    sa.Column('KD_BLOK', sqlmodel.sql.sqltypes.AutoString(length=9), nullable=False),
+    sa.Column('NO_URUT', sqlmodel.sql.sqltypes.AutoString(length=12), nullable=False),
+    sa.Column('KD_JNS_OP', sqlmodel.sql.sqltypes.AutoString(length=3), nullable=False),
+    sa.Column('THN_PAJAK_SPPT', sqlmodel.sql.sqltypes.AutoString(length=12), nullable=False),
+    sa.Column('STATUS_PEMBAYARAN_SPPT', sa.Boolean(), nullable=True),
+    sa.Column('TGL_PEMBAYARAN_TERAKHIR', sa.Date(), nullable=True),
+    sa.PrimaryKeyConstraint('KD_PROPINSI', 'KD_DATI2', 'KD_KECAMATAN', 'KD_KELURAHAN', 'KD_BLOK', 'NO_URUT', 'KD_JNS_OP')
+    )
+
+    # pembayaran_sppt tidak dikelola migration (dimuat dari dump SISMIOP)
+    has_pembayaran = sa.inspect(op.get_bind()).has_table('pembayaran_sppt')
+    last_payment = LAST_PAYMENT_SQL if has_pembayaran else "NULL"
+
+    # Backfill: tahun terbesar per NOP (join ke MAX per NOP, tanpa window function)
+    op.execute(f"""
+        INSERT INTO sppt_latest ({NOP_COLUMNS}, THN_PAJAK_SPPT, STATUS_PEMBAYARAN_SPPT, TGL_PEMBAYARAN_TERAKHIR)
+        SELECT {', '.join(f's.{k}' for k in NOP_KEYS)}, s.THN_PAJAK_SPPT, s.STATUS_PEMBAYARAN_SPPT, {last_payment}
+        FROM sppt s
+        JOIN (
+            SELECT {NOP_COLUMNS}, MAX(THN_PAJAK_SPPT) AS THN_PAJAK_SPPT
+            FROM sppt
+            GROUP BY {NOP_COLUMNS}
+        ) m ON {' AND '.join(f'm.{k} = s.{k}' for k in NOP_KEYS)} AND m.THN_PAJAK_SPPT = s.THN_PAJAK_SPPT
+    """)
+
+    # Hitung ulang satu NOP: pakai PK sppt (NOP + tahun), jadi murah dipanggil per baris
+    params = ", ".join(f"p_{k} VARCHAR(12)" for k in NOP_KEYS)
+    nop_match = " AND ".join(f"{k} = p_{k}" for k in NOP_KEYS)
+    op.execute(f"""
+        CREATE PROCEDURE sppt_latest_refresh({params})
+        BEGIN
+            DELETE FROM sppt_latest WHERE {nop_match};
+            INSERT INTO sppt_latest ({NOP_COLUMNS}, THN_PAJAK_SPPT, STATUS_PEMBAYARAN_SPPT, TGL_PEMBAYARAN_TERAKHIR)
+            SELECT {', '.join(f's.{k}' for k in NOP_KEYS)}, s.THN_PAJAK_SPPT, s.STATUS_PEMBAYARAN_SPPT, {last_payment}
+            FROM sppt s
+            WHERE {' AND '.join(f's.{k} = p_{k}' for k in NOP_KEYS)}
+            ORDER BY s.THN_PAJAK_SPPT DESC
+            LIMIT 1;
+        END
+    """)
+
+    _create_triggers('sppt', 'sppt_latest')
+    if has_pembayaran:
+        _create_triggers('pembayaran_sppt', 'sppt_latest_bayar')
+
+
+def downgrade() -> None:
+    _drop_triggers('sppt_latest_bayar')
+    _drop_triggers('sppt_latest')
+    op.execute("DROP PROCEDURE IF EXISTS sppt_latest_refresh")
+    op.drop_table('sppt_latest')
@@ -0,0 +1,146 @@
+"""add dashboard rollup tables
+
+Revision ID: 776ccb9cef9c
+Revises: f5817754fc0b
+Create Date: 2026-10-18 09:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '776ccb9cef9c'
+down_revision: Union[str, None] = 'f5817754fc0b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+REGION_KEYS = "KD_PROPINSI, KD_DATI2, KD_KECAMATAN, KD_KELURAHAN"
+
+SPPT_KEYS = f"THN_PAJAK_SPPT, {REGION_KEYS}"
+SPPT_COLUMNS = "TOTAL_SPPT, TOTAL_LUNAS, TOTAL_BELUM_LUNAS, TOTAL_PBB_TERHUTANG"
+
+BANGUNAN_COLUMNS = "TOTAL_BANGUNAN, TOTAL_NILAI_BANGUNAN, TOTAL_LUAS_BANGUNAN, JUMLAH_BANGUNAN_BERLUAS"
+
+
+def _sppt_values(row: str) -> list:
+    """Kontribusi satu baris sppt (NEW/OLD) ke setiap kolom rollup"""
+    return [
+        "1",
+        f"IF({row}.STATUS_PEMBAYARAN_SPPT = 1, 1, 0)",
+        f"IF({row}.STATUS_PEMBAYARAN_SPPT = 0, 1, 0)",
+        f"COALESCE({row}.PBB_TERHUTANG_SPPT, 0)",
+    ]
+
+
+def _bangunan_values(row: str) -> list:
+    """Kontribusi satu baris dat_op_bangunan (NEW/OLD) ke setiap kolom rollup, 0 jika tidak aktif"""
+    return [
+        f"IF({row}.AKTIF = 1, 1, 0)",
+        f"IF({row}.AKTIF = 1, COALESCE({row}.NILAI_SISTEM_BNG, 0), 0)",
+        f"IF({row}.AKTIF = 1 AND {row}.LUAS_BNG > 0, {row}.LUAS_BNG, 0)",
+        f"IF({row}.AKTIF = 1 AND {row}.LUAS_BNG > 0, 1, 0)",
+    ]
+
+
+def _create_triggers(source: str, table: str, keys: str, columns: str, values_fn) -> None:
+    """
+    Trigger AFTER INSERT/UPDATE/DELETE di tabel sumber yang menambah/mengurangi
+    kontribusi baris ke rollup (UPDATE = kurangi OLD lalu tambah NEW)
+    """
+    key_list = keys.split(", ")
+    column_list = columns.split(", ")
+
+    new_keys = ", ".join(f"NEW.{k}" for k in key_list)
+    new_values = ", ".join(values_fn("NEW"))
+    updates = ", ".join(f"{c} = {c} + VALUES({c})" for c in column_list)
+    add_new = (
+        f"INSERT INTO {table} ({keys}, {columns}) VALUES ({new_keys}, {new_values}) "
+        f"ON DUPLICATE KEY UPDATE {updates}"
+    )
+
+    sets = ", ".join(f"{c} = {c} - {v}" for c, v in zip(column_list, values_fn("OLD")))
+    where = " AND ".join(f"{k} = OLD.{k}" for k in key_list)
+    subtract_old = f"UPDATE {table} SET {sets} WHERE {where}"
+
+    op.execute(f"CREATE TRIGGER trg_{table}_ai AFTER INSERT ON {source} FOR EACH ROW {add_new}")
+    op.execute(
+        f"CREATE TRIGGER trg_{table}_au AFTER UPDATE ON {source} FOR EACH ROW "
+        f"BEGIN {subtract_old}; {add_new}; END"
+    )
+    op.execute(f"CREATE TRIGGER trg_{table}_ad AFTER DELETE ON {source} FOR EACH ROW {subtract_old}")
+
+
+def _drop_triggers(table: str) -> None:
+    for suffix in ("ai", "au", "ad"):
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_{suffix}")
+
+
+def upgrade() -> None:
+    op.create_table('dashboard_rollup_sppt',
+    sa.Column('THN_PAJAK_SPPT', sqlmodel.sql.sqltypes.AutoString(length=12), nullable=False),
+    sa.Column('KD_PROPINSI', sqlmodel.sql.sqltypes.AutoString(length=6), nullable=False),
+    sa.Column('KD_DATI2', sqlmodel.sql.sqltypes.AutoString(length=6), nullable=False),
+    sa.Column('KD_KECAMATAN', sqlmodel.sql.sqltypes.AutoString(length=9), nullable=False),
+    sa.Column('KD_KELURAHAN', sqlmodel.sql.sqltypes.AutoString(length=9), nullable=False),
+    sa.Column('TOTAL_SPPT', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('TOTAL_LUNAS', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('TOTAL_BELUM_LUNAS', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('TOTAL_PBB_TERHUTANG', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('THN_PAJAK_SPPT', 'KD_PROPINSI', 'KD_DATI2', 'KD_KECAMATAN', 'KD_KELURAHAN')
+    )
+    op.create_index('idx_rollup_sppt_wilayah', 'dashboard_rollup_sppt', ['KD_PROPINSI', 'KD_DATI2', 'KD_KECAMATAN', 'KD_KELURAHAN'], unique=False)
+
+    op.create_table('dashboard_rollup_bangunan',
+    sa.Column('KD_PROPINSI', sqlmodel.sql.sqltypes.AutoString(length=2), nullable=False),
+    sa.Column('KD_DATI2', sqlmodel.sql.sqltypes.AutoString(length=2), nullable=False),
+    sa.Column('KD_KECAMATAN', sqlmodel.sql.sqltypes.AutoString(length=3), nullable=False),
+    sa.Column('KD_KELURAHAN', sqlmodel.sql.sqltypes.AutoString(length=3), nullable=False),
+    sa.Column('TOTAL_BANGUNAN', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('TOTAL_NILAI_BANGUNAN', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('TOTAL_LUAS_BANGUNAN', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('JUMLAH_BANGUNAN_BERLUAS', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('KD_PROPINSI', 'KD_DATI2', 'KD_KECAMATAN', 'KD_KELURAHAN')
+    )
+
+    # Backfill dari data yang sudah ada
+    op.execute(f"""
+        INSERT INTO dashboard_rollup_sppt ({SPPT_KEYS}, {SPPT_COLUMNS})
+        SELECT
+            {SPPT_KEYS},
+            COUNT(*),
+            SUM(CASE WHEN STATUS_PEMBAYARAN_SPPT = 1 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN STATUS_PEMBAYARAN_SPPT = 0 THEN 1 ELSE 0 END),
+            COALESCE(SUM(PBB_TERHUTANG_SPPT), 0)
+        FROM sppt
+        GROUP BY {SPPT_KEYS}
+    """)
+    _create_triggers('sppt', 'dashboard_rollup_sppt', SPPT_KEYS, SPPT_COLUMNS, _sppt_values)
+
+    # dat_op_bangunan tidak dikelola migration (dimuat dari dump SISMIOP)
+    if sa.inspect(op.get_bind()).has_table('dat_op_bangunan'):
+        op.execute(f"""
+            INSERT INTO dashboard_rollup_bangunan ({REGION_KEYS}, {BANGUNAN_COLUMNS})
+            SELECT
+                {REGION_KEYS},
+                COUNT(*),
+                COALESCE(SUM(NILAI_SISTEM_BNG), 0),
+                COALESCE(SUM(CASE WHEN LUAS_BNG > 0 THEN LUAS_BNG ELSE 0 END), 0),
+                SUM(CASE WHEN LUAS_BNG > 0 THEN 1 ELSE 0 END)
+            FROM dat_op_bangunan
+            WHERE AKTIF = 1
+            GROUP BY {REGION_KEYS}
+        """)
+        _create_triggers('dat_op_bangunan', 'dashboard_rollup_bangunan', REGION_KEYS, BANGUNAN_COLUMNS, _bangunan_values)
+
+
+def downgrade() -> None:
+    _drop_triggers('dashboard_rollup_bangunan')
+    _drop_triggers('dashboard_rollup_sppt')
+    op.drop_table('dashboard_rollup_bangunan')
+    op.drop_index('idx_rollup_sppt_wilayah', table_name='dashboard_rollup_sppt')
+    op.drop_table('dashboard_rollup_sppt')
@@ -0,0 +1,42 @@
+"""add NM_WP_NORMAL generated column to dat_subjek_pajak
+
+Revision ID: a61f0d2c8e95
+Revises: 3b9a1c7d52e4
+Create Date: 2026-10-18 11:48:05.530771
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a61f0d2c8e95'
+down_revision: Union[str, None] = '3b9a1c7d52e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Harus sama dengan app/models/dat_subjek_pajak.py (_nm_wp_normal_sql) dan normalize() di sppt router
+NM_WP_NORMAL_SQL = (
+    "LOWER(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE("
+    "`NM_WP`, ' ', ''), '/', ''), '\\\\', ''), '-', ''), '_', ''), '.', ''), ',', ''))"
+)
+
+
+def upgrade() -> None:
+    # STORED agar bisa di-index; MySQL menghitung ulang otomatis setiap NM_WP berubah
+    op.add_column('dat_subjek_pajak', sa.Column(
+        'NM_WP_NORMAL',
+        sqlmodel.sql.sqltypes.AutoString(length=90),
+        sa.Computed(NM_WP_NORMAL_SQL, persisted=True),
+        nullable=True,
+    ))
+    op.create_index(op.f('ix_dat_subjek_pajak_NM_WP_NORMAL'), 'dat_subjek_pajak', ['NM_WP_NORMAL'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_dat_subjek_pajak_NM_WP_NORMAL'), table_name='dat_subjek_pajak')
+    op.drop_column('dat_subjek_pajak', 'NM_WP_NORMAL')
@@ -0,0 +1,59 @@
+"""add NOP generated columns to spop, sppt, pembayaran_sppt, dat_op_bangunan
+
+Revision ID: c4e7a1b9d2f3
+Revises: a61f0d2c8e95
+Create Date: 2026-10-18 12:41:09.284117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e7a1b9d2f3'
+down_revision: Union[str, None] = 'a61f0d2c8e95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Harus sama dengan app/models/nop.py (NOP_SQL)
+NOP_KEYS = ["KD_PROPINSI", "KD_DATI2", "KD_KECAMATAN", "KD_KELURAHAN", "KD_BLOK", "NO_URUT", "KD_JNS_OP"]
+NOP_SQL = "CONCAT(" + ", ".join(f"`{k}`" for k in NOP_KEYS) + ")"
+
+# tabel -> (nama index, kolom index, unique)
+NOP_INDEXES = {
+    'spop': ('ix_spop_NOP', ['NOP'], True),
+    'sppt': ('ux_sppt_NOP_THN_PAJAK_SPPT', ['NOP', 'THN_PAJAK_SPPT'], True),
+    'sppt_latest': ('ix_sppt_latest_NOP', ['NOP'], True),
+    'pembayaran_sppt': ('ix_pembayaran_sppt_NOP_THN_PAJAK_SPPT', ['NOP', 'THN_PAJAK_SPPT'], False),
+    'dat_op_bangunan': ('ux_dat_op_bangunan_NOP_NO_BNG', ['NOP', 'NO_BNG'], True),
+}
+
+
+def _existing_tables() -> list:
+    # pembayaran_sppt dan dat_op_bangunan berasal dari dump SISMIOP, belum tentu ada
+    inspector = sa.inspect(op.get_bind())
+    return [table for table in NOP_INDEXES if inspector.has_table(table)]
+
+
+def upgrade() -> None:
+    # STORED: MySQL mengisi kolom untuk semua baris lama saat ALTER (backfill)
+    # dan menghitung ulang otomatis setiap kolom kode berubah
+    for table in _existing_tables():
+        index_name, columns, unique = NOP_INDEXES[table]
+        op.add_column(table, sa.Column(
+            'NOP',
+            sa.CHAR(length=18),
+            sa.Computed(NOP_SQL, persisted=True),
+            nullable=True,
+        ))
+        op.create_index(index_name, table, columns, unique=unique)
+
+
+def downgrade() -> None:
+    for table in reversed(_existing_tables()):
+        index_name, _, _ = NOP_INDEXES[table]
+        op.drop_index(index_name, table_name=table)
+        op.drop_column(table, 'NOP')
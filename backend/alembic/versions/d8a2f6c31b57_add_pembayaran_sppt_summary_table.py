@@ -0,0 +1,101 @@
+"""add pembayaran_sppt_summary table
+
+Revision ID: d8a2f6c31b57
+Revises: c4e7a1b9d2f3
+Create Date: 2026-10-18 13:22:47.610352
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8a2f6c31b57'
+down_revision: Union[str, None] = 'c4e7a1b9d2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+NOP_KEYS = ["KD_PROPINSI", "KD_DATI2", "KD_KECAMATAN", "KD_KELURAHAN", "KD_BLOK", "NO_URUT", "KD_JNS_OP"]
+
+# Agregasi yang sama dengan query lama di endpoint pembayaran (pembayaran_sppt p JOIN sppt s)
+SUMMARY_SELECT = """
+    SELECT p.NOP, p.THN_PAJAK_SPPT,
+        COALESCE(SUM(CASE WHEN s.STATUS_PEMBAYARAN_SPPT = 1 THEN p.DENDA_SPPT ELSE 0 END), 0),
+        COALESCE(SUM(p.JML_SPPT_YG_DIBAYAR), 0),
+        GROUP_CONCAT(DISTINCT p.TGL_PEMBAYARAN_SPPT),
+        COUNT(*)
+    FROM pembayaran_sppt p
+    JOIN sppt s ON s.NOP = p.NOP AND s.THN_PAJAK_SPPT = p.THN_PAJAK_SPPT
+"""
+SUMMARY_COLUMNS = "NOP, THN_PAJAK_SPPT, TOTAL_DENDA, TOTAL_DIBAYAR, TANGGAL_PEMBAYARAN, JML_PEMBAYARAN"
+
+
+def _call_refresh(row: str) -> str:
+    # CONCAT kolom kode (bukan row.NOP) agar tidak bergantung pada nilai generated column di trigger
+    nop = f"CONCAT({', '.join(f'{row}.{k}' for k in NOP_KEYS)})"
+    return f"CALL pembayaran_sppt_summary_refresh({nop}, {row}.THN_PAJAK_SPPT)"
+
+
+def _create_triggers(source: str, prefix: str) -> None:
+    """Setiap perubahan baris di tabel sumber menghitung ulang ringkasan (NOP, tahun)-nya"""
+    op.execute(f"CREATE TRIGGER trg_{prefix}_ai AFTER INSERT ON {source} FOR EACH ROW {_call_refresh('NEW')}")
+    op.execute(
+        f"CREATE TRIGGER trg_{prefix}_au AFTER UPDATE ON {source} FOR EACH ROW "
+        f"BEGIN {_call_refresh('OLD')}; {_call_refresh('NEW')}; END"
+    )
+    op.execute(f"CREATE TRIGGER trg_{prefix}_ad AFTER DELETE ON {source} FOR EACH ROW {_call_refresh('OLD')}")
+
+
+def _drop_triggers(prefix: str) -> None:
+    for suffix in ("ai", "au", "ad"):
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{prefix}_{suffix}")
+
+
+def upgrade() -> None:
+    op.create_table('pembayaran_sppt_summary',
+    sa.Column('NOP', sqlmodel.sql.sqltypes.AutoString(length=18), nullable=False),
+    sa.Column('THN_PAJAK_SPPT', sqlmodel.sql.sqltypes.AutoString(length=4), nullable=False),
+    sa.Column('TOTAL_DENDA', sa.Integer(), nullable=False),
+    sa.Column('TOTAL_DIBAYAR', sa.Integer(), nullable=False),
+    sa.Column('TANGGAL_PEMBAYARAN', sa.Text(), nullable=True),
+    sa.Column('JML_PEMBAYARAN', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('NOP', 'THN_PAJAK_SPPT')
+    )
+
+    # pembayaran_sppt tidak dikelola migration (dimuat dari dump SISMIOP)
+    if not sa.inspect(op.get_bind()).has_table('pembayaran_sppt'):
+        return
+
+    # Backfill semua (NOP, tahun) yang sudah punya pembayaran
+    op.execute(f"""
+        INSERT INTO pembayaran_sppt_summary ({SUMMARY_COLUMNS})
+        {SUMMARY_SELECT}
+        GROUP BY p.NOP, p.THN_PAJAK_SPPT
+    """)
+
+    # Hitung ulang satu (NOP, tahun): range kecil di index (NOP, THN_PAJAK_SPPT)
+    op.execute(f"""
+        CREATE PROCEDURE pembayaran_sppt_summary_refresh(p_NOP CHAR(18), p_THN_PAJAK_SPPT VARCHAR(12))
+        BEGIN
+            DELETE FROM pembayaran_sppt_summary WHERE NOP = p_NOP AND THN_PAJAK_SPPT = p_THN_PAJAK_SPPT;
+            INSERT INTO pembayaran_sppt_summary ({SUMMARY_COLUMNS})
+            {SUMMARY_SELECT}
+            WHERE p.NOP = p_NOP AND p.THN_PAJAK_SPPT = p_THN_PAJAK_SPPT
+            GROUP BY p.NOP, p.THN_PAJAK_SPPT;
+        END
+    """)
+
+    _create_triggers('pembayaran_sppt', 'bayar_summary')
+    # Status lunas di sppt menentukan apakah denda dijumlah
+    _create_triggers('sppt', 'bayar_summary_sppt')
+
+
+def downgrade() -> None:
+    _drop_triggers('bayar_summary_sppt')
+    _drop_triggers('bayar_summary')
+    op.execute("DROP PROCEDURE IF EXISTS pembayaran_sppt_summary_refresh")
+    op.drop_table('pembayaran_sppt_summary')
@@ -0,0 +1,31 @@
+"""add spop JALAN_OP and LUAS_BUMI indexes
+
+Revision ID: e6f1b3a8c5d2
+Revises: d8a2f6c31b57
+Create Date: 2026-10-18 16:05:12.884120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6f1b3a8c5d2'
+down_revision: Union[str, None] = 'd8a2f6c31b57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # InnoDB menyimpan primary key (NOP) di setiap index sekunder, jadi index
+    # satu kolom sudah cukup untuk ORDER BY kolom, NOP dan seek keyset-nya
+    op.create_index(op.f('ix_spop_JALAN_OP'), 'spop', ['JALAN_OP'], unique=False)
+    op.create_index(op.f('ix_spop_LUAS_BUMI'), 'spop', ['LUAS_BUMI'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_spop_LUAS_BUMI'), table_name='spop')
+    op.drop_index(op.f('ix_spop_JALAN_OP'), table_name='spop')
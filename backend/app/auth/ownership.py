@@ -0,0 +1,74 @@
+"""
+Resolusi kepemilikan objek pajak per user
+
+Wajib pajak memiliki objek lewat dat_subjek_pajak.EMAIL_WP -> SUBJEK_PAJAK_ID
+-> spop. Himpunan SUBJEK_PAJAK_ID dan NOP milik satu email dihitung sekali
+lalu di-cache, sehingga query per NOP cukup dicek di memori dan query list
+memfilter NOP IN (...) tanpa join ke dat_subjek_pajak.
+"""
+from dataclasses import dataclass
+from typing import FrozenSet, Optional
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.dat_subjek_pajak import DatSubjekPajak
+from app.models.spop import Spop
+
+
+@dataclass(frozen=True)
+class Ownership:
+    subjek_pajak_ids: FrozenSet[str]
+    nops: FrozenSet[str]
+
+    def owns(self, nop: str) -> bool:
+        return nop in self.nops
+
+
+# email -> Ownership
+_cache = LRUCache(maxsize=settings.OWNERSHIP_CACHE_SIZE, ttl=settings.OWNERSHIP_CACHE_TTL)
+
+
+class OwnershipService:
+    """Akses objek milik user, di-cache per email"""
+
+    @staticmethod
+    async def load(session: AsyncSession, email: str) -> Ownership:
+        """Hitung ulang kepemilikan dari database (satu query)"""
+        result = await session.execute(
+            select(DatSubjekPajak.SUBJEK_PAJAK_ID, Spop.NOP)
+            .outerjoin(Spop, Spop.SUBJEK_PAJAK_ID == DatSubjekPajak.SUBJEK_PAJAK_ID)
+            .where(DatSubjekPajak.EMAIL_WP == email)
+        )
+        rows = result.all()
+        return Ownership(
+            subjek_pajak_ids=frozenset(row.SUBJEK_PAJAK_ID for row in rows),
+            nops=frozenset(row.NOP for row in rows if row.NOP),
+        )
+
+    @staticmethod
+    async def resolve(session: AsyncSession, email: str) -> Ownership:
+        """Kepemilikan untuk email, dari cache jika ada"""
+        email = str(email)
+        ownership = _cache.get(email)
+        if ownership is None:
+            ownership = await OwnershipService.load(session, email)
+            _cache.set(email, ownership)
+        return ownership
+
+    @staticmethod
+    def invalidate(email: Optional[str] = None) -> None:
+        """
+        Buang cache satu email, atau semua jika email None (mis. setelah SPOP
+        dibuat/diubah, karena pemilik lama objek tidak diketahui)
+        """
+        if email is None:
+            _cache.clear()
+        else:
+            _cache.pop(str(email))
+
+    @staticmethod
+    def stats() -> dict:
+        return _cache.stats()
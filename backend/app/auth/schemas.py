@@ -40,6 +40,7 @@ class TokenResponse(SQLModel):
 
 class TokenPayload(SQLModel):
     sub: str | None = None
+    jti: str | None = None
 
 
 class ResetPasswordRequest(SQLModel):
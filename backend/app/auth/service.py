@@ -5,8 +5,11 @@ from fastapi import Depends, HTTPException
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
 from sqlalchemy.exc import OperationalError, DisconnectionError
+from sqlalchemy.orm import make_transient_to_detached
 
 from app.core import security
+from app.core.cache import LRUCache
+from app.core.config import settings
 from app.core.database import get_async_session
 from app.core.deps import SessionDep, get_token
 from .schemas import RegisterRequest, TokenPayload
@@ -15,6 +18,25 @@ from app.models.user import User
 
 logger = logging.getLogger(__name__)
 
+# (user_id, jti) -> snapshot kolom User. TTL pendek agar perubahan yang tidak
+# lewat API (mis. langsung di database) tetap terbaca dalam hitungan detik.
+user_cache = LRUCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+
+def invalidate_user_cache(user_id: UUID) -> None:
+    """Buang user dari cache (semua token); panggil setiap kali baris ipbb_user diubah/dihapus"""
+    user_cache.pop_matching(lambda key: key[0] == user_id)
+
+
+async def _user_from_snapshot(session: AsyncSession, snapshot: dict) -> User:
+    """
+    Bangun User dari snapshot dan tempelkan ke session request tanpa query,
+    sehingga endpoint tetap bisa mengubah lalu commit current_user seperti biasa.
+    """
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return await session.merge(user, load=False)
+
 
 async def retry_db_operation(operation, max_retries=3, delay=1):
     """Retry database operations with exponential backoff for MySQL 5 compatibility"""
@@ -67,17 +89,24 @@ async def get_user(
             detail={"code": "USER_INVALID_ID", "msg": "Invalid user ID"},
         )
 
-    # Retry database operation for MySQL 5 compatibility
-    async def get_user_operation():
-        return await session.get(User, user_id)
-
-    user = await retry_db_operation(get_user_operation)
-
-    if not user:
-        raise HTTPException(
-            status_code=404,
-            detail={"code": "USER_NOT_FOUND", "msg": "User not found"},
-        )
+    cache_key = (user_id, token_data.jti)
+    snapshot = user_cache.get(cache_key) if settings.USER_CACHE_TTL > 0 and token_data.jti else None
+    if snapshot is not None:
+        user = await _user_from_snapshot(session, snapshot)
+    else:
+        # Retry database operation for MySQL 5 compatibility
+        async def get_user_operation():
+            return await session.get(User, user_id)
+
+        user = await retry_db_operation(get_user_operation)
+
+        if not user:
+            raise HTTPException(
+                status_code=404,
+                detail={"code": "USER_NOT_FOUND", "msg": "User not found"},
+            )
+        if settings.USER_CACHE_TTL > 0 and token_data.jti:
+            user_cache.set(cache_key, user.model_dump())
 
     if require_active and not user.is_active:
         raise HTTPException(
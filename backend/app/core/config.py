@@ -1,7 +1,9 @@
 from datetime import timedelta
+import importlib.util
 import secrets
-from typing import Set
+from typing import Literal, Set
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -47,9 +49,65 @@ class Settings(BaseSettings):
     # CORS
     CORS_ORIGINS: Set[str]
 
+    # Peta GIS
+    PETA_GEOMETRY_CACHE_SIZE: int = 10000
+    PETA_CACHE_CHECK_INTERVAL: int = 30  # detik
+    PETA_TILE_CACHE_SIZE: int = 2048
+    PETA_TILE_MIN_ZOOM: int = 13
+    PETA_GEOMETRY_WORKERS: int = 2  # thread untuk parse WKT / encode tile
+    PETA_GEOMETRY_QUEUE_SIZE: int = 32  # antrean maksimum sebelum request ditolak (503)
+
+    # Referensi wilayah (ref_propinsi/dati2/kecamatan/kelurahan)
+    REFERENCE_REFRESH_INTERVAL: int = 3600  # detik, 0 = tidak refresh otomatis
+
+    # Maksimum koneksi pool yang dipakai bersamaan oleh fan-out run_concurrently
+    # (seluruh request di satu worker). Pool = 5 + overflow 10 (app/core/database.py);
+    # sisanya untuk session request biasa, jadi fan-out tidak bisa menghabiskan pool
+    DB_FANOUT_CONNECTIONS: int = 5
+
+    # Pencarian fuzzy objek pajak (index trigram di memori)
+    SEARCH_INDEX_ENABLED: bool = True
+    SEARCH_MIN_SIMILARITY: float = 0.3  # proporsi minimal trigram query yang cocok
+
+    # Cache response dashboard / laporan
+    DASHBOARD_CACHE_TTL: int = 300  # detik
+    DASHBOARD_CACHE_SIZE: int = 256
+    CACHE_BACKEND: Literal["memory", "redis"] = "memory"  # "memory" (per proses) atau "redis"
+    REDIS_URL: str | None = None  # mis. redis://localhost:6379/0
+
+    # Cache user login per (user id, jti token), menghindari baca ipbb_user setiap request
+    USER_CACHE_TTL: int = 30  # detik, 0 = nonaktif
+    USER_CACHE_SIZE: int = 2048
+
+    # Cache kepemilikan objek (email -> SUBJEK_PAJAK_ID & NOP)
+    OWNERSHIP_CACHE_TTL: int = 300  # detik
+    OWNERSHIP_CACHE_SIZE: int = 4096
+
+    # Impor file pembayaran bank (commands/ingest_payments.py)
+    PAYMENT_INGEST_CHUNK_SIZE: int = 2000  # baris per INSERT / transaksi
+
+    # Ekspor laporan SPPT (CSV/XLSX)
+    EXPORT_BATCH_SIZE: int = 1000  # baris per fetch server-side cursor
+    EXPORT_DIR: str | None = None  # folder hasil job ekspor, default temp dir sistem
+    EXPORT_JOB_TTL: int = 3600  # detik hasil job disimpan setelah selesai
+    EXPORT_MAX_RUNNING_JOBS: int = 2
+
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", extra="ignore"
     )
 
+    @model_validator(mode="after")
+    def check_cache_backend(self):
+        # Gagal saat startup, bukan saat request pertama ke dashboard.
+        # Package redis tidak termasuk dependency default (pip install redis).
+        if self.CACHE_BACKEND == "redis":
+            if not self.REDIS_URL:
+                raise ValueError("CACHE_BACKEND=redis membutuhkan REDIS_URL")
+            if importlib.util.find_spec("redis") is None:
+                raise ValueError(
+                    "CACHE_BACKEND=redis membutuhkan package 'redis' (pip install redis)"
+                )
+        return self
+
 
 settings = Settings()
@@ -1,4 +1,5 @@
-from typing import AsyncGenerator
+import asyncio
+from typing import Any, AsyncGenerator, Awaitable, Callable, Tuple
 
 from fastapi import Depends
 from fastapi_users.db import SQLAlchemyUserDatabase
@@ -50,5 +51,37 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+async def in_own_session(func: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+    """
+    Jalankan func(session, *args) dengan session (koneksi pool) sendiri,
+    agar beberapa query bisa berjalan bersamaan lewat asyncio.gather.
+    Satu AsyncSession tidak boleh dipakai oleh dua query sekaligus.
+    """
+    async with async_session_maker() as session:
+        return await func(session, *args)
+
+
+# Slot koneksi untuk fan-out. Setiap panggilan hanya memegang satu koneksi dan
+# melepasnya sebelum menunggu yang lain, jadi fan-out tidak saling mengunci pool.
+_fanout_slots = asyncio.Semaphore(settings.DB_FANOUT_CONNECTIONS)
+
+
+async def _in_fanout_slot(func: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+    async with _fanout_slots:
+        return await in_own_session(func, *args)
+
+
+async def run_concurrently(*calls: Tuple) -> list:
+    """
+    Jalankan beberapa (func, *args) bersamaan, masing-masing di session sendiri
+
+    Latensi total mengikuti query paling lambat, bukan jumlah semuanya.
+    Jumlah koneksi fan-out yang aktif dibatasi DB_FANOUT_CONNECTIONS.
+    Pemanggil sebaiknya melepas session request (await session.close())
+    sebelumnya agar tidak memegang koneksi selama menunggu slot.
+    """
+    return await asyncio.gather(*(_in_fanout_slot(func, *args) for func, *args in calls))
+
+
 async def get_user_db(session: AsyncSession = Depends(get_async_session)):
     yield SQLAlchemyUserDatabase(session, User)
@@ -0,0 +1,105 @@
+"""
+Thread pool terbatas untuk pekerjaan CPU-bound (parse geometry, encode tile)
+agar tidak memblokir event loop dan tidak menghabiskan thread pool default
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class ExecutorBusy(Exception):
+    """Antrean BoundedExecutor penuh; router memetakan ke 503"""
+
+
+class BoundedExecutor:
+    """
+    ThreadPoolExecutor dengan batas antrean dan metrik sederhana
+
+    Jika jumlah pekerjaan yang sedang berjalan + mengantre sudah mencapai
+    max_workers + max_queue, pekerjaan baru langsung ditolak (ExecutorBusy),
+    sehingga lonjakan trafik peta tidak membuat request lain ikut menunggu.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+
+        self.pending = 0  # sedang berjalan + mengantre
+        self.max_pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait = 0.0  # detik di antrean sebelum mulai dijalankan
+        self.total_run = 0.0
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Jalankan func(*args) di pool dan tunggu hasilnya"""
+        with self._lock:
+            if self.pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorBusy(f"{self.name}: antrean penuh ({self.pending} pekerjaan)")
+            self.pending += 1
+            self.submitted += 1
+            self.max_pending = max(self.max_pending, self.pending)
+
+        queued_at = time.perf_counter()
+
+        def task():
+            started_at = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                finished_at = time.perf_counter()
+                with self._lock:
+                    self.total_wait += started_at - queued_at
+                    self.total_run += finished_at - started_at
+
+        def done(future: Future):
+            # Dihitung saat pekerjaan di pool benar-benar selesai (atau dibatalkan
+            # sebelum mulai), bukan saat request yang menunggu dibatalkan
+            with self._lock:
+                self.pending -= 1
+                if future.cancelled() or future.exception() is not None:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+
+        try:
+            future = self._executor.submit(task)
+        except RuntimeError:
+            # Pool sudah di-shutdown
+            with self._lock:
+                self.pending -= 1
+                self.failed += 1
+            raise
+        future.add_done_callback(done)
+        # Request dibatalkan: future dibatalkan jika belum mulai, jika sudah
+        # berjalan pending tetap terhitung sampai selesai
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": min(self.pending, self.max_workers),
+                "queue_depth": max(self.pending - self.max_workers, 0),
+                "max_pending": self.max_pending,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait / finished * 1000, 2) if finished else 0.0,
+                "avg_run_ms": round(self.total_run / finished * 1000, 2) if finished else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,89 @@
+"""
+Keyset (seek) pagination
+
+Alih-alih OFFSET (yang makin lambat di halaman dalam), halaman berikutnya
+diambil dengan WHERE (kolom urut) > (nilai baris terakhir) memakai index,
+sehingga biaya halaman 1 dan halaman 500 sama. Posisi baris terakhir dikirim
+ke client sebagai cursor opaque (base64 JSON).
+"""
+import base64
+import binascii
+import json
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, false, or_
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Nilai kolom urut baris terakhir -> cursor opaque"""
+    payload = json.dumps(
+        [float(v) if isinstance(v, Decimal) else v for v in values],
+        separators=(",", ":"),
+        default=str,
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Cursor -> nilai kolom urut; 400 jika cursor rusak / bukan untuk urutan ini"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor tidak valid"
+        )
+    return values
+
+
+def keyset_order(columns: Sequence[Any], descending: bool = False) -> List[Any]:
+    """ORDER BY untuk kolom keyset (semua kolom satu arah agar bisa memakai index)"""
+    return [column.desc() if descending else column.asc() for column in columns]
+
+
+def keyset_condition(columns: Sequence[Any], values: Sequence[Any], descending: bool = False):
+    """
+    Kondisi "sesudah baris (values)" untuk urutan keyset_order(columns)
+
+    Ditulis sebagai a > x OR (a = x AND (b > y OR ...)) karena MySQL 5
+    tidak memakai index untuk perbandingan row constructor (a, b) > (x, y).
+
+    Kolom nullable dibandingkan langsung (bukan COALESCE, agar index tetap
+    terpakai) dengan cabang IS NULL mengikuti urutan MySQL: NULL paling awal
+    di ASC dan paling akhir di DESC.
+    """
+    condition = None
+    for column, value in reversed(list(zip(columns, values))):
+        if value is None:
+            after = false() if descending else column.is_not(None)
+            same = column.is_(None)
+        else:
+            after = column < value if descending else column > value
+            if descending and getattr(column, "nullable", False):
+                after = or_(after, column.is_(None))
+            same = column == value
+        condition = after if condition is None else or_(after, and_(same, condition))
+    return condition
+
+
+def keyset_page(
+    rows: Sequence[Any],
+    limit: int,
+    key: Callable[[Any], Sequence[Any]],
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Potong hasil query yang diambil dengan LIMIT limit + 1
+
+    Returns:
+        (baris halaman ini, next_cursor atau None jika sudah halaman terakhir)
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
@@ -0,0 +1,162 @@
+"""
+Cache response endpoint (JSON) dengan TTL, batas ukuran dan single-flight
+
+Backend default in-process (LRUCache per worker). Set CACHE_BACKEND=redis
+dan REDIS_URL untuk memakai Redis (atau store kompatibel) bersama antar worker;
+package redis bukan dependency default dan harus dipasang terpisah.
+"""
+import asyncio
+import json
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+
+class MemoryCacheBackend:
+    """Backend in-process, eviction LRU + TTL (lihat app/core/cache.py)"""
+
+    def __init__(self, maxsize: int):
+        self._cache = LRUCache(maxsize=maxsize)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    async def clear(self, prefix: str) -> None:
+        self._cache.pop_matching(lambda key: key.startswith(prefix))
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class RedisCacheBackend:
+    """Backend Redis; batas ukuran diatur oleh maxmemory-policy di server Redis"""
+
+    def __init__(self, url: str):
+        # Keberadaan package redis dan REDIS_URL sudah dicek Settings saat startup
+        import redis.asyncio as redis
+        self._redis = redis.from_url(url)
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self._redis.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self._redis.set(key, value, ex=ttl)
+
+    async def clear(self, prefix: str) -> None:
+        keys = [key async for key in self._redis.scan_iter(match=f"{prefix}*", count=500)]
+        if keys:
+            await self._redis.delete(*keys)
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses}
+
+
+def create_backend(maxsize: int):
+    """Backend sesuai settings.CACHE_BACKEND ("memory" atau "redis")"""
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCacheBackend(settings.REDIS_URL)
+    return MemoryCacheBackend(maxsize)
+
+
+class ResponseCache:
+    """
+    Cache hasil endpoint per namespace, key = nama endpoint + parameter filter
+    yang dinormalisasi (None/string kosong diabaikan, urutan tidak berpengaruh)
+
+    Beberapa request bersamaan untuk key yang sama dan belum ada di cache hanya
+    menjalankan satu query (single-flight): factory berjalan di task sendiri
+    yang ditunggu semua request, sehingga request yang dibatalkan (client
+    putus) tidak membatalkan request lain. invalidate() menaikkan generasi;
+    hasil yang mulai dihitung sebelum invalidate tidak disimpan ke cache.
+    """
+
+    def __init__(self, namespace: str, ttl: int, maxsize: int):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.backend = create_backend(maxsize)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._generation = 0
+
+    def make_key(self, name: str, params: Dict[str, Any]) -> str:
+        normalized = {}
+        for key, value in params.items():
+            if isinstance(value, str):
+                value = value.strip()
+            if value is None or value == "":
+                continue
+            normalized[key] = value
+        return f"{self.namespace}:{name}:{json.dumps(normalized, sort_keys=True, default=str)}"
+
+    async def get_or_set(
+        self,
+        name: str,
+        params: Dict[str, Any],
+        factory: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Ambil hasil dari cache, atau jalankan factory() (hasil harus bisa di-JSON-kan)
+
+        Args:
+            name: Nama endpoint
+            params: Parameter filter yang menentukan isi response
+            factory: Coroutine function yang menghitung response. Berjalan di
+                task sendiri yang bisa melewati umur request pemanggil, jadi
+                jangan memakai session request (pakai in_own_session)
+        """
+        key = self.make_key(name, params)
+
+        cached = await self.backend.get(key)
+        if cached is not None:
+            return json.loads(cached)
+
+        task = self._inflight.get(key)
+        if task is None:
+            # Generasi dicatat saat task dibuat, bukan saat task mulai berjalan
+            task = asyncio.create_task(self._compute(key, factory, self._generation))
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._finished, key))
+        # shield: pembatalan request ini tidak ikut membatalkan task bersama
+        encoded = await asyncio.shield(task)
+        # Miss dan hit sama-sama mengembalikan hasil decode JSON
+        return json.loads(encoded)
+
+    async def _compute(self, key: str, factory: Callable[[], Awaitable[Any]], generation: int) -> bytes:
+        value = await factory()
+        encoded = json.dumps(value, default=str).encode("utf-8")
+        if generation == self._generation:
+            await self.backend.set(key, encoded, self.ttl)
+        return encoded
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Hindari warning "exception was never retrieved" jika semua request sudah batal
+        if not task.cancelled():
+            task.exception()
+
+    async def invalidate(self) -> None:
+        """Hapus semua entry namespace ini, termasuk hasil yang sedang dihitung"""
+        self._generation += 1
+        # Request berikutnya menghitung ulang, tidak menunggu hasil generasi lama
+        self._inflight.clear()
+        await self.backend.clear(f"{self.namespace}:")
+
+    def stats(self) -> dict:
+        return {
+            "namespace": self.namespace,
+            "ttl": self.ttl,
+            "inflight": len(self._inflight),
+            **self.backend.stats(),
+        }
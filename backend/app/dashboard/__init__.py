@@ -0,0 +1,6 @@
+"""
+Dashboard Module
+"""
+from app.dashboard.service import DashboardService, dashboard_cache
+
+__all__ = ["DashboardService", "dashboard_cache"]
@@ -0,0 +1,322 @@
+"""
+Ekspor laporan SPPT (sppt_report) ke CSV / XLSX
+
+Baris dibaca lewat server-side cursor (conn.stream) per batch dan langsung
+ditulis ke output tanpa validasi model per baris, sehingga memori tetap
+konstan berapapun jumlah baris. XLSX ditulis sendiri sebagai zip streaming
+(tanpa dependency tambahan): sheet dikompresi bertahap dan setiap batch
+langsung dikirim ke client.
+
+Ekspor besar bisa dijalankan sebagai job background: hasilnya ditulis ke
+file di EXPORT_DIR, status di-poll lalu file diunduh. Registry job disimpan
+di memori per proses (seperti MemoryCacheBackend).
+"""
+import asyncio
+import csv
+import io
+import os
+import tempfile
+import uuid
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+from fastapi import HTTPException, status
+from sqlmodel import and_, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.sppt_report import SpptReport
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+# Urutan kolom file ekspor = urutan kolom tabel sppt_report
+EXPORT_COLUMNS: List[str] = [column.name for column in SpptReport.__table__.columns]
+
+
+async def resolve_year(session: AsyncSession, year: Optional[str]) -> Optional[str]:
+    """Tahun filter; default tahun terbaru seperti /dashboard/sppt-report/data"""
+    if year:
+        return year
+    result = await session.execute(select(func.max(SpptReport.THN_PAJAK_SPPT)))
+    return result.scalar()
+
+
+def export_filename(year: Optional[str], kd_kecamatan: Optional[str], fmt: str) -> str:
+    parts = ["laporan_sppt", year or "semua"]
+    if kd_kecamatan:
+        parts.append(kd_kecamatan)
+    return "_".join(parts) + "." + EXPORT_FORMATS[fmt][1]
+
+
+async def iter_report_batches(year: Optional[str], kd_kecamatan: Optional[str]) -> AsyncIterator[Sequence[tuple]]:
+    """Baris sppt_report (tuple mentah, urutan EXPORT_COLUMNS) per batch dari server-side cursor"""
+    conditions = []
+    if year:
+        conditions.append(SpptReport.THN_PAJAK_SPPT == year)
+    if kd_kecamatan:
+        conditions.append(SpptReport.KD_KECAMATAN == kd_kecamatan)
+
+    query = select(*SpptReport.__table__.columns).order_by(
+        SpptReport.THN_PAJAK_SPPT, SpptReport.NM_KECAMATAN, SpptReport.NM_KELURAHAN
+    )
+    if conditions:
+        query = query.where(and_(*conditions))
+
+    batch_size = settings.EXPORT_BATCH_SIZE
+    # Koneksi sendiri (bukan session request): dipegang selama response streaming
+    async with engine.connect() as conn:
+        result = await conn.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions(batch_size):
+            yield rows
+
+
+async def csv_chunks(batches: AsyncIterator[Sequence[tuple]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM agar Excel membaca UTF-8 dengan benar
+    buffer.write("\ufeff")
+    writer.writerow(EXPORT_COLUMNS)
+    async for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkBuffer:
+    """
+    File-like tanpa tell/seek: zipfile menulis data descriptor setelah tiap
+    entry, sehingga isi zip bisa diambil (drain) dan dikirim bertahap
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Laporan SPPT" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+SHEET_TAIL = "</sheetData></worksheet>"
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+_COLUMN_LETTERS = [_column_letter(i) for i in range(len(EXPORT_COLUMNS))]
+
+
+def _xlsx_row(row_no: int, values: Sequence) -> str:
+    cells = []
+    for i, value in enumerate(values):
+        if value is None:
+            continue
+        ref = f"{_COLUMN_LETTERS[i]}{row_no}"
+        # Kode wilayah/tahun dari DB berupa str: tetap teks agar nol di depan tidak hilang
+        if isinstance(value, str):
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t>{escape(str(value))}</t></is></c>')
+        else:
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+    return f'<row r="{row_no}">{"".join(cells)}</row>'
+
+
+async def xlsx_chunks(batches: AsyncIterator[Sequence[tuple]]) -> AsyncIterator[bytes]:
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in XLSX_PARTS.items():
+            zf.writestr(name, content)
+        with zf.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            header = "".join(
+                f'<c r="{_COLUMN_LETTERS[i]}1" t="inlineStr"><is><t>{name}</t></is></c>'
+                for i, name in enumerate(EXPORT_COLUMNS)
+            )
+            sheet.write((SHEET_HEAD + f'<row r="1">{header}</row>').encode("utf-8"))
+            row_no = 1
+            async for rows in batches:
+                parts = []
+                for row in rows:
+                    row_no += 1
+                    parts.append(_xlsx_row(row_no, row))
+                sheet.write("".join(parts).encode("utf-8"))
+                yield buffer.drain()
+            sheet.write(SHEET_TAIL.encode("utf-8"))
+    yield buffer.drain()
+
+
+def export_chunks(fmt: str, year: Optional[str], kd_kecamatan: Optional[str],
+                  batches: Optional[AsyncIterator[Sequence[tuple]]] = None) -> AsyncIterator[bytes]:
+    """Isi file ekspor (bytes) bertahap, untuk StreamingResponse atau job"""
+    batches = batches or iter_report_batches(year, kd_kecamatan)
+    return csv_chunks(batches) if fmt == "csv" else xlsx_chunks(batches)
+
+
+@dataclass
+class ExportJob:
+    id: str
+    format: str
+    year: Optional[str]
+    kd_kecamatan: Optional[str]
+    status: str = "pending"  # pending, running, done, failed
+    rows: int = 0
+    size: int = 0
+    error: Optional[str] = None
+    path: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    finished_at: Optional[datetime] = None
+
+    @property
+    def filename(self) -> str:
+        return export_filename(self.year, self.kd_kecamatan, self.format)
+
+    def as_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "format": self.format,
+            "year": self.year,
+            "kd_kecamatan": self.kd_kecamatan,
+            "rows": self.rows,
+            "size": self.size,
+            "filename": self.filename,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+_jobs: Dict[str, ExportJob] = {}
+_tasks: Dict[str, asyncio.Task] = {}
+
+
+class ExportJobService:
+    """Job ekspor background; hasil disimpan EXPORT_JOB_TTL detik"""
+
+    @staticmethod
+    def _prune() -> None:
+        now = datetime.now()
+        for job_id, job in list(_jobs.items()):
+            if job.finished_at and (now - job.finished_at).total_seconds() > settings.EXPORT_JOB_TTL:
+                if job.path and os.path.exists(job.path):
+                    os.remove(job.path)
+                del _jobs[job_id]
+
+    @staticmethod
+    async def _run(job: ExportJob) -> None:
+        job.status = "running"
+        directory = settings.EXPORT_DIR or tempfile.gettempdir()
+        os.makedirs(directory, exist_ok=True)
+        job.path = os.path.join(directory, f"sppt_report_{job.id}.{EXPORT_FORMATS[job.format][1]}")
+
+        async def counted():
+            async for rows in iter_report_batches(job.year, job.kd_kecamatan):
+                job.rows += len(rows)
+                yield rows
+
+        try:
+            with open(job.path, "wb") as f:
+                async for chunk in export_chunks(job.format, job.year, job.kd_kecamatan, counted()):
+                    f.write(chunk)
+                    job.size += len(chunk)
+            job.status = "done"
+        except (Exception, asyncio.CancelledError) as e:
+            print(f"[EXPORT] Job {job.id} failed: {e!r}")
+            job.status, job.error = "failed", str(e) or type(e).__name__
+            if os.path.exists(job.path):
+                os.remove(job.path)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            job.finished_at = datetime.now()
+            _tasks.pop(job.id, None)
+
+    @staticmethod
+    def start(fmt: str, year: Optional[str], kd_kecamatan: Optional[str]) -> ExportJob:
+        ExportJobService._prune()
+        if len(_tasks) >= settings.EXPORT_MAX_RUNNING_JOBS:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Terlalu banyak ekspor yang sedang berjalan, coba lagi nanti",
+            )
+        job = ExportJob(id=uuid.uuid4().hex, format=fmt, year=year, kd_kecamatan=kd_kecamatan)
+        _jobs[job.id] = job
+        _tasks[job.id] = asyncio.create_task(ExportJobService._run(job))
+        return job
+
+    @staticmethod
+    def get(job_id: str) -> ExportJob:
+        ExportJobService._prune()
+        job = _jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job ekspor tidak ditemukan atau sudah kedaluwarsa")
+        return job
+
+    @staticmethod
+    async def stop() -> None:
+        """Batalkan job yang masih berjalan saat shutdown"""
+        for task in list(_tasks.values()):
+            task.cancel()
+        await asyncio.gather(*_tasks.values(), return_exceptions=True)
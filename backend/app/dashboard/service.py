@@ -0,0 +1,264 @@
+"""
+Service layer untuk statistik dashboard admin
+Statistik SPPT & bangunan dibaca dari tabel rollup per kelurahan
+(dashboard_rollup_sppt, dashboard_rollup_bangunan) yang dijaga trigger MySQL
+"""
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlmodel import select, func, and_
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.database import run_concurrently
+from app.core.response_cache import ResponseCache
+from app.models.dashboard_rollup import DashboardRollupSppt, DashboardRollupBangunan
+from app.reference import ReferenceService
+
+# Hitung ulang rollup dari tabel sumber. Dipakai endpoint rebuild jika trigger
+# sempat tidak aktif (mis. data dimuat ulang lewat dump dengan trigger dimatikan).
+# Upsert + hapus baris yatim, sehingga tabel rollup tidak pernah kosong saat rebuild.
+REBUILD_SPPT_SQL = """
+    INSERT INTO dashboard_rollup_sppt (
+        THN_PAJAK_SPPT, KD_PROPINSI, KD_DATI2, KD_KECAMATAN, KD_KELURAHAN,
+        TOTAL_SPPT, TOTAL_LUNAS, TOTAL_BELUM_LUNAS, TOTAL_PBB_TERHUTANG
+    )
+    SELECT
+        THN_PAJAK_SPPT, KD_PROPINSI, KD_DATI2, KD_KECAMATAN, KD_KELURAHAN,
+        COUNT(*),
+        SUM(CASE WHEN STATUS_PEMBAYARAN_SPPT = 1 THEN 1 ELSE 0 END),
+        SUM(CASE WHEN STATUS_PEMBAYARAN_SPPT = 0 THEN 1 ELSE 0 END),
+        COALESCE(SUM(PBB_TERHUTANG_SPPT), 0)
+    FROM sppt
+    GROUP BY THN_PAJAK_SPPT, KD_PROPINSI, KD_DATI2, KD_KECAMATAN, KD_KELURAHAN
+    ON DUPLICATE KEY UPDATE
+        TOTAL_SPPT = VALUES(TOTAL_SPPT),
+        TOTAL_LUNAS = VALUES(TOTAL_LUNAS),
+        TOTAL_BELUM_LUNAS = VALUES(TOTAL_BELUM_LUNAS),
+        TOTAL_PBB_TERHUTANG = VALUES(TOTAL_PBB_TERHUTANG)
+"""
+
+PRUNE_SPPT_SQL = """
+    DELETE r FROM dashboard_rollup_sppt r
+    WHERE NOT EXISTS (
+        SELECT 1 FROM sppt s
+        WHERE s.THN_PAJAK_SPPT = r.THN_PAJAK_SPPT
+          AND s.KD_PROPINSI = r.KD_PROPINSI
+          AND s.KD_DATI2 = r.KD_DATI2
+          AND s.KD_KECAMATAN = r.KD_KECAMATAN
+          AND s.KD_KELURAHAN = r.KD_KELURAHAN
+    )
+"""
+
+REBUILD_BANGUNAN_SQL = """
+    INSERT INTO dashboard_rollup_bangunan (
+        KD_PROPINSI, KD_DATI2, KD_KECAMATAN, KD_KELURAHAN,
+        TOTAL_BANGUNAN, TOTAL_NILAI_BANGUNAN, TOTAL_LUAS_BANGUNAN, JUMLAH_BANGUNAN_BERLUAS
+    )
+    SELECT
+        KD_PROPINSI, KD_DATI2, KD_KECAMATAN, KD_KELURAHAN,
+        COUNT(*),
+        COALESCE(SUM(NILAI_SISTEM_BNG), 0),
+        COALESCE(SUM(CASE WHEN LUAS_BNG > 0 THEN LUAS_BNG ELSE 0 END), 0),
+        SUM(CASE WHEN LUAS_BNG > 0 THEN 1 ELSE 0 END)
+    FROM dat_op_bangunan
+    WHERE AKTIF = 1
+    GROUP BY KD_PROPINSI, KD_DATI2, KD_KECAMATAN, KD_KELURAHAN
+    ON DUPLICATE KEY UPDATE
+        TOTAL_BANGUNAN = VALUES(TOTAL_BANGUNAN),
+        TOTAL_NILAI_BANGUNAN = VALUES(TOTAL_NILAI_BANGUNAN),
+        TOTAL_LUAS_BANGUNAN = VALUES(TOTAL_LUAS_BANGUNAN),
+        JUMLAH_BANGUNAN_BERLUAS = VALUES(JUMLAH_BANGUNAN_BERLUAS)
+"""
+
+PRUNE_BANGUNAN_SQL = """
+    DELETE r FROM dashboard_rollup_bangunan r
+    WHERE NOT EXISTS (
+        SELECT 1 FROM dat_op_bangunan b
+        WHERE b.AKTIF = 1
+          AND b.KD_PROPINSI = r.KD_PROPINSI
+          AND b.KD_DATI2 = r.KD_DATI2
+          AND b.KD_KECAMATAN = r.KD_KECAMATAN
+          AND b.KD_KELURAHAN = r.KD_KELURAHAN
+    )
+"""
+
+# Cache response endpoint dashboard & laporan SPPT. Data berubah hanya saat
+# pembayaran masuk / load sppt_report malam hari, jadi TTL pendek sudah cukup;
+# admin bisa mengosongkan lebih awal lewat POST /dashboard/cache/invalidate.
+dashboard_cache = ResponseCache(
+    "dashboard",
+    ttl=settings.DASHBOARD_CACHE_TTL,
+    maxsize=settings.DASHBOARD_CACHE_SIZE,
+)
+
+
+class DashboardService:
+    """Service untuk statistik dashboard admin"""
+
+    @staticmethod
+    def _region_conditions(
+        model,
+        kd_propinsi: Optional[str],
+        kd_dati2: Optional[str],
+        kd_kecamatan: Optional[str],
+        kd_kelurahan: Optional[str],
+    ) -> list:
+        """Kondisi WHERE wilayah untuk tabel yang punya kolom KD_PROPINSI..KD_KELURAHAN"""
+        conditions = []
+        if kd_propinsi:
+            conditions.append(model.KD_PROPINSI == kd_propinsi)
+        if kd_dati2:
+            conditions.append(model.KD_DATI2 == kd_dati2)
+        if kd_kecamatan:
+            conditions.append(model.KD_KECAMATAN == kd_kecamatan)
+        if kd_kelurahan:
+            conditions.append(model.KD_KELURAHAN == kd_kelurahan)
+        return conditions
+
+    @staticmethod
+    async def get_sppt_stats(
+        session: AsyncSession,
+        year: Optional[str] = None,
+        kd_propinsi: Optional[str] = None,
+        kd_dati2: Optional[str] = None,
+        kd_kecamatan: Optional[str] = None,
+        kd_kelurahan: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Jumlah SPPT (total/lunas/belum lunas) dan total PBB terhutang dari rollup"""
+        conditions = DashboardService._region_conditions(
+            DashboardRollupSppt, kd_propinsi, kd_dati2, kd_kecamatan, kd_kelurahan
+        )
+        if year:
+            conditions.append(DashboardRollupSppt.THN_PAJAK_SPPT == year)
+
+        query = select(
+            func.sum(DashboardRollupSppt.TOTAL_SPPT).label("total_sppt"),
+            func.sum(DashboardRollupSppt.TOTAL_LUNAS).label("total_sppt_lunas"),
+            func.sum(DashboardRollupSppt.TOTAL_BELUM_LUNAS).label("total_sppt_belum_lunas"),
+            func.sum(DashboardRollupSppt.TOTAL_PBB_TERHUTANG).label("total_pbb_terhutang"),
+        )
+        if conditions:
+            query = query.where(and_(*conditions))
+
+        row = (await session.execute(query)).first()
+        return {
+            "total_sppt": int(row.total_sppt or 0),
+            "total_sppt_lunas": int(row.total_sppt_lunas or 0),
+            "total_sppt_belum_lunas": int(row.total_sppt_belum_lunas or 0),
+            "total_pbb_terhutang": float(row.total_pbb_terhutang or 0),
+        }
+
+    @staticmethod
+    async def get_bangunan_stats(
+        session: AsyncSession,
+        kd_propinsi: Optional[str] = None,
+        kd_dati2: Optional[str] = None,
+        kd_kecamatan: Optional[str] = None,
+        kd_kelurahan: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Jumlah, total nilai dan rata-rata luas bangunan aktif dari rollup"""
+        conditions = DashboardService._region_conditions(
+            DashboardRollupBangunan, kd_propinsi, kd_dati2, kd_kecamatan, kd_kelurahan
+        )
+
+        query = select(
+            func.sum(DashboardRollupBangunan.TOTAL_BANGUNAN).label("total_bangunan"),
+            func.sum(DashboardRollupBangunan.TOTAL_NILAI_BANGUNAN).label("total_nilai_bangunan"),
+            func.sum(DashboardRollupBangunan.TOTAL_LUAS_BANGUNAN).label("total_luas_bangunan"),
+            func.sum(DashboardRollupBangunan.JUMLAH_BANGUNAN_BERLUAS).label("jumlah_bangunan_berluas"),
+        )
+        if conditions:
+            query = query.where(and_(*conditions))
+
+        row = (await session.execute(query)).first()
+        jumlah_berluas = int(row.jumlah_bangunan_berluas or 0)
+        return {
+            "total_bangunan": int(row.total_bangunan or 0),
+            "total_nilai_bangunan": float(row.total_nilai_bangunan or 0),
+            "rata_rata_luas_bangunan": (
+                float(row.total_luas_bangunan or 0) / jumlah_berluas if jumlah_berluas else 0.0
+            ),
+        }
+
+    @staticmethod
+    async def get_filter_label(
+        kd_propinsi: Optional[str] = None,
+        kd_dati2: Optional[str] = None,
+        kd_kecamatan: Optional[str] = None,
+        kd_kelurahan: Optional[str] = None,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Level filter wilayah paling detail beserta namanya, mis. ("kecamatan", "DENPASAR BARAT")"""
+        tree = await ReferenceService.get_tree()
+        if kd_kelurahan:
+            name = tree.get_name(kd_propinsi, kd_dati2, kd_kecamatan, kd_kelurahan)
+            return "kelurahan", name or kd_kelurahan
+        if kd_kecamatan:
+            return "kecamatan", tree.get_name(kd_propinsi, kd_dati2, kd_kecamatan) or kd_kecamatan
+        if kd_dati2:
+            return "dati2", tree.get_name(kd_propinsi, kd_dati2) or kd_dati2
+        if kd_propinsi:
+            return "propinsi", tree.get_name(kd_propinsi) or kd_propinsi
+        return None, None
+
+    @staticmethod
+    async def get_stats(
+        year: Optional[str] = None,
+        kd_propinsi: Optional[str] = None,
+        kd_dati2: Optional[str] = None,
+        kd_kecamatan: Optional[str] = None,
+        kd_kelurahan: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Semua angka /dashboard/stats: satu query per tabel rollup (SPPT dan
+        bangunan) dijalankan bersamaan; jumlah wilayah dan nama filter dibaca
+        dari pohon referensi di memori (app/reference)
+        """
+        region = (kd_propinsi, kd_dati2, kd_kecamatan, kd_kelurahan)
+        sppt_stats, bangunan_stats = await run_concurrently(
+            (DashboardService.get_sppt_stats, year, *region),
+            (DashboardService.get_bangunan_stats, *region),
+        )
+        area_stats = (await ReferenceService.get_tree()).counts()
+        filter_desc, filter_val = await DashboardService.get_filter_label(*region)
+        return {
+            **sppt_stats,
+            **bangunan_stats,
+            **area_stats,
+            "filtered_by": filter_desc,
+            "filter_value": filter_val,
+            "year_filter": year,
+        }
+
+    @staticmethod
+    async def _rebuild_sppt(session: AsyncSession) -> int:
+        await session.execute(text(REBUILD_SPPT_SQL))
+        await session.execute(text(PRUNE_SPPT_SQL))
+        await session.commit()
+        return await session.scalar(select(func.count()).select_from(DashboardRollupSppt)) or 0
+
+    @staticmethod
+    async def _rebuild_bangunan(session: AsyncSession) -> int:
+        await session.execute(text(REBUILD_BANGUNAN_SQL))
+        await session.execute(text(PRUNE_BANGUNAN_SQL))
+        await session.commit()
+        return await session.scalar(select(func.count()).select_from(DashboardRollupBangunan)) or 0
+
+    @staticmethod
+    async def rebuild_rollup() -> Dict[str, int]:
+        """
+        Hitung ulang seluruh tabel rollup dari sppt dan dat_op_bangunan.
+        Setiap tabel sumber dibaca sekali (agregasi bersyarat), keduanya bersamaan.
+
+        Returns:
+            Jumlah baris rollup (kelurahan x tahun) setelah rebuild
+        """
+        sppt_rows, bangunan_rows = await run_concurrently(
+            (DashboardService._rebuild_sppt,),
+            (DashboardService._rebuild_bangunan,),
+        )
+        await dashboard_cache.invalidate()
+        return {
+            "sppt_rows": sppt_rows,
+            "bangunan_rows": bangunan_rows,
+        }
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
@@ -10,9 +12,26 @@ from app.peta.router import router as peta_router
 from app.routes.profile import router as profile_router
 from app.routes.dashboard import router as dashboard_router
 from app.routes.admin import router as admin_router
+from app.search import router as search_router, SearchService
 from app.core.config import settings
+from app.reference import ReferenceService
+from app.dashboard.export import ExportJobService
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Referensi wilayah dimuat sekali ke memori, lalu di-refresh di background
+    await ReferenceService.start()
+    # Index pencarian dibangun di background, /search 503 sampai siap
+    await SearchService.start()
+    yield
+    await ExportJobService.stop()
+    await SearchService.stop()
+    await ReferenceService.stop()
+
 
 app = FastAPI(
+    lifespan=lifespan,
     openapi_url=settings.OPENAPI_URL,
     generate_unique_id_function=simple_generate_unique_route_id,
     root_path="/api",
@@ -35,3 +54,4 @@ app.include_router(peta_router)  # Peta router sudah punya prefix
 app.include_router(profile_router, prefix="/profile")
 app.include_router(dashboard_router)  # Dashboard router already has prefix
 app.include_router(admin_router)  # Admin router already has prefix
+app.include_router(search_router)  # Search router sudah punya prefix
@@ -3,3 +3,6 @@ from .user import User
 from .dat_subjek_pajak import DatSubjekPajak
 from .spop import Spop
 from .sppt import Sppt
+from .dashboard_rollup import DashboardRollupSppt, DashboardRollupBangunan
+from .sppt_latest import SpptLatest
+from .pembayaran_sppt_summary import PembayaranSpptSummary
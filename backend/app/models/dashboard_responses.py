@@ -136,6 +136,20 @@ class SpptReportFiltersResponse(SQLModel):
     max_year: Optional[str] = None
 
 
+class ExportJobResponse(SQLModel):
+    job_id: str
+    status: str  # pending, running, done, failed
+    format: str
+    year: Optional[str] = None
+    kd_kecamatan: Optional[str] = None
+    rows: int = 0
+    size: int = 0
+    filename: str
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
 class UserListResponse(SQLModel):
     id: str
     username: str
@@ -149,10 +163,11 @@ class UserListResponse(SQLModel):
 
 class PaginatedUserListResponse(SQLModel):
     data: List[UserListResponse]
-    total_count: int
+    total_count: Optional[int] = None  # None jika with_total=false
     page: int
     limit: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # None jika sudah halaman terakhir
 
 
 class UserUpdateRequest(SQLModel):
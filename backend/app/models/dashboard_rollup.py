@@ -0,0 +1,38 @@
+from sqlalchemy import BigInteger
+from sqlmodel import SQLModel, Field
+
+
+class DashboardRollupSppt(SQLModel, table=True):
+    """
+    Rekap statistik SPPT per (tahun, kelurahan) untuk /dashboard/stats.
+    Diisi oleh migration dan dijaga tetap sinkron oleh trigger di tabel sppt.
+    """
+    __tablename__ = "dashboard_rollup_sppt"
+
+    THN_PAJAK_SPPT: str = Field(primary_key=True, max_length=12)
+    KD_PROPINSI: str = Field(primary_key=True, max_length=6)
+    KD_DATI2: str = Field(primary_key=True, max_length=6)
+    KD_KECAMATAN: str = Field(primary_key=True, max_length=9)
+    KD_KELURAHAN: str = Field(primary_key=True, max_length=9)
+    TOTAL_SPPT: int = Field(default=0, sa_type=BigInteger)
+    TOTAL_LUNAS: int = Field(default=0, sa_type=BigInteger)
+    TOTAL_BELUM_LUNAS: int = Field(default=0, sa_type=BigInteger)
+    TOTAL_PBB_TERHUTANG: int = Field(default=0, sa_type=BigInteger)
+
+
+class DashboardRollupBangunan(SQLModel, table=True):
+    """
+    Rekap statistik bangunan aktif per kelurahan untuk /dashboard/stats.
+    Diisi oleh migration dan dijaga tetap sinkron oleh trigger di tabel dat_op_bangunan.
+    """
+    __tablename__ = "dashboard_rollup_bangunan"
+
+    KD_PROPINSI: str = Field(primary_key=True, max_length=2)
+    KD_DATI2: str = Field(primary_key=True, max_length=2)
+    KD_KECAMATAN: str = Field(primary_key=True, max_length=3)
+    KD_KELURAHAN: str = Field(primary_key=True, max_length=3)
+    TOTAL_BANGUNAN: int = Field(default=0, sa_type=BigInteger)
+    TOTAL_NILAI_BANGUNAN: int = Field(default=0, sa_type=BigInteger)
+    # Rata-rata luas = TOTAL_LUAS_BANGUNAN / JUMLAH_BANGUNAN_BERLUAS (hanya LUAS_BNG > 0)
+    TOTAL_LUAS_BANGUNAN: int = Field(default=0, sa_type=BigInteger)
+    JUMLAH_BANGUNAN_BERLUAS: int = Field(default=0, sa_type=BigInteger)
@@ -1,10 +1,16 @@
 from sqlmodel import SQLModel, Field
 from typing import Optional
 from datetime import datetime, date
+from sqlalchemy import Index
+
+from app.models.nop import nop_column
 
 
 class DatOpBangunan(SQLModel, table=True):
     __tablename__ = "dat_op_bangunan"
+    __table_args__ = (
+        Index("ux_dat_op_bangunan_NOP_NO_BNG", "NOP", "NO_BNG", unique=True),
+    )
     
     # Primary key fields
     KD_PROPINSI: str = Field(primary_key=True, max_length=2)
@@ -15,6 +21,8 @@ class DatOpBangunan(SQLModel, table=True):
     NO_URUT: str = Field(primary_key=True, max_length=4)
     KD_JNS_OP: str = Field(primary_key=True, max_length=1)
     NO_BNG: int = Field(primary_key=True)
+    # NOP 18 digit (generated column), unik bersama NO_BNG
+    NOP: Optional[str] = Field(default=None, sa_column=nop_column())
     
     # Building details
     KD_JPB: Optional[str] = Field(default=None, max_length=2)
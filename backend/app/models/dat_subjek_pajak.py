@@ -1,13 +1,36 @@
+from sqlalchemy import Column, Computed, String
 from sqlmodel import SQLModel, Field
 from typing import Optional
 from datetime import date, datetime
 
+# Karakter yang diabaikan saat mencocokkan nama WP (sama dengan normalize() di sppt router)
+NM_WP_STRIP_CHARS = [" ", "/", "\\", "-", "_", ".", ","]
+
+
+def _nm_wp_normal_sql() -> str:
+    """LOWER(REPLACE(...REPLACE(NM_WP, ' ', '')...)) untuk generated column NM_WP_NORMAL"""
+    expr = "`NM_WP`"
+    for ch in NM_WP_STRIP_CHARS:
+        literal = ch.replace("\\", "\\\\").replace("'", "''")
+        expr = f"REPLACE({expr}, '{literal}', '')"
+    return f"LOWER({expr})"
+
 
 class DatSubjekPajak(SQLModel, table=True):
     __tablename__ = "dat_subjek_pajak"
 
     SUBJEK_PAJAK_ID: str = Field(primary_key=True, max_length=90)
     NM_WP: Optional[str] = Field(default=None, max_length=90)
+    # Nama WP ternormalisasi (generated column STORED + index), diisi otomatis oleh MySQL
+    NM_WP_NORMAL: Optional[str] = Field(
+        default=None,
+        sa_column=Column(
+            "NM_WP_NORMAL",
+            String(90),
+            Computed(_nm_wp_normal_sql(), persisted=True),
+            index=True,
+        ),
+    )
     JALAN_WP: Optional[str] = Field(default=None, max_length=90)
     BLOK_KAV_NO_WP: Optional[str] = Field(default=None, max_length=45)
     RW_WP: Optional[str] = Field(default=None, max_length=6)
@@ -0,0 +1,44 @@
+from sqlalchemy import CHAR, Column, Computed
+
+# Urutan bagian NOP 18 digit: PR(2) DT(2) KEC(3) KEL(3) BLK(3) URUT(4) JNS(1)
+NOP_PART_COLUMNS = [
+    "KD_PROPINSI",
+    "KD_DATI2",
+    "KD_KECAMATAN",
+    "KD_KELURAHAN",
+    "KD_BLOK",
+    "NO_URUT",
+    "KD_JNS_OP",
+]
+
+# Harus sama dengan NOP_SQL di migration c4e7a1b9d2f3
+NOP_SQL = "CONCAT(" + ", ".join(f"`{name}`" for name in NOP_PART_COLUMNS) + ")"
+
+
+def nop_column(index: bool = False, unique: bool = False) -> Column:
+    """
+    Generated column NOP CHAR(18) (STORED) dari tujuh kolom kode objek.
+
+    Diisi otomatis oleh MySQL, jadi pencarian prefix NOP dan join antar tabel
+    cukup lewat satu kolom ter-index, bukan tujuh kolom.
+    """
+    return Column(
+        "NOP",
+        CHAR(18),
+        Computed(NOP_SQL, persisted=True),
+        unique=unique,
+        index=index,
+    )
+
+
+# Panjang tiap bagian NOP, urutan sama dengan NOP_PART_COLUMNS
+NOP_PART_WIDTHS = [2, 2, 3, 3, 3, 4, 1]
+
+
+def split_nop(digits: str) -> dict:
+    """NOP 18 digit -> {KD_PROPINSI: .., ..., KD_JNS_OP: ..}"""
+    parts, start = {}, 0
+    for name, width in zip(NOP_PART_COLUMNS, NOP_PART_WIDTHS):
+        parts[name] = digits[start:start + width]
+        start += width
+    return parts
@@ -1,10 +1,16 @@
 from sqlmodel import SQLModel, Field
 from typing import Optional
 from datetime import date, datetime
+from sqlalchemy import Index
+
+from app.models.nop import nop_column
 
 
 class PembayaranSppt(SQLModel, table=True):
     __tablename__ = "pembayaran_sppt"
+    __table_args__ = (
+        Index("ix_pembayaran_sppt_NOP_THN_PAJAK_SPPT", "NOP", "THN_PAJAK_SPPT"),
+    )
 
     KD_PROPINSI: str = Field(primary_key=True, max_length=2)
     KD_DATI2: str = Field(primary_key=True, max_length=2)
@@ -20,6 +26,8 @@ class PembayaranSppt(SQLModel, table=True):
     KD_BANK_TUNGGAL: str = Field(primary_key=True, max_length=2)
     KD_BANK_PERSEPSI: str = Field(primary_key=True, max_length=2)
     KD_TP: str = Field(primary_key=True, max_length=2)
+    # NOP 18 digit (generated column), di-index bersama THN_PAJAK_SPPT
+    NOP: Optional[str] = Field(default=None, sa_column=nop_column())
     DENDA_SPPT: Optional[int] = None
     JML_SPPT_YG_DIBAYAR: int
     TGL_PEMBAYARAN_SPPT: Optional[date] = None
@@ -0,0 +1,23 @@
+from typing import Optional
+
+from sqlalchemy import Column, Text
+from sqlmodel import SQLModel, Field
+
+
+class PembayaranSpptSummary(SQLModel, table=True):
+    """
+    Ringkasan pembayaran per (NOP, tahun) untuk halaman riwayat pembayaran.
+    Diisi oleh migration dan dijaga tetap sinkron oleh trigger di tabel
+    pembayaran_sppt dan sppt (procedure pembayaran_sppt_summary_refresh),
+    sehingga endpoint cukup membaca by primary key tanpa agregasi.
+    """
+    __tablename__ = "pembayaran_sppt_summary"
+
+    NOP: str = Field(primary_key=True, max_length=18)
+    THN_PAJAK_SPPT: str = Field(primary_key=True, max_length=4)
+    # Denda hanya dijumlah jika SPPT lunas (STATUS_PEMBAYARAN_SPPT = 1)
+    TOTAL_DENDA: int = 0
+    TOTAL_DIBAYAR: int = 0
+    # GROUP_CONCAT(DISTINCT TGL_PEMBAYARAN_SPPT), format sama dengan response lama
+    TANGGAL_PEMBAYARAN: Optional[str] = Field(default=None, sa_column=Column(Text))
+    JML_PEMBAYARAN: int = 0
@@ -2,6 +2,8 @@ from sqlmodel import SQLModel, Field
 from typing import Optional
 from datetime import date, datetime
 
+from app.models.nop import nop_column
+
 
 class Spop(SQLModel, table=True):
     __tablename__ = "spop"
@@ -13,6 +15,8 @@ class Spop(SQLModel, table=True):
     KD_BLOK: str = Field(primary_key=True, max_length=9)
     NO_URUT: str = Field(primary_key=True, max_length=12)
     KD_JNS_OP: str = Field(primary_key=True, max_length=3)
+    # NOP 18 digit (generated column, unique), untuk join dan pencarian prefix
+    NOP: Optional[str] = Field(default=None, sa_column=nop_column(index=True, unique=True))
     SUBJEK_PAJAK_ID: Optional[str] = Field(default=None, max_length=90)
     NO_FORMULIR_SPOP: Optional[str] = Field(default=None, max_length=33)
     JNS_TRANSAKSI_OP: Optional[str] = Field(default=None, max_length=3)
@@ -31,13 +35,14 @@ class Spop(SQLModel, table=True):
     NO_URUT_ASAL: Optional[str] = Field(default=None, max_length=12)
     KD_JNS_OP_ASAL: Optional[str] = Field(default=None, max_length=3)
     NO_SPPT_LAMA: Optional[str] = Field(default=None, max_length=54)
-    JALAN_OP: Optional[str] = Field(default=None, max_length=90)
+    # Index untuk keyset pagination urut JALAN_OP / LUAS_BUMI (sppt router)
+    JALAN_OP: Optional[str] = Field(default=None, max_length=90, index=True)
     BLOK_KAV_NO_OP: Optional[str] = Field(default=None, max_length=45)
     KELURAHAN_OP: Optional[str] = Field(default=None, max_length=90)
     RW_OP: Optional[str] = Field(default=None, max_length=6)
     RT_OP: Optional[str] = Field(default=None, max_length=9)
     KD_STATUS_WP: Optional[str] = Field(default=None, max_length=3)
-    LUAS_BUMI: Optional[int] = None
+    LUAS_BUMI: Optional[int] = Field(default=None, index=True)
     KD_ZNT: Optional[str] = Field(default=None, max_length=6)
     JNS_BUMI: Optional[str] = Field(default=None, max_length=3)
     NILAI_SISTEM_BUMI: Optional[int] = None
@@ -1,10 +1,16 @@
 from sqlmodel import SQLModel, Field
 from typing import Optional
 from datetime import date, datetime
+from sqlalchemy import Index
+
+from app.models.nop import nop_column
 
 
 class Sppt(SQLModel, table=True):
     __tablename__ = "sppt"
+    __table_args__ = (
+        Index("ux_sppt_NOP_THN_PAJAK_SPPT", "NOP", "THN_PAJAK_SPPT", unique=True),
+    )
 
     KD_PROPINSI: str = Field(primary_key=True, max_length=6)
     KD_DATI2: str = Field(primary_key=True, max_length=6)
@@ -14,6 +20,8 @@ class Sppt(SQLModel, table=True):
     NO_URUT: str = Field(primary_key=True, max_length=12)
     KD_JNS_OP: str = Field(primary_key=True, max_length=3)
     THN_PAJAK_SPPT: str = Field(primary_key=True, max_length=12)
+    # NOP 18 digit (generated column), unik bersama THN_PAJAK_SPPT
+    NOP: Optional[str] = Field(default=None, sa_column=nop_column())
     SIKLUS_SPPT: Optional[int] = None
     KD_KANWIL_BANK: Optional[str] = Field(default=None, max_length=6)
     KD_KPPBB_BANK: Optional[str] = Field(default=None, max_length=6)
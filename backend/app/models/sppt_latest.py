@@ -0,0 +1,29 @@
+from datetime import date
+from typing import Optional
+
+from sqlmodel import SQLModel, Field
+
+from app.models.nop import nop_column
+
+
+class SpptLatest(SQLModel, table=True):
+    """
+    SPPT tahun terbaru per NOP (satu baris per objek) untuk list SPOP admin.
+    Diisi oleh migration dan dijaga tetap sinkron oleh trigger di tabel
+    sppt dan pembayaran_sppt (procedure sppt_latest_refresh).
+    """
+    __tablename__ = "sppt_latest"
+
+    KD_PROPINSI: str = Field(primary_key=True, max_length=6)
+    KD_DATI2: str = Field(primary_key=True, max_length=6)
+    KD_KECAMATAN: str = Field(primary_key=True, max_length=9)
+    KD_KELURAHAN: str = Field(primary_key=True, max_length=9)
+    KD_BLOK: str = Field(primary_key=True, max_length=9)
+    NO_URUT: str = Field(primary_key=True, max_length=12)
+    KD_JNS_OP: str = Field(primary_key=True, max_length=3)
+    # NOP 18 digit (generated column, unique), untuk join dari spop
+    NOP: Optional[str] = Field(default=None, sa_column=nop_column(index=True, unique=True))
+    THN_PAJAK_SPPT: str = Field(max_length=12)
+    STATUS_PEMBAYARAN_SPPT: Optional[bool] = None
+    # Tanggal pembayaran terakhir untuk tahun THN_PAJAK_SPPT (dari pembayaran_sppt)
+    TGL_PEMBAYARAN_TERAKHIR: Optional[date] = None
@@ -2,35 +2,55 @@
 Router untuk Peta GIS API
 Endpoint untuk query polygon berdasarkan NOP
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.deps import SessionDep
+from app.core.executor import ExecutorBusy
 from app.models.user import User
 from app.auth import service as auth_service
-from app.peta.schemas import PetaGeoJSONResponse, PetaInfoResponse
+from app.peta.schemas import PetaBatchRequest, PetaGeoJSONResponse, PetaInfoResponse
 from app.peta.service import PetaService
+from app.peta import tiles
 
 router = APIRouter(prefix="/peta", tags=["peta"])
 
 
+def busy_exception():
+    """Pool geometry penuh (ExecutorBusy)"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server sedang sibuk memproses peta, coba lagi sebentar",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.get("/nop/{nop}", response_model=dict)
 async def get_peta_by_nop(
     nop: str,
     session: SessionDep,
-    current_user: User = Depends(auth_service.get_current_user)
+    current_user: User = Depends(auth_service.get_current_user),
+    zoom: Optional[int] = Query(None, ge=0, le=tiles.MAX_ZOOM, description="Zoom peta, untuk memilih level detail geometry"),
+    tolerance: Optional[float] = Query(None, gt=0, description="Toleransi simplifikasi maksimum (derajat)"),
 ):
     """
     Get polygon geometry untuk NOP tertentu dalam format GeoJSON
     
     Args:
         nop: Nomor Objek Pajak (18 digit)
+        zoom / tolerance: Opsional, geometry disederhanakan sesuai zoom peta
         
     Returns:
         GeoJSON Feature dengan geometry polygon dan properties
     """
-    # Query polygon dari database
-    feature = await PetaService.get_polygon_by_nop(session, nop)
+    # Query polygon dari database (atau cache)
+    lod = PetaService.get_lod(zoom, tolerance)
+    try:
+        feature = await PetaService.get_polygon_by_nop(session, nop, lod)
+    except ExecutorBusy:
+        raise busy_exception()
     
     if not feature:
         raise HTTPException(
@@ -38,7 +58,32 @@ async def get_peta_by_nop(
             detail=f"Polygon untuk NOP {nop} tidak ditemukan"
         )
     
-    return feature
+    # Sudah berupa bytes JSON, kirim langsung tanpa serialisasi ulang
+    return Response(content=feature, media_type="application/json")
+
+
+@router.post("/nop/batch", response_model=dict)
+async def get_peta_by_nops(
+    payload: PetaBatchRequest,
+    session: SessionDep,
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """
+    Get polygon banyak NOP sekaligus (mis. satu halaman daftar SPOP)
+    
+    Args:
+        payload: Daftar NOP (maks. 500) + zoom / tolerance opsional
+        
+    Returns:
+        GeoJSON FeatureCollection, NOP yang tidak punya polygon dilewati
+    """
+    lod = PetaService.get_lod(payload.zoom, payload.tolerance)
+    try:
+        collection = await PetaService.get_polygons_by_nops(session, payload.nops, lod)
+    except ExecutorBusy:
+        raise busy_exception()
+    
+    return Response(content=collection, media_type="application/json")
 
 
 @router.get("/nop/{nop}/info", response_model=PetaInfoResponse)
@@ -67,6 +112,96 @@ async def get_info_by_nop(
     return info
 
 
+@router.get("/bbox", response_model=dict)
+async def get_peta_by_bbox(
+    session: SessionDep,
+    current_user: User = Depends(auth_service.get_current_user),
+    minx: float = Query(..., ge=-180, le=180, description="Longitude minimum"),
+    miny: float = Query(..., ge=-90, le=90, description="Latitude minimum"),
+    maxx: float = Query(..., ge=-180, le=180, description="Longitude maximum"),
+    maxy: float = Query(..., ge=-90, le=90, description="Latitude maximum"),
+    limit: int = Query(2000, ge=1, le=10000, description="Maximum jumlah polygon"),
+    zoom: Optional[int] = Query(None, ge=0, le=tiles.MAX_ZOOM, description="Zoom peta, untuk memilih level detail geometry"),
+    tolerance: Optional[float] = Query(None, gt=0, description="Toleransi simplifikasi maksimum (derajat)"),
+):
+    """
+    Get semua polygon yang beririsan dengan viewport peta dalam satu request
+
+    Args:
+        minx, miny, maxx, maxy: Bounding box viewport (WGS84)
+        limit: Maximum number of features to return (default 2000)
+        zoom / tolerance: Opsional, geometry disederhanakan sesuai zoom peta
+
+    Returns:
+        GeoJSON FeatureCollection
+    """
+    if minx >= maxx or miny >= maxy:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Bounding box tidak valid: minx harus < maxx dan miny harus < maxy"
+        )
+
+    try:
+        return await PetaService.get_polygons_by_bbox(
+            session, minx, miny, maxx, maxy, limit, PetaService.get_lod(zoom, tolerance)
+        )
+    except ExecutorBusy:
+        raise busy_exception()
+
+
+@router.get("/tiles/{z}/{x}/{y}.mvt")
+async def get_peta_tile(
+    z: int,
+    x: int,
+    y: int,
+    session: SessionDep,
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """
+    Get Mapbox Vector Tile polygon objek pajak untuk tile z/x/y
+
+    Args:
+        z: Zoom level
+        x, y: Koordinat tile (skema XYZ, sama dengan Leaflet)
+
+    Returns:
+        Tile MVT (application/vnd.mapbox-vector-tile)
+    """
+    if not tiles.is_valid_tile(z, x, y):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Koordinat tile {z}/{x}/{y} tidak valid"
+        )
+
+    try:
+        tile = await PetaService.get_tile(session, z, x, y)
+    except ExecutorBusy:
+        raise busy_exception()
+
+    return Response(
+        content=tile,
+        media_type="application/vnd.mapbox-vector-tile",
+        headers={"Cache-Control": "private, max-age=300"},
+    )
+
+
+@router.get("/metrics", response_model=dict)
+async def get_peta_metrics(
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """
+    Metrik pool geometry (queue depth, waktu tunggu, request ditolak) dan
+    cache peta untuk worker yang melayani request ini (admin only)
+    """
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={"code": "ADMIN_REQUIRED", "msg": "Admin access required"}
+        )
+    
+    return PetaService.get_metrics()
+
+
 @router.get("/nop-list", response_model=list)
 async def list_nops(
     session: SessionDep,
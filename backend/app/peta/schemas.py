@@ -1,7 +1,7 @@
 """
 Pydantic schemas untuk Peta GIS API
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Any
 
 
@@ -45,3 +45,10 @@ class PetaInfoResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class PetaBatchRequest(BaseModel):
+    """Request untuk ambil polygon banyak NOP sekaligus"""
+    nops: List[str] = Field(..., min_length=1, max_length=500, description="Daftar NOP (18 digit)")
+    zoom: Optional[int] = Field(None, ge=0, le=22, description="Zoom peta, untuk memilih level detail geometry")
+    tolerance: Optional[float] = Field(None, gt=0, description="Toleransi simplifikasi maksimum (derajat)")
@@ -2,35 +2,205 @@
 Service layer untuk Peta GIS
 Konversi WKT ke GeoJSON dan query database
 """
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 from sqlmodel.ext.asyncio.session import AsyncSession
 from shapely import wkt
-from shapely.geometry import mapping
+from shapely.geometry import box, mapping
 import json
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, List
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.executor import BoundedExecutor
+from app.peta import tiles
+
+# Toleransi (derajat) kolom geometry_lod1..3 yang dibuat importer.
+# Harus sama dengan LOD_TOLERANCES di import_shapefile_to_mysql.py
+GEOMETRY_LOD_TOLERANCES = {
+    1: 0.000005,
+    2: 0.00002,
+    3: 0.0001,
+}
+
+# Kolom WKT per level detail; level 0 = geometry presisi penuh
+GEOMETRY_LOD_COLUMNS = {
+    0: "geometry",
+    1: "geometry_lod1",
+    2: "geometry_lod2",
+    3: "geometry_lod3",
+}
+
+# Cache GeoJSON Feature (bytes JSON) per (NOP, level detail)
+_geometry_cache = LRUCache(maxsize=settings.PETA_GEOMETRY_CACHE_SIZE)
+
+# Cache tile MVT yang sudah di-encode, key: (z, x, y)
+_tile_cache = LRUCache(maxsize=settings.PETA_TILE_CACHE_SIZE)
+
+# Pool terbatas untuk parse WKT / encode tile, terpisah dari thread pool default
+# agar trafik peta yang berat tidak menahan endpoint lain (login, pembayaran)
+geometry_executor = BoundedExecutor(
+    "peta-geometry",
+    max_workers=settings.PETA_GEOMETRY_WORKERS,
+    max_queue=settings.PETA_GEOMETRY_QUEUE_SIZE,
+)
+
+# Versi import terakhir (MAX(id) dat_peta_import) yang isinya ada di cache
+_import_version: Optional[int] = None
+_import_version_checked_at: float = float("-inf")
 
 
 class PetaService:
     """Service untuk operasi GIS dan konversi geometry"""
     
     @staticmethod
-    async def get_polygon_by_nop(session: AsyncSession, nop: str) -> Optional[Dict[str, Any]]:
+    def _row_to_properties(row) -> Dict[str, Any]:
+        """
+        Bangun dict properties dari 16 kolom atribut pertama dat_peta_objek_pajak
+        (urutan kolom: nop, luas, kd_propinsi ... no_pelayanan)
+        """
+        return {
+            "nop": row[0],
+            "luas": float(row[1]) if row[1] else None,
+            "kd_propinsi": row[2],
+            "kd_dati2": row[3],
+            "kd_kecamatan": row[4],
+            "kd_kelurahan": row[5],
+            "kd_blok": row[6],
+            "no_urut": row[7],
+            "kd_jns_op": row[8],
+            "shm": row[9],
+            "nib": row[10],
+            "guna_tanah": row[11],
+            "status": row[12],
+            "znt": row[13],
+            "harga_transaksi": row[14],
+            "no_pelayanan": row[15],
+        }
+    
+    @staticmethod
+    def get_lod(zoom: Optional[int] = None, tolerance: Optional[float] = None) -> int:
+        """
+        Pilih level detail geometry (0 = penuh) untuk zoom peta atau toleransi
+        
+        Dipilih level paling sederhana yang toleransinya tidak melebihi ukuran
+        satu pixel (tile 256 px) pada zoom tersebut, sehingga penyederhanaan
+        tidak terlihat di layar.
+        
+        Args:
+            zoom: Zoom level peta (skema XYZ)
+            tolerance: Toleransi maksimum dalam derajat (mengalahkan zoom)
+        """
+        if tolerance is None:
+            if zoom is None:
+                return 0
+            tolerance = 360.0 / (256 * 2 ** zoom)
+        
+        lod = 0
+        for level, level_tolerance in GEOMETRY_LOD_TOLERANCES.items():
+            if level_tolerance <= tolerance:
+                lod = level
+        return lod
+    
+    @staticmethod
+    async def _check_import_version(session: AsyncSession) -> None:
         """
-        Ambil polygon berdasarkan NOP dan convert ke GeoJSON
+        Kosongkan cache geometry & tile jika importer sudah memuat ulang data
+        
+        import_shapefile_to_mysql.py mencatat setiap import ke tabel
+        dat_peta_import. Versi terakhir dicek paling sering sekali per
+        PETA_CACHE_CHECK_INTERVAL detik, bukan di setiap request.
+        """
+        global _import_version, _import_version_checked_at
+        
+        now = time.monotonic()
+        if now - _import_version_checked_at < settings.PETA_CACHE_CHECK_INTERVAL:
+            return
+        _import_version_checked_at = now
+        
+        try:
+            result = await session.execute(text("SELECT MAX(id) FROM dat_peta_import"))
+            version = result.scalar()
+        except Exception:
+            # Tabel belum ada (data diimport dengan importer versi lama)
+            await session.rollback()
+            version = None
+        
+        if version != _import_version:
+            PetaService.invalidate_cache()
+            _import_version = version
+    
+    @staticmethod
+    def invalidate_cache() -> None:
+        """Kosongkan semua cache geometry dan tile di proses ini"""
+        _geometry_cache.clear()
+        _tile_cache.clear()
+    
+    @staticmethod
+    def _build_feature(row) -> Optional[bytes]:
+        """
+        Parse WKT (kolom ke-17) lalu serialisasi GeoJSON Feature ke bytes JSON
+        
+        Returns:
+            Bytes JSON atau None jika WKT tidak valid
+        """
+        try:
+            # Parse WKT geometry ke Shapely object, lalu ke GeoJSON format
+            geom = wkt.loads(row[16])
+            geom_geojson = mapping(geom)
+            
+            # GeoJSON Feature, diserialisasi sekali lalu disimpan di cache
+            return json.dumps({
+                "type": "Feature",
+                "geometry": geom_geojson,
+                "properties": PetaService._row_to_properties(row)
+            }, separators=(",", ":")).encode("utf-8")
+        except Exception as e:
+            print(f"Error parsing geometry for NOP {row[0]}: {e}")
+            return None
+    
+    @staticmethod
+    def _build_features(rows) -> Dict[str, bytes]:
+        """Build Feature untuk banyak baris sekaligus (dijalankan di geometry_executor)"""
+        features: Dict[str, bytes] = {}
+        for row in rows:
+            if row[0] in features:
+                continue
+            feature = PetaService._build_feature(row)
+            if feature is not None:
+                features[row[0]] = feature
+        return features
+    
+    @staticmethod
+    async def get_polygon_by_nop(session: AsyncSession, nop: str, lod: int = 0) -> Optional[bytes]:
+        """
+        Ambil polygon berdasarkan NOP dalam bentuk GeoJSON Feature siap kirim
+        
+        Hasil parse WKT -> GeoJSON disimpan di cache (LRU) sebagai bytes JSON,
+        sehingga NOP yang sama cukup satu kali query + parse per worker.
         
         Args:
             session: Database session
             nop: Nomor Objek Pajak (18 digit)
+            lod: Level detail geometry (lihat get_lod), 0 = presisi penuh
             
         Returns:
-            Dict dengan format GeoJSON Feature atau None jika tidak ditemukan
+            Bytes JSON GeoJSON Feature atau None jika tidak ditemukan
         """
+        await PetaService._check_import_version(session)
+        
+        cache_key = (nop, lod)
+        cached = _geometry_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         # Query database untuk ambil geometry WKT
-        query = text("""
+        geometry_column = GEOMETRY_LOD_COLUMNS[lod]
+        query = text(f"""
             SELECT 
                 nop, luas, kd_propinsi, kd_dati2, kd_kecamatan, kd_kelurahan,
                 kd_blok, no_urut, kd_jns_op, shm, nib, guna_tanah, status, znt,
-                harga_transaksi, no_pelayanan, geometry
+                harga_transaksi, no_pelayanan, COALESCE({geometry_column}, geometry)
             FROM dat_peta_objek_pajak
             WHERE nop = :nop
             LIMIT 1
@@ -42,44 +212,69 @@ class PetaService:
         if not row:
             return None
         
-        # Parse WKT geometry ke Shapely object
-        try:
-            geom_wkt = row[16]  # geometry column
-            geom = wkt.loads(geom_wkt)
-            
-            # Convert Shapely geometry ke GeoJSON format
-            geom_geojson = mapping(geom)
+        feature = await geometry_executor.run(PetaService._build_feature, row)
+        if feature is None:
+            return None
+        
+        _geometry_cache.set(cache_key, feature)
+        return feature
+    
+    @staticmethod
+    async def get_polygons_by_nops(
+        session: AsyncSession, nops: List[str], lod: int = 0
+    ) -> bytes:
+        """
+        Ambil polygon banyak NOP sekaligus sebagai satu GeoJSON FeatureCollection
+        
+        NOP yang sudah ada di cache tidak di-query ulang; sisanya diambil dengan
+        satu query WHERE nop IN (...) dan WKT-nya di-parse di geometry_executor
+        agar tidak memblokir event loop. NOP yang tidak ditemukan dilewati.
+        
+        Args:
+            session: Database session
+            nops: Daftar NOP (urutan dipertahankan, duplikat diabaikan)
+            lod: Level detail geometry (lihat get_lod), 0 = presisi penuh
             
-            # Build properties dari kolom lain
-            properties = {
-                "nop": row[0],
-                "luas": float(row[1]) if row[1] else None,
-                "kd_propinsi": row[2],
-                "kd_dati2": row[3],
-                "kd_kecamatan": row[4],
-                "kd_kelurahan": row[5],
-                "kd_blok": row[6],
-                "no_urut": row[7],
-                "kd_jns_op": row[8],
-                "shm": row[9],
-                "nib": row[10],
-                "guna_tanah": row[11],
-                "status": row[12],
-                "znt": row[13],
-                "harga_transaksi": row[14],
-                "no_pelayanan": row[15],
-            }
+        Returns:
+            Bytes JSON GeoJSON FeatureCollection
+        """
+        await PetaService._check_import_version(session)
+        
+        nops = list(dict.fromkeys(nops))
+        features: Dict[str, bytes] = {}
+        missing: List[str] = []
+        for nop in nops:
+            cached = _geometry_cache.get((nop, lod))
+            if cached is not None:
+                features[nop] = cached
+            else:
+                missing.append(nop)
+        
+        if missing:
+            geometry_column = GEOMETRY_LOD_COLUMNS[lod]
+            query = text(f"""
+                SELECT 
+                    nop, luas, kd_propinsi, kd_dati2, kd_kecamatan, kd_kelurahan,
+                    kd_blok, no_urut, kd_jns_op, shm, nib, guna_tanah, status, znt,
+                    harga_transaksi, no_pelayanan, COALESCE({geometry_column}, geometry)
+                FROM dat_peta_objek_pajak
+                WHERE nop IN :nops
+            """).bindparams(bindparam("nops", expanding=True))
             
-            # Return GeoJSON Feature
-            return {
-                "type": "Feature",
-                "geometry": geom_geojson,
-                "properties": properties
-            }
+            result = await session.execute(query, {"nops": missing})
+            rows = result.fetchall()
             
-        except Exception as e:
-            print(f"Error parsing geometry for NOP {nop}: {e}")
-            return None
+            parsed = await geometry_executor.run(PetaService._build_features, rows)
+            for nop, feature in parsed.items():
+                _geometry_cache.set((nop, lod), feature)
+            features.update(parsed)
+        
+        # Gabungkan bytes Feature langsung tanpa serialisasi ulang
+        return (
+            b'{"type":"FeatureCollection","features":['
+            + b",".join(features[nop] for nop in nops if nop in features)
+            + b"]}"
+        )
     
     @staticmethod
     async def get_info_by_nop(session: AsyncSession, nop: str) -> Optional[Dict[str, Any]]:
@@ -109,23 +304,143 @@ class PetaService:
         if not row:
             return None
         
+        return PetaService._row_to_properties(row)
+    
+    @staticmethod
+    async def _fetch_rows_in_bbox(
+        session: AsyncSession,
+        minx: float,
+        miny: float,
+        maxx: float,
+        maxy: float,
+        limit: int,
+        lod: int = 0,
+    ) -> list:
+        """Query baris dat_peta_objek_pajak yang beririsan dengan bounding box (pakai SPATIAL INDEX)"""
+        geometry_column = GEOMETRY_LOD_COLUMNS[lod]
+        query = text(f"""
+            SELECT 
+                nop, luas, kd_propinsi, kd_dati2, kd_kecamatan, kd_kelurahan,
+                kd_blok, no_urut, kd_jns_op, shm, nib, guna_tanah, status, znt,
+                harga_transaksi, no_pelayanan, COALESCE({geometry_column}, geometry)
+            FROM dat_peta_objek_pajak
+            WHERE MBRIntersects(geom, ST_GeomFromText(:bbox))
+            LIMIT :limit
+        """)
+        
+        bbox_wkt = box(minx, miny, maxx, maxy).wkt
+        result = await session.execute(query, {"bbox": bbox_wkt, "limit": limit})
+        return result.fetchall()
+    
+    @staticmethod
+    def _build_collection(rows) -> Dict[str, Any]:
+        """Parse baris hasil query menjadi GeoJSON FeatureCollection (dijalankan di geometry_executor)"""
+        features: List[Dict[str, Any]] = []
+        for row in rows:
+            try:
+                geom = wkt.loads(row[16])
+            except Exception as e:
+                print(f"Error parsing geometry for NOP {row[0]}: {e}")
+                continue
+            
+            features.append({
+                "type": "Feature",
+                "geometry": mapping(geom),
+                "properties": PetaService._row_to_properties(row),
+            })
+        
         return {
-            "nop": row[0],
-            "luas": float(row[1]) if row[1] else None,
-            "kd_propinsi": row[2],
-            "kd_dati2": row[3],
-            "kd_kecamatan": row[4],
-            "kd_kelurahan": row[5],
-            "kd_blok": row[6],
-            "no_urut": row[7],
-            "kd_jns_op": row[8],
-            "shm": row[9],
-            "nib": row[10],
-            "guna_tanah": row[11],
-            "status": row[12],
-            "znt": row[13],
-            "harga_transaksi": row[14],
-            "no_pelayanan": row[15],
+            "type": "FeatureCollection",
+            "features": features,
+        }
+    
+    @staticmethod
+    async def get_polygons_by_bbox(
+        session: AsyncSession,
+        minx: float,
+        miny: float,
+        maxx: float,
+        maxy: float,
+        limit: int = 2000,
+        lod: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        Ambil semua polygon yang beririsan dengan bounding box (viewport peta)
+        
+        Query memakai kolom `geom` (GEOMETRY) dan SPATIAL INDEX idx_geom yang
+        dibuat oleh import_shapefile_to_mysql.py, sehingga MySQL hanya membaca
+        polygon di sekitar viewport, bukan seluruh tabel.
+        
+        Args:
+            session: Database session
+            minx, miny, maxx, maxy: Bounding box dalam WGS84 (longitude/latitude)
+            limit: Maximum jumlah feature yang dikembalikan
+            lod: Level detail geometry (lihat get_lod), 0 = presisi penuh
+            
+        Returns:
+            Dict dengan format GeoJSON FeatureCollection
+        """
+        rows = await PetaService._fetch_rows_in_bbox(session, minx, miny, maxx, maxy, limit, lod)
+        return await geometry_executor.run(PetaService._build_collection, rows)
+    
+    @staticmethod
+    def _build_tile(rows, z: int, x: int, y: int) -> bytes:
+        """Parse WKT lalu encode tile MVT (dijalankan di geometry_executor)"""
+        features = []
+        for row in rows:
+            try:
+                geom = wkt.loads(row[16])
+            except Exception as e:
+                print(f"Error parsing geometry for NOP {row[0]}: {e}")
+                continue
+            features.append((geom, PetaService._row_to_properties(row)))
+        
+        return tiles.encode_tile(features, z, x, y)
+    
+    @staticmethod
+    async def get_tile(session: AsyncSession, z: int, x: int, y: int) -> bytes:
+        """
+        Ambil Mapbox Vector Tile untuk tile z/x/y
+        
+        Tile yang sudah pernah dibuat diambil dari cache (LRU). Di bawah
+        PETA_TILE_MIN_ZOOM polygon persil terlalu kecil untuk terlihat,
+        sehingga dikembalikan tile kosong tanpa query database.
+        
+        Args:
+            session: Database session
+            z, x, y: Koordinat tile (skema XYZ)
+            
+        Returns:
+            Bytes protobuf MVT
+        """
+        await PetaService._check_import_version(session)
+        
+        cache_key = (z, x, y)
+        cached = _tile_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        rows = []
+        if z >= settings.PETA_TILE_MIN_ZOOM:
+            buffer = tiles.TILE_BUFFER / tiles.EXTENT
+            minx, miny, maxx, maxy = tiles.tile_bounds_lonlat(z, x, y, buffer=buffer)
+            # Level detail yang penyederhanaannya masih di bawah satu unit grid tile
+            lod = PetaService.get_lod(tolerance=360.0 / (tiles.EXTENT * 2 ** z))
+            rows = await PetaService._fetch_rows_in_bbox(
+                session, minx, miny, maxx, maxy, tiles.MAX_FEATURES_PER_TILE, lod
+            )
+        
+        tile = await geometry_executor.run(PetaService._build_tile, rows, z, x, y)
+        _tile_cache.set(cache_key, tile)
+        return tile
+    
+    @staticmethod
+    def get_metrics() -> Dict[str, Any]:
+        """Metrik geometry_executor (queue depth, dll.) dan cache peta di worker ini"""
+        return {
+            "executor": geometry_executor.stats(),
+            "geometry_cache": _geometry_cache.stats(),
+            "tile_cache": _tile_cache.stats(),
         }
     
     @staticmethod
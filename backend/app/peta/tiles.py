@@ -0,0 +1,116 @@
+"""
+Encoder Mapbox Vector Tile (MVT) untuk polygon objek pajak
+Tile memakai skema XYZ Web Mercator (EPSG:3857), sama dengan Leaflet/OSM
+"""
+import math
+from typing import Any, Dict, Iterable, Tuple
+
+import mapbox_vector_tile
+import numpy as np
+import shapely
+from mapbox_vector_tile.encoder import on_invalid_geometry_make_valid
+from shapely.geometry import box
+from shapely.geometry.base import BaseGeometry
+
+LAYER_NAME = "objek_pajak"
+EXTENT = 4096  # resolusi grid koordinat di dalam satu tile
+TILE_BUFFER = 64  # buffer (unit extent) di luar tile agar garis tepi tidak terpotong
+MAX_ZOOM = 22
+MAX_FEATURES_PER_TILE = 20000
+
+EARTH_RADIUS = 6378137.0
+ORIGIN_SHIFT = math.pi * EARTH_RADIUS  # 20037508.34 m
+MAX_LATITUDE = 85.0511287798
+
+
+def tile_bounds_mercator(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """Bounding box tile dalam meter Web Mercator (minx, miny, maxx, maxy)"""
+    size = 2 * ORIGIN_SHIFT / (2 ** z)
+    minx = -ORIGIN_SHIFT + x * size
+    maxy = ORIGIN_SHIFT - y * size
+    return (minx, maxy - size, minx + size, maxy)
+
+
+def tile_bounds_lonlat(
+    z: int, x: int, y: int, buffer: float = 0.0
+) -> Tuple[float, float, float, float]:
+    """
+    Bounding box tile dalam WGS84 (min_lon, min_lat, max_lon, max_lat)
+
+    Args:
+        buffer: Perluasan bounding box dalam satuan tile (0.0 - 1.0)
+    """
+    n = 2 ** z
+
+    def lon(xt: float) -> float:
+        return xt / n * 360.0 - 180.0
+
+    def lat(yt: float) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * yt / n))))
+
+    return (
+        max(lon(x - buffer), -180.0),
+        max(lat(y + 1 + buffer), -MAX_LATITUDE),
+        min(lon(x + 1 + buffer), 180.0),
+        min(lat(y - buffer), MAX_LATITUDE),
+    )
+
+
+def is_valid_tile(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def _lonlat_to_mercator(coords: np.ndarray) -> np.ndarray:
+    lon = coords[:, 0]
+    lat = np.clip(coords[:, 1], -MAX_LATITUDE, MAX_LATITUDE)
+    mx = np.radians(lon) * EARTH_RADIUS
+    my = np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) * EARTH_RADIUS
+    return np.column_stack([mx, my])
+
+
+def encode_tile(
+    features: Iterable[Tuple[BaseGeometry, Dict[str, Any]]], z: int, x: int, y: int
+) -> bytes:
+    """
+    Encode polygon (WGS84) ke satu tile MVT
+
+    Geometry diproyeksikan ke Web Mercator, dipotong (clip) ke batas tile + buffer,
+    lalu disederhanakan dengan toleransi satu unit grid tile sehingga detail yang
+    tidak terlihat pada zoom tersebut tidak ikut dikirim.
+
+    Args:
+        features: Iterable (geometry shapely WGS84, properties)
+        z, x, y: Koordinat tile
+
+    Returns:
+        Bytes protobuf MVT
+    """
+    bounds = tile_bounds_mercator(z, x, y)
+    tile_size = bounds[2] - bounds[0]
+    pad = tile_size * TILE_BUFFER / EXTENT
+    clip_box = box(bounds[0] - pad, bounds[1] - pad, bounds[2] + pad, bounds[3] + pad)
+    tolerance = tile_size / EXTENT
+
+    encoded = []
+    for geom, properties in features:
+        geom = shapely.transform(geom, _lonlat_to_mercator)
+        if not geom.intersects(clip_box):
+            continue
+
+        geom = geom.intersection(clip_box).simplify(tolerance, preserve_topology=True)
+        if geom.is_empty:
+            continue
+
+        encoded.append({
+            "geometry": geom,
+            "properties": {k: v for k, v in properties.items() if v is not None},
+        })
+
+    return mapbox_vector_tile.encode(
+        [{"name": LAYER_NAME, "features": encoded}],
+        default_options={
+            "quantize_bounds": bounds,
+            "extents": EXTENT,
+            "on_invalid_geometry": on_invalid_geometry_make_valid,
+        },
+    )
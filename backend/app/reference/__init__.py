@@ -0,0 +1,6 @@
+"""
+Reference Module - cache pohon wilayah (propinsi/dati2/kecamatan/kelurahan)
+"""
+from app.reference.service import ReferenceService, ReferenceTree
+
+__all__ = ["ReferenceService", "ReferenceTree"]
@@ -0,0 +1,269 @@
+"""
+Cache referensi wilayah (propinsi / dati2 / kecamatan / kelurahan)
+
+Tabel ref_* kecil dan hampir tidak pernah berubah, jadi dimuat sekali saat
+startup menjadi pohon immutable di memori dan di-refresh berkala di background.
+Semua lookup nama dan daftar dropdown dibaca dari pohon ini tanpa query.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.models.ref_propinsi import RefPropinsi
+from app.models.ref_dati2 import RefDati2
+from app.models.ref_kecamatan import RefKecamatan
+from app.models.ref_kelurahan import RefKelurahan
+
+
+@dataclass(frozen=True)
+class PropinsiRef:
+    KD_PROPINSI: str
+    NM_PROPINSI: str
+
+
+@dataclass(frozen=True)
+class Dati2Ref:
+    KD_PROPINSI: str
+    KD_DATI2: str
+    NM_DATI2: str
+
+
+@dataclass(frozen=True)
+class KecamatanRef:
+    KD_PROPINSI: str
+    KD_DATI2: str
+    KD_KECAMATAN: str
+    NM_KECAMATAN: str
+
+
+@dataclass(frozen=True)
+class KelurahanRef:
+    KD_PROPINSI: str
+    KD_DATI2: str
+    KD_KECAMATAN: str
+    KD_KELURAHAN: str
+    KD_SEKTOR: str
+    NM_KELURAHAN: str
+    NO_KELURAHAN: Optional[int] = None
+    KD_POS_KELURAHAN: Optional[str] = None
+
+
+CodePath = Tuple[str, ...]
+
+
+class ReferenceTree:
+    """
+    Pohon wilayah immutable, diindeks berdasarkan path kode:
+    (kd_propinsi,) -> propinsi, (kd_propinsi, kd_dati2) -> dati2, dst.
+
+    children[path] berisi anak langsung dari path (sudah terurut nama),
+    children[()] adalah daftar propinsi.
+    """
+
+    def __init__(
+        self,
+        propinsi: Iterable[PropinsiRef],
+        dati2: Iterable[Dati2Ref],
+        kecamatan: Iterable[KecamatanRef],
+        kelurahan: Iterable[KelurahanRef],
+        loaded_at: Optional[float] = None,
+    ):
+        self.propinsi = _sorted(propinsi, "NM_PROPINSI")
+        self.dati2 = _sorted(dati2, "NM_DATI2")
+        self.kecamatan = _sorted(kecamatan, "NM_KECAMATAN")
+        self.kelurahan = _sorted(kelurahan, "NM_KELURAHAN")
+        self.loaded_at = loaded_at or time.time()
+
+        nodes: Dict[CodePath, object] = {}
+        children: Dict[CodePath, list] = {}
+        for items in (self.propinsi, self.dati2, self.kecamatan, self.kelurahan):
+            for item in items:
+                path = _path(item)
+                nodes[path] = item
+                children.setdefault(path[:-1], []).append(item)
+
+        self._nodes: Mapping[CodePath, object] = MappingProxyType(nodes)
+        self._children: Mapping[CodePath, Tuple] = MappingProxyType(
+            {path: tuple(items) for path, items in children.items()}
+        )
+
+    def get(self, *path: str):
+        """Node untuk path kode lengkap, mis. get("51", "02", "050") -> KecamatanRef"""
+        return self._nodes.get(path)
+
+    def get_name(self, *path: str) -> Optional[str]:
+        """Nama wilayah untuk path kode lengkap, None jika tidak ada"""
+        node = self._nodes.get(path)
+        return _name(node) if node is not None else None
+
+    def children(self, *path: str) -> Tuple:
+        """Anak langsung dari path (terurut nama); () -> semua propinsi"""
+        return self._children.get(path, ())
+
+    def list_dati2(self, kd_propinsi: Optional[str] = None) -> Tuple[Dati2Ref, ...]:
+        if kd_propinsi:
+            return self.children(kd_propinsi)
+        return self.dati2
+
+    def list_kecamatan(
+        self,
+        kd_propinsi: Optional[str] = None,
+        kd_dati2: Optional[str] = None,
+    ) -> Tuple[KecamatanRef, ...]:
+        if kd_propinsi and kd_dati2:
+            return self.children(kd_propinsi, kd_dati2)
+        return _filter(self.kecamatan, KD_PROPINSI=kd_propinsi, KD_DATI2=kd_dati2)
+
+    def list_kelurahan(
+        self,
+        kd_propinsi: Optional[str] = None,
+        kd_dati2: Optional[str] = None,
+        kd_kecamatan: Optional[str] = None,
+    ) -> Tuple[KelurahanRef, ...]:
+        if kd_propinsi and kd_dati2 and kd_kecamatan:
+            return self.children(kd_propinsi, kd_dati2, kd_kecamatan)
+        return _filter(
+            self.kelurahan,
+            KD_PROPINSI=kd_propinsi,
+            KD_DATI2=kd_dati2,
+            KD_KECAMATAN=kd_kecamatan,
+        )
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            "total_propinsi": len(self.propinsi),
+            "total_dati2": len(self.dati2),
+            "total_kecamatan": len(self.kecamatan),
+            "total_kelurahan": len(self.kelurahan),
+        }
+
+
+def _sorted(items: Iterable, name_field: str) -> Tuple:
+    return tuple(sorted(items, key=lambda item: getattr(item, name_field) or ""))
+
+
+def _path(item) -> CodePath:
+    if isinstance(item, KelurahanRef):
+        return (item.KD_PROPINSI, item.KD_DATI2, item.KD_KECAMATAN, item.KD_KELURAHAN)
+    if isinstance(item, KecamatanRef):
+        return (item.KD_PROPINSI, item.KD_DATI2, item.KD_KECAMATAN)
+    if isinstance(item, Dati2Ref):
+        return (item.KD_PROPINSI, item.KD_DATI2)
+    return (item.KD_PROPINSI,)
+
+
+def _name(item) -> str:
+    if isinstance(item, KelurahanRef):
+        return item.NM_KELURAHAN
+    if isinstance(item, KecamatanRef):
+        return item.NM_KECAMATAN
+    if isinstance(item, Dati2Ref):
+        return item.NM_DATI2
+    return item.NM_PROPINSI
+
+
+def _filter(items: Tuple, **conditions: Optional[str]) -> Tuple:
+    conditions = {key: value for key, value in conditions.items() if value}
+    if not conditions:
+        return items
+    return tuple(
+        item for item in items
+        if all(getattr(item, key) == value for key, value in conditions.items())
+    )
+
+
+_tree: Optional[ReferenceTree] = None
+_load_lock = asyncio.Lock()
+_refresh_task: Optional[asyncio.Task] = None
+
+
+class ReferenceService:
+    """Akses pohon referensi wilayah yang di-cache per proses"""
+
+    @staticmethod
+    async def load(session: AsyncSession) -> ReferenceTree:
+        """Baca ulang semua tabel ref_* dan bangun pohon baru"""
+        propinsi = (await session.execute(select(RefPropinsi))).scalars().all()
+        dati2 = (await session.execute(select(RefDati2))).scalars().all()
+        kecamatan = (await session.execute(select(RefKecamatan))).scalars().all()
+        kelurahan = (await session.execute(select(RefKelurahan))).scalars().all()
+
+        return ReferenceTree(
+            propinsi=[PropinsiRef(p.KD_PROPINSI, p.NM_PROPINSI) for p in propinsi],
+            dati2=[Dati2Ref(d.KD_PROPINSI, d.KD_DATI2, d.NM_DATI2) for d in dati2],
+            kecamatan=[
+                KecamatanRef(k.KD_PROPINSI, k.KD_DATI2, k.KD_KECAMATAN, k.NM_KECAMATAN)
+                for k in kecamatan
+            ],
+            kelurahan=[
+                KelurahanRef(
+                    k.KD_PROPINSI, k.KD_DATI2, k.KD_KECAMATAN, k.KD_KELURAHAN,
+                    k.KD_SEKTOR, k.NM_KELURAHAN, k.NO_KELURAHAN, k.KD_POS_KELURAHAN,
+                )
+                for k in kelurahan
+            ],
+        )
+
+    @staticmethod
+    async def refresh() -> ReferenceTree:
+        """Muat ulang pohon dari database lalu tukar referensinya (atomic)"""
+        global _tree
+        async with async_session_maker() as session:
+            tree = await ReferenceService.load(session)
+        _tree = tree
+        print(
+            f"[REFERENCE] Loaded {len(tree.propinsi)} propinsi, {len(tree.dati2)} dati2, "
+            f"{len(tree.kecamatan)} kecamatan, {len(tree.kelurahan)} kelurahan"
+        )
+        return tree
+
+    @staticmethod
+    async def get_tree() -> ReferenceTree:
+        """Pohon referensi saat ini; dimuat saat pertama dipakai jika startup belum memuatnya"""
+        if _tree is not None:
+            return _tree
+        async with _load_lock:
+            if _tree is None:
+                await ReferenceService.refresh()
+        return _tree
+
+    @staticmethod
+    async def _refresh_loop(interval: int) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await ReferenceService.refresh()
+            except Exception as e:
+                # Tetap pakai pohon lama, coba lagi di interval berikutnya
+                print(f"[REFERENCE] Refresh failed: {e}")
+
+    @staticmethod
+    async def start() -> None:
+        """Muat pohon saat startup dan jalankan refresh berkala di background"""
+        global _refresh_task
+        try:
+            await ReferenceService.refresh()
+        except Exception as e:
+            print(f"[REFERENCE] Initial load failed, will load on first use: {e}")
+
+        interval = settings.REFERENCE_REFRESH_INTERVAL
+        if interval > 0 and _refresh_task is None:
+            _refresh_task = asyncio.create_task(ReferenceService._refresh_loop(interval))
+
+    @staticmethod
+    async def stop() -> None:
+        global _refresh_task
+        if _refresh_task is not None:
+            _refresh_task.cancel()
+            try:
+                await _refresh_task
+            except asyncio.CancelledError:
+                pass
+            _refresh_task = None
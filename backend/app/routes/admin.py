@@ -2,9 +2,10 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlmodel import select, func, or_
 from app.core.deps import SessionDep
+from app.core.pagination import decode_cursor, keyset_condition, keyset_order, keyset_page
 from app.models.user import User
 from app.models.dashboard_responses import UserListResponse, UserUpdateRequest, UserCreateRequest, PaginatedUserListResponse
-from app.auth.service import get_current_user, retry_db_operation
+from app.auth.service import get_current_user, invalidate_user_cache, retry_db_operation
 from app.core.security import hash_password
 import math
 
@@ -17,9 +18,16 @@ async def get_all_users(
     current_user: User = Depends(get_current_user),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(50, ge=1, le=100, description="Items per page"),
-    search: Optional[str] = Query(None, description="Search in email, name")
+    search: Optional[str] = Query(None, description="Search in email, name"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (page is ignored)"),
+    with_total: bool = Query(True, description="Compute total_count (COUNT); disable for fast paging"),
 ):
-    """Get all users with pagination and search - admin only"""
+    """
+    Get all users with pagination and search - admin only
+
+    Users are ordered by email (unique index). Pass next_cursor back as
+    `cursor` to seek to the next page instead of using OFFSET.
+    """
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -44,20 +52,32 @@ async def get_all_users(
         result = await session.exec(count_statement)
         return result.one()
 
-    total_count = await retry_db_operation(get_count_operation)
+    total_count = None
+    if with_total:
+        total_count = await retry_db_operation(get_count_operation)
 
-    # Add pagination
-    offset = (page - 1) * limit
-    statement = base_statement.offset(offset).limit(limit)
+    # Add pagination: seek on email when a cursor is given, OFFSET otherwise
+    sort_columns = [User.email]
+    statement = base_statement.order_by(*keyset_order(sort_columns))
+    if cursor:
+        values = decode_cursor(cursor, len(sort_columns))
+        statement = statement.where(keyset_condition(sort_columns, values))
+    else:
+        statement = statement.offset((page - 1) * limit)
+    statement = statement.limit(limit + 1)
 
     async def get_users_operation():
         result = await session.exec(statement)
         return result.all()
 
-    users = await retry_db_operation(get_users_operation)
+    users, next_cursor = keyset_page(
+        await retry_db_operation(get_users_operation),
+        limit,
+        lambda user: [user.email],
+    )
 
     # Calculate total pages
-    total_pages = math.ceil(total_count / limit)
+    total_pages = math.ceil(total_count / limit) if total_count is not None else None
 
     user_list = [
         UserListResponse(
@@ -78,7 +98,8 @@ async def get_all_users(
         total_count=total_count,
         page=page,
         limit=limit,
-        total_pages=total_pages
+        total_pages=total_pages,
+        next_cursor=next_cursor
     )
 
 
@@ -132,6 +153,7 @@ async def update_user(
     session.add(user)
     await session.commit()
     await session.refresh(user)
+    invalidate_user_cache(user.id)
 
     return {"message": "User updated successfully"}
 
@@ -178,6 +200,7 @@ async def delete_user(
 
     await session.delete(user)
     await session.commit()
+    invalidate_user_cache(user_uuid)
 
     return {"message": "User deleted successfully"}
 
@@ -78,6 +78,7 @@ async def toggle_admin(
     session.add(current_user)
     await session.commit()
     await session.refresh(current_user)
+    service.invalidate_user_cache(current_user.id)
     
     # ✅ Log hasil perubahan
     logger.info(
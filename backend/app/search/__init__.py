@@ -0,0 +1,7 @@
+"""
+Search Module - pencarian fuzzy (trigram) objek pajak
+"""
+from app.search.router import router
+from app.search.service import SearchService
+
+__all__ = ["router", "SearchService"]
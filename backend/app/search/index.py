@@ -0,0 +1,225 @@
+"""
+Inverted index trigram (n-gram 3 huruf) di memori untuk pencarian fuzzy
+
+Teks dinormalisasi dulu (huruf kecil, tanpa aksen, ejaan lama Indonesia
+disamakan dengan EYD) lalu dipecah per kata menjadi trigram gaya pg_trgm.
+Kecocokan dinilai dari proporsi trigram query yang ada di field dokumen,
+sehingga salah ketik satu-dua huruf tetap ditemukan.
+"""
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Hashable, List, Mapping, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# Ejaan lama / variasi umum -> EYD, mis. Soekarno = Sukarno, Djoko = Joko
+SPELLING_VARIANTS = [
+    ("oe", "u"),
+    ("dj", "j"),
+    ("tj", "c"),
+    ("nj", "ny"),
+    ("sj", "sy"),
+    ("ch", "kh"),
+]
+
+# Singkatan alamat disamakan; kata yang terlalu umum tidak diindeks
+WORD_ALIASES = {
+    "jalan": "jl",
+    "jln": "jl",
+    "gang": "gg",
+    "nomor": "no",
+    "nomer": "no",
+}
+STOPWORDS = {"jl", "gg", "no", "rt", "rw", "br", "banjar", "kel", "desa"}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_text(text: Optional[str]) -> List[str]:
+    """Teks -> daftar kata ternormalisasi (tanpa stopword)"""
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    for old, new in SPELLING_VARIANTS:
+        text = text.replace(old, new)
+    words = []
+    for word in _NON_ALNUM.split(text):
+        word = WORD_ALIASES.get(word, word)
+        if word and word not in STOPWORDS:
+            words.append(word)
+    return words
+
+
+def trigrams(text: Optional[str]) -> FrozenSet[str]:
+    """Trigram setiap kata, dengan padding dua spasi di depan dan satu di belakang"""
+    grams: Set[str] = set()
+    for word in normalize_text(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    key: Hashable
+    score: float
+    field: str
+
+
+class TrigramIndex:
+    """
+    Inverted index trigram -> id dokumen, per field
+
+    add() untuk dokumen yang sama mengganti isi lama (incremental update).
+    Aman dipanggil dari beberapa thread.
+
+    Posting list disimpan sebagai set (murah diubah) dan disalin ke array
+    numpy saat pertama dipakai search; add/remove hanya membuang salinan
+    untuk trigram yang berubah. Penghitungan skor dilakukan vektor (bincount).
+    """
+
+    def __init__(self, fields: Mapping[str, float]):
+        """
+        Args:
+            fields: Nama field -> bobot skor (mis. {"nm_wp": 1.0, "jalan_op": 0.9})
+        """
+        self.fields = dict(fields)
+        self._lock = threading.Lock()
+        self._ids: Dict[Hashable, int] = {}
+        self._keys: Dict[int, Hashable] = {}
+        self._grams: Dict[int, Dict[str, FrozenSet[str]]] = {}
+        self._postings: Dict[str, Dict[str, Set[int]]] = {field: {} for field in self.fields}
+        self._arrays: Dict[Tuple[str, str], np.ndarray] = {}
+        self._sizes: Dict[str, List[int]] = {field: [] for field in self.fields}
+        self._size_arrays: Dict[str, np.ndarray] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, key: Hashable, values: Mapping[str, Optional[str]]) -> None:
+        """Indeks (atau indeks ulang) dokumen key dengan isi field values"""
+        grams = {field: trigrams(values.get(field)) for field in self.fields}
+        with self._lock:
+            doc_id = self._ids.get(key)
+            if doc_id is None:
+                doc_id = self._next_id
+                self._next_id += 1
+                self._ids[key] = doc_id
+                self._keys[doc_id] = key
+                for sizes in self._sizes.values():
+                    sizes.append(0)
+            else:
+                self._unlink(doc_id)
+            self._grams[doc_id] = grams
+            for field, field_grams in grams.items():
+                postings = self._postings[field]
+                for gram in field_grams:
+                    postings.setdefault(gram, set()).add(doc_id)
+                    self._arrays.pop((field, gram), None)
+                self._sizes[field][doc_id] = len(field_grams)
+            self._size_arrays.clear()
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            doc_id = self._ids.pop(key, None)
+            if doc_id is None:
+                return
+            self._unlink(doc_id)
+            del self._grams[doc_id]
+            del self._keys[doc_id]
+
+    def _unlink(self, doc_id: int) -> None:
+        for field, field_grams in self._grams[doc_id].items():
+            postings = self._postings[field]
+            for gram in field_grams:
+                self._arrays.pop((field, gram), None)
+                docs = postings.get(gram)
+                if docs is not None:
+                    docs.discard(doc_id)
+                    if not docs:
+                        del postings[gram]
+            self._sizes[field][doc_id] = 0
+        self._size_arrays.clear()
+
+    def _posting_array(self, field: str, gram: str) -> Optional[np.ndarray]:
+        array = self._arrays.get((field, gram))
+        if array is None:
+            docs = self._postings[field].get(gram)
+            if not docs:
+                return None
+            array = np.fromiter(docs, dtype=np.int64, count=len(docs))
+            self._arrays[(field, gram)] = array
+        return array
+
+    def _size_array(self, field: str) -> np.ndarray:
+        array = self._size_arrays.get(field)
+        if array is None:
+            array = np.asarray(self._sizes[field], dtype=np.float64)
+            self._size_arrays[field] = array
+        return array
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        fields: Optional[Sequence[str]] = None,
+        min_similarity: float = 0.3,
+        allow: Optional[Callable[[Hashable], bool]] = None,
+    ) -> List[SearchHit]:
+        """
+        Dokumen yang cocok dengan query, skor tertinggi dulu
+
+        Skor = bobot field x (0.7 x proporsi trigram query yang ditemukan
+        + 0.3 x kemiripan Jaccard seluruh field), diambil field terbaik.
+
+        Args:
+            fields: Batasi ke field tertentu (default semua)
+            min_similarity: Minimal proporsi trigram query yang harus cocok
+            allow: Filter key dokumen (mis. hanya objek milik user)
+        """
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        with self._lock:
+            total = self._next_id
+            best = np.zeros(total, dtype=np.float64)
+            best_field = np.zeros(total, dtype=np.int8)
+            field_names = list(fields or self.fields)
+
+            for field_no, field in enumerate(field_names):
+                if field not in self._postings:
+                    continue
+                arrays = [self._posting_array(field, gram) for gram in query_grams]
+                arrays = [array for array in arrays if array is not None]
+                if not arrays:
+                    continue
+
+                # hits[doc] = jumlah trigram query yang ada di field dokumen
+                hits = np.bincount(np.concatenate(arrays), minlength=total).astype(np.float64)
+                coverage = hits / len(query_grams)
+                union = len(query_grams) + self._size_array(field) - hits
+                jaccard = np.divide(hits, union, out=np.zeros_like(hits), where=union > 0)
+                score = self.fields[field] * (0.7 * coverage + 0.3 * jaccard)
+                score[coverage < min_similarity] = 0.0
+
+                better = score > best
+                best[better] = score[better]
+                best_field[better] = field_no
+
+            candidates = np.nonzero(best)[0]
+            candidates = candidates[np.argsort(-best[candidates], kind="stable")]
+
+            results: List[SearchHit] = []
+            for doc_id in candidates:
+                key = self._keys.get(int(doc_id))
+                if key is None or (allow is not None and not allow(key)):
+                    continue
+                results.append(SearchHit(key, round(float(best[doc_id]), 4), field_names[best_field[doc_id]]))
+                if len(results) >= limit:
+                    break
+        return results
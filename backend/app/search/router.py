@@ -0,0 +1,64 @@
+"""
+Router untuk pencarian fuzzy objek pajak
+"""
+import time
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.core.deps import SessionDep
+from app.models.user import User
+from app.auth import service as auth_service
+from app.auth.ownership import OwnershipService
+from app.search.schemas import SearchResponse
+from app.search.service import SearchService
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("", response_model=SearchResponse)
+async def search_objek(
+    session: SessionDep,
+    current_user: User = Depends(auth_service.get_current_user),
+    q: str = Query(..., min_length=2, max_length=100, description="Nama WP, alamat objek, atau nomor formulir SPOP"),
+    fields: Optional[List[Literal["nm_wp", "jalan_op", "no_formulir"]]] = Query(None, description="Batasi field yang dicari"),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Cari objek pajak (typo-tolerant, ejaan lama/baru dianggap sama)
+
+    Admin mencari di semua objek; wajib pajak hanya di objek miliknya.
+    """
+    if not SearchService.is_ready():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Index pencarian sedang dibangun, coba lagi sebentar"
+        )
+
+    subjek_pajak_ids = None
+    if not current_user.is_admin:
+        ownership = await OwnershipService.resolve(session, current_user.email)
+        subjek_pajak_ids = ownership.subjek_pajak_ids
+
+    started = time.perf_counter()
+    results = SearchService.search(q, limit=limit, fields=fields, subjek_pajak_ids=subjek_pajak_ids)
+    return SearchResponse(
+        query=q,
+        results=results,
+        took_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+
+
+@router.post("/rebuild")
+async def rebuild_search_index(
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    """Bangun ulang index pencarian dari database - admin only"""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={"code": "ADMIN_REQUIRED", "msg": "Admin access required"}
+        )
+
+    documents = await SearchService.rebuild()
+    return {"message": "Index pencarian berhasil dibangun ulang", "documents": documents}
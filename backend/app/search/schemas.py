@@ -0,0 +1,23 @@
+"""
+Pydantic schemas untuk Search API
+"""
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class SearchResult(BaseModel):
+    """Satu objek pajak hasil pencarian"""
+    nop: str
+    NM_WP: Optional[str] = None
+    JALAN_OP: Optional[str] = None
+    NO_FORMULIR_SPOP: Optional[str] = None
+    score: float
+    matched_field: str
+
+
+class SearchResponse(BaseModel):
+    """Hasil pencarian, skor tertinggi dulu"""
+    query: str
+    results: List[SearchResult]
+    took_ms: float
@@ -0,0 +1,265 @@
+"""
+Service pencarian objek pajak (nama WP, alamat objek, nomor formulir SPOP)
+
+Index trigram dibangun sekali dari database di background saat startup dan
+diperbarui per objek setiap SPOP dibuat/diubah lewat API.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy import case, false, literal, or_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.models.dat_subjek_pajak import DatSubjekPajak
+from app.models.spop import Spop
+from app.search.index import TrigramIndex
+
+# Field yang diindeks beserta bobot skornya
+SEARCH_FIELDS = {
+    "nm_wp": 1.0,
+    "no_formulir": 1.0,
+    "jalan_op": 0.9,
+}
+
+_index = TrigramIndex(SEARCH_FIELDS)
+# NOP -> data tampilan + SUBJEK_PAJAK_ID (untuk filter kepemilikan)
+_documents: Dict[str, dict] = {}
+_ready = False
+_build_task: Optional[asyncio.Task] = None
+# Antrean update (argumen _add) per rebuild yang sedang berjalan; diputar ulang
+# ke index baru sebelum ditukar agar update selama rebuild tidak hilang
+_pending_updates: List[List[tuple]] = []
+
+
+# Maksimum kandidat dari index yang diteruskan ke query list (WHERE NOP IN ...)
+LIST_CANDIDATE_LIMIT = 500
+
+# Rank di query list: cocok persis > substring > skor fuzzy (skor x SCORE_SCALE).
+# Integer agar nilai rank di cursor keyset dibandingkan persis oleh MySQL.
+SCORE_SCALE = 10000
+CONTAINS_RANK = 2 * SCORE_SCALE
+EXACT_RANK = 3 * SCORE_SCALE
+
+
+@dataclass
+class ListMatch:
+    """Filter + urutan relevansi pencarian untuk query list"""
+    condition: Any
+    # Ekspresi integer, makin besar makin relevan
+    rank: Any
+    # True jika kandidat dari index terpotong di LIST_CANDIDATE_LIMIT
+    truncated: bool = False
+
+
+def spop_nop(spop: Spop) -> str:
+    return (
+        f"{spop.KD_PROPINSI}{spop.KD_DATI2}{spop.KD_KECAMATAN}{spop.KD_KELURAHAN}"
+        f"{spop.KD_BLOK}{spop.NO_URUT}{spop.KD_JNS_OP}"
+    )
+
+
+class SearchService:
+    """Pencarian fuzzy objek pajak dari index trigram di memori"""
+
+    @staticmethod
+    def is_ready() -> bool:
+        return _ready
+
+    @staticmethod
+    def _add(index: TrigramIndex, documents: Dict[str, dict], nop: str,
+             subjek_pajak_id: Optional[str], nm_wp: Optional[str],
+             jalan_op: Optional[str], no_formulir: Optional[str]) -> None:
+        documents[nop] = {
+            "nop": nop,
+            "SUBJEK_PAJAK_ID": subjek_pajak_id,
+            "NM_WP": nm_wp,
+            "JALAN_OP": jalan_op,
+            "NO_FORMULIR_SPOP": no_formulir,
+        }
+        index.add(nop, {"nm_wp": nm_wp, "jalan_op": jalan_op, "no_formulir": no_formulir})
+
+    @staticmethod
+    async def rebuild() -> int:
+        """Bangun ulang seluruh index dari spop + dat_subjek_pajak, lalu tukar dengan yang lama"""
+        global _index, _documents, _ready
+        started = time.perf_counter()
+        # Antrean dipasang sebelum membaca database: update yang commit setelah
+        # snapshot dibaca tetap masuk ke index baru
+        pending: List[tuple] = []
+        _pending_updates.append(pending)
+        try:
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    select(
+                        Spop.NOP, Spop.SUBJEK_PAJAK_ID, Spop.JALAN_OP, Spop.NO_FORMULIR_SPOP,
+                        DatSubjekPajak.NM_WP,
+                    ).outerjoin(
+                        DatSubjekPajak,
+                        Spop.SUBJEK_PAJAK_ID == DatSubjekPajak.SUBJEK_PAJAK_ID,
+                    )
+                )
+                rows = result.all()
+
+            index = TrigramIndex(SEARCH_FIELDS)
+            documents: Dict[str, dict] = {}
+
+            def build():
+                for row in rows:
+                    SearchService._add(
+                        index, documents, row.NOP,
+                        row.SUBJEK_PAJAK_ID, row.NM_WP, row.JALAN_OP, row.NO_FORMULIR_SPOP,
+                    )
+
+            # Tokenisasi ratusan ribu baris CPU-bound, jangan di event loop
+            await asyncio.get_running_loop().run_in_executor(None, build)
+
+            # Tanpa await antara replay dan swap: tidak ada update yang menyelip
+            for update in pending:
+                SearchService._add(index, documents, *update)
+            _index, _documents, _ready = index, documents, True
+        finally:
+            _pending_updates.remove(pending)
+        print(
+            f"[SEARCH] Indexed {len(rows)} objek in {time.perf_counter() - started:.1f}s"
+            f" ({len(pending)} update selama rebuild)"
+        )
+        return len(rows)
+
+    @staticmethod
+    async def index_spop(session: AsyncSession, spop: Spop) -> None:
+        """Perbarui index untuk satu SPOP setelah create/update"""
+        nm_wp = None
+        if spop.SUBJEK_PAJAK_ID:
+            nm_wp = await session.scalar(
+                select(DatSubjekPajak.NM_WP).where(
+                    DatSubjekPajak.SUBJEK_PAJAK_ID == spop.SUBJEK_PAJAK_ID
+                )
+            )
+        update = (spop_nop(spop), spop.SUBJEK_PAJAK_ID, nm_wp, spop.JALAN_OP, spop.NO_FORMULIR_SPOP)
+        SearchService._add(_index, _documents, *update)
+        for pending in _pending_updates:
+            pending.append(update)
+
+    @staticmethod
+    def search(
+        query: str,
+        limit: int = 20,
+        fields: Optional[Iterable[str]] = None,
+        subjek_pajak_ids: Optional[Set[str]] = None,
+    ) -> List[dict]:
+        """
+        Objek yang cocok dengan query, skor tertinggi dulu
+
+        Args:
+            fields: Batasi ke sebagian SEARCH_FIELDS
+            subjek_pajak_ids: Jika diisi, hanya objek milik subjek pajak ini
+        """
+        documents = _documents
+        allow = None
+        if subjek_pajak_ids is not None:
+            allow = lambda nop: documents[nop]["SUBJEK_PAJAK_ID"] in subjek_pajak_ids
+        hits = _index.search(
+            query,
+            limit=limit,
+            fields=list(fields) if fields else None,
+            min_similarity=settings.SEARCH_MIN_SIMILARITY,
+            allow=allow,
+        )
+        return [
+            {**documents[hit.key], "score": hit.score, "matched_field": hit.field}
+            for hit in hits
+        ]
+
+    @staticmethod
+    def list_match(
+        search: str,
+        nop_column,
+        fields: Iterable[str],
+        exact: Sequence = (),
+        contains: Sequence = (),
+        fallback: Sequence = (),
+        subjek_pajak_ids: Optional[Set[str]] = None,
+    ) -> ListMatch:
+        """
+        Kondisi WHERE dan rank untuk pencarian di list objek pajak
+
+        Kondisi SQL exact/contains selalu ikut (nomor formulir, ID subjek pajak
+        tidak boleh hanya bergantung pada index fuzzy). Kandidat index pada
+        fields ditambahkan lewat NOP IN (...) dan diberi rank sesuai skornya;
+        selama index belum siap kondisi fallback dipakai sebagai gantinya.
+
+        Args:
+            nop_column: Kolom NOP (generated) tabel yang dicari
+            exact: Kondisi cocok persis, rank tertinggi
+            contains: Kondisi substring/prefix
+            fallback: Pengganti index selama index belum siap
+        """
+        conditions = [*exact, *contains]
+        whens = []
+        if exact:
+            whens.append((or_(*exact), EXACT_RANK))
+        if contains:
+            whens.append((or_(*contains), CONTAINS_RANK))
+
+        fuzzy_rank = literal(0)
+        truncated = False
+        if SearchService.is_ready():
+            hits = SearchService.search(
+                search,
+                limit=LIST_CANDIDATE_LIMIT + 1,
+                fields=fields,
+                subjek_pajak_ids=subjek_pajak_ids,
+            )
+            truncated = len(hits) > LIST_CANDIDATE_LIMIT
+            hits = hits[:LIST_CANDIDATE_LIMIT]
+            if hits:
+                conditions.append(nop_column.in_([hit["nop"] for hit in hits]))
+                fuzzy_rank = case(
+                    {hit["nop"]: int(hit["score"] * SCORE_SCALE) for hit in hits},
+                    value=nop_column,
+                    else_=0,
+                )
+        else:
+            conditions.extend(fallback)
+
+        rank = case(*whens, else_=fuzzy_rank) if whens else fuzzy_rank
+        return ListMatch(
+            condition=or_(*conditions) if conditions else false(),
+            rank=rank,
+            truncated=truncated,
+        )
+
+    @staticmethod
+    def stats() -> dict:
+        return {"ready": _ready, "documents": len(_index)}
+
+    @staticmethod
+    async def start() -> None:
+        """Bangun index di background agar startup tidak menunggu"""
+        global _build_task
+        if not settings.SEARCH_INDEX_ENABLED or _build_task is not None:
+            return
+
+        async def run():
+            try:
+                await SearchService.rebuild()
+            except Exception as e:
+                print(f"[SEARCH] Index build failed: {e}")
+
+        _build_task = asyncio.create_task(run())
+
+    @staticmethod
+    async def stop() -> None:
+        global _build_task
+        if _build_task is not None:
+            _build_task.cancel()
+            try:
+                await _build_task
+            except asyncio.CancelledError:
+                pass
+            _build_task = None
@@ -22,25 +22,24 @@ router = APIRouter(prefix="/spop", tags=["SPOP - Surat Pemberitahuan Objek Pajak
 
 
 @router.get("/reference/propinsi", response_model=list[RefPropinsi])
-async def get_propinsi_list(session: SessionDep):
+async def get_propinsi_list():
     """Ambil daftar provinsi untuk dropdown"""
-    return await SpopService.get_all_propinsi(session)
+    return await SpopService.get_all_propinsi()
 
 
 @router.get("/reference/dati2/{kd_propinsi}", response_model=list[RefDati2])
-async def get_dati2_list(kd_propinsi: str, session: SessionDep):
+async def get_dati2_list(kd_propinsi: str):
     """Ambil daftar kabupaten/kota berdasarkan provinsi"""
-    return await SpopService.get_dati2_by_propinsi(session, kd_propinsi)
+    return await SpopService.get_dati2_by_propinsi(kd_propinsi)
 
 
 @router.get("/reference/kecamatan/{kd_propinsi}/{kd_dati2}", response_model=list[RefKecamatan])
 async def get_kecamatan_list(
     kd_propinsi: str,
     kd_dati2: str,
-    session: SessionDep
 ):
     """Ambil daftar kecamatan berdasarkan kabupaten/kota"""
-    return await SpopService.get_kecamatan_by_dati2(session, kd_propinsi, kd_dati2)
+    return await SpopService.get_kecamatan_by_dati2(kd_propinsi, kd_dati2)
 
 
 @router.get("/reference/kelurahan/{kd_propinsi}/{kd_dati2}/{kd_kecamatan}", response_model=list[RefKelurahan])
@@ -48,11 +47,10 @@ async def get_kelurahan_list(
     kd_propinsi: str,
     kd_dati2: str,
     kd_kecamatan: str,
-    session: SessionDep
 ):
     """Ambil daftar kelurahan berdasarkan kecamatan"""
     return await SpopService.get_kelurahan_by_kecamatan(
-        session, kd_propinsi, kd_dati2, kd_kecamatan
+        kd_propinsi, kd_dati2, kd_kecamatan
     )
 
 
@@ -66,12 +64,14 @@ async def get_spop_list(
     kd_dati2: Optional[str] = Query(None, description="Filter berdasarkan kabupaten/kota"),
     kd_kecamatan: Optional[str] = Query(None, description="Filter berdasarkan kecamatan"),
     kd_kelurahan: Optional[str] = Query(None, description="Filter berdasarkan kelurahan"),
-    search: Optional[str] = Query(None, description="Pencarian berdasarkan alamat, subjek pajak, atau nomor formulir")
+    search: Optional[str] = Query(None, description="Pencarian berdasarkan alamat, subjek pajak, atau nomor formulir"),
+    cursor: Optional[str] = Query(None, description="next_cursor dari halaman sebelumnya (mengabaikan page)"),
+    with_total: bool = Query(True, description="Hitung total data (COUNT); matikan untuk paging cepat")
 ):
     """
     Ambil daftar SPOP dengan pagination dan filter - hanya milik user yang login
     """
-    spop_list, total = await SpopService.get_spop_list(
+    spop_list, total, next_cursor, search_truncated = await SpopService.get_spop_list(
         session=session,
         current_user_email=str(current_user.email),
         page=page,
@@ -80,15 +80,23 @@ async def get_spop_list(
         kd_dati2=kd_dati2,
         kd_kecamatan=kd_kecamatan,
         kd_kelurahan=kd_kelurahan,
-        search=search
+        search=search,
+        cursor=cursor,
+        with_total=with_total
     )
     
+    total_pages = None
+    if total is not None:
+        total_pages = ceil(total / page_size) if total > 0 else 0
+    
     return SpopListResponse(
         data=spop_list,
         total=total,
         page=page,
         page_size=page_size,
-        total_pages=ceil(total / page_size) if total > 0 else 0
+        total_pages=total_pages,
+        next_cursor=next_cursor,
+        search_truncated=search_truncated
     )
 
 
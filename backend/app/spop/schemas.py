@@ -150,10 +150,13 @@ class SpopRead(SpopBase):
 class SpopListResponse(BaseModel):
     """Response untuk list SPOP dengan pagination"""
     data: list[SpopRead]
-    total: int
+    total: Optional[int] = None  # None jika with_total=false
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # None jika sudah halaman terakhir
+    # True jika kandidat pencarian fuzzy terpotong (total/paging tidak lengkap)
+    search_truncated: bool = False
 
 
 # Schemas untuk dropdown/reference data
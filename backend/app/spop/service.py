@@ -3,14 +3,27 @@ from sqlmodel import select, func
 from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import HTTPException, status
 
+from app.auth.ownership import OwnershipService
+from app.core.pagination import decode_cursor, keyset_condition, keyset_order, keyset_page
 from app.models.spop import Spop
-from app.models.ref_propinsi import RefPropinsi
-from app.models.ref_dati2 import RefDati2
-from app.models.ref_kecamatan import RefKecamatan
-from app.models.ref_kelurahan import RefKelurahan
+from app.reference import ReferenceService
+from app.search.service import SearchService
+from app.reference.service import PropinsiRef, Dati2Ref, KecamatanRef, KelurahanRef
 from app.spop.schemas import SpopCreate, SpopUpdate
 
 
+# Kolom NOP (primary key spop) sebagai urutan keyset pagination
+NOP_COLUMNS = [
+    Spop.KD_PROPINSI,
+    Spop.KD_DATI2,
+    Spop.KD_KECAMATAN,
+    Spop.KD_KELURAHAN,
+    Spop.KD_BLOK,
+    Spop.NO_URUT,
+    Spop.KD_JNS_OP,
+]
+
+
 class SpopService:
     """Service untuk mengelola SPOP (Create, Read, Update - tanpa Delete)"""
     
@@ -48,9 +61,22 @@ class SpopService:
         kd_dati2: Optional[str] = None,
         kd_kecamatan: Optional[str] = None,
         kd_kelurahan: Optional[str] = None,
-        search: Optional[str] = None
-    ) -> tuple[list[Spop], int]:
-        """Ambil list SPOP dengan filter dan pagination"""
+        search: Optional[str] = None,
+        cursor: Optional[str] = None,
+        with_total: bool = True
+    ) -> tuple[list[Spop], Optional[int], Optional[str], bool]:
+        """
+        Ambil list SPOP dengan filter dan pagination
+
+        Jika cursor diberikan, halaman diambil dengan seek (keyset) alih-alih
+        OFFSET. Tanpa search urutannya NOP; dengan search urut relevansi
+        (nomor formulir/ID subjek pajak persis, substring, lalu skor fuzzy
+        alamat) kemudian NOP. Total hanya dihitung jika with_total.
+
+        Returns:
+            (list SPOP, total atau None, next_cursor atau None,
+             True jika kandidat fuzzy terpotong di LIST_CANDIDATE_LIMIT)
+        """
         # Base query
         statement = select(Spop)
         count_statement = select(func.count()).select_from(Spop)
@@ -58,21 +84,15 @@ class SpopService:
         # Apply filters
         conditions = []
         
-        # Filter by current user's subjek pajak ID
+        # Filter by objek milik user (cache kepemilikan, tanpa query ke dat_subjek_pajak)
+        subjek_pajak_ids = None
         if current_user_email:
-            from app.models.dat_subjek_pajak import DatSubjekPajak
-            # Get subjek_pajak_id from email
-            subjek_query = select(DatSubjekPajak.SUBJEK_PAJAK_ID).where(
-                DatSubjekPajak.EMAIL_WP == current_user_email
-            )
-            subjek_result = await session.execute(subjek_query)
-            subjek_pajak_id = subjek_result.scalar_one_or_none()
-            
-            if subjek_pajak_id:
-                conditions.append(Spop.SUBJEK_PAJAK_ID == subjek_pajak_id)
-            else:
-                # Jika user tidak punya subjek pajak, return empty list
-                return [], 0
+            ownership = await OwnershipService.resolve(session, current_user_email)
+            if not ownership.nops:
+                # Jika user tidak punya objek, return empty list
+                return [], 0 if with_total else None, None, False
+            subjek_pajak_ids = ownership.subjek_pajak_ids
+            conditions.append(Spop.NOP.in_(ownership.nops))
         
         if kd_propinsi:
             conditions.append(Spop.KD_PROPINSI == kd_propinsi)
@@ -82,29 +102,62 @@ class SpopService:
             conditions.append(Spop.KD_KECAMATAN == kd_kecamatan)
         if kd_kelurahan:
             conditions.append(Spop.KD_KELURAHAN == kd_kelurahan)
+
+        sort_columns = NOP_COLUMNS
+        truncated = False
         if search:
-            conditions.append(
-                (Spop.JALAN_OP.contains(search)) |
-                (Spop.SUBJEK_PAJAK_ID.contains(search)) |
-                (Spop.NO_FORMULIR_SPOP.contains(search))
+            # Nomor formulir / ID subjek pajak dicocokkan persis/substring di SQL,
+            # alamat lewat index trigram (typo-tolerant; LIKE selama index belum siap)
+            match = SearchService.list_match(
+                search,
+                Spop.NOP,
+                fields=["jalan_op"],
+                exact=[Spop.NO_FORMULIR_SPOP == search, Spop.SUBJEK_PAJAK_ID == search],
+                contains=[Spop.NO_FORMULIR_SPOP.contains(search), Spop.SUBJEK_PAJAK_ID.contains(search)],
+                fallback=[Spop.JALAN_OP.contains(search)],
+                subjek_pajak_ids=subjek_pajak_ids,
             )
+            conditions.append(match.condition)
+            truncated = match.truncated
+            statement = statement.add_columns(match.rank.label("search_rank"))
+            # Rank dinegasikan agar seluruh kolom keyset searah (ascending)
+            sort_columns = [-match.rank, *NOP_COLUMNS]
         
         if conditions:
             statement = statement.where(*conditions)
             count_statement = count_statement.where(*conditions)
         
         # Count total
-        count_result = await session.execute(count_statement)
-        total = count_result.scalar_one()
+        total = None
+        if with_total:
+            count_result = await session.execute(count_statement)
+            total = count_result.scalar_one()
         
-        # Pagination
-        statement = statement.offset((page - 1) * page_size).limit(page_size)
-        statement = statement.order_by(Spop.KD_PROPINSI, Spop.KD_DATI2, Spop.KD_KECAMATAN, Spop.KD_KELURAHAN)
+        # Pagination (urut NOP = primary key, jadi seek memakai index PK)
+        statement = statement.order_by(*keyset_order(sort_columns))
+        if cursor:
+            values = decode_cursor(cursor, len(sort_columns))
+            statement = statement.where(keyset_condition(sort_columns, values))
+        else:
+            statement = statement.offset((page - 1) * page_size)
+        statement = statement.limit(page_size + 1)
         
         result = await session.execute(statement)
-        spop_list = result.scalars().all()
+        if search:
+            rows, next_cursor = keyset_page(
+                result.all(),
+                page_size,
+                lambda row: [-row.search_rank] + [getattr(row[0], column.key) for column in NOP_COLUMNS],
+            )
+            spop_list = [row[0] for row in rows]
+        else:
+            spop_list, next_cursor = keyset_page(
+                result.scalars().all(),
+                page_size,
+                lambda spop: [getattr(spop, column.key) for column in NOP_COLUMNS],
+            )
         
-        return list(spop_list), total
+        return spop_list, total, next_cursor, truncated
     
     @staticmethod
     async def create_spop(session: AsyncSession, spop_data: SpopCreate) -> Spop:
@@ -132,6 +185,9 @@ class SpopService:
         session.add(spop)
         await session.commit()
         await session.refresh(spop)
+        await SearchService.index_spop(session, spop)
+        # Pemilik objek bisa bertambah/berubah: cache kepemilikan dihitung ulang
+        OwnershipService.invalidate()
         
         return spop
     
@@ -168,52 +224,37 @@ class SpopService:
         session.add(spop)
         await session.commit()
         await session.refresh(spop)
+        await SearchService.index_spop(session, spop)
+        # Pemilik objek bisa bertambah/berubah: cache kepemilikan dihitung ulang
+        OwnershipService.invalidate()
         
         return spop
     
-    # Reference Data Services
+    # Reference Data Services (dibaca dari pohon referensi di memori, lihat app/reference)
     @staticmethod
-    async def get_all_propinsi(session: AsyncSession) -> list[RefPropinsi]:
+    async def get_all_propinsi() -> list[PropinsiRef]:
         """Ambil semua provinsi untuk dropdown"""
-        statement = select(RefPropinsi).order_by(RefPropinsi.NM_PROPINSI)
-        result = await session.execute(statement)
-        return list(result.scalars().all())
+        tree = await ReferenceService.get_tree()
+        return list(tree.propinsi)
     
     @staticmethod
-    async def get_dati2_by_propinsi(session: AsyncSession, kd_propinsi: str) -> list[RefDati2]:
+    async def get_dati2_by_propinsi(kd_propinsi: str) -> list[Dati2Ref]:
         """Ambil kabupaten/kota berdasarkan provinsi"""
-        statement = select(RefDati2).where(
-            RefDati2.KD_PROPINSI == kd_propinsi
-        ).order_by(RefDati2.NM_DATI2)
-        result = await session.execute(statement)
-        return list(result.scalars().all())
+        tree = await ReferenceService.get_tree()
+        return list(tree.children(kd_propinsi))
     
     @staticmethod
-    async def get_kecamatan_by_dati2(
-        session: AsyncSession,
-        kd_propinsi: str,
-        kd_dati2: str
-    ) -> list[RefKecamatan]:
+    async def get_kecamatan_by_dati2(kd_propinsi: str, kd_dati2: str) -> list[KecamatanRef]:
         """Ambil kecamatan berdasarkan kabupaten/kota"""
-        statement = select(RefKecamatan).where(
-            RefKecamatan.KD_PROPINSI == kd_propinsi,
-            RefKecamatan.KD_DATI2 == kd_dati2
-        ).order_by(RefKecamatan.NM_KECAMATAN)
-        result = await session.execute(statement)
-        return list(result.scalars().all())
+        tree = await ReferenceService.get_tree()
+        return list(tree.children(kd_propinsi, kd_dati2))
     
     @staticmethod
     async def get_kelurahan_by_kecamatan(
-        session: AsyncSession,
         kd_propinsi: str,
         kd_dati2: str,
         kd_kecamatan: str
-    ) -> list[RefKelurahan]:
+    ) -> list[KelurahanRef]:
         """Ambil kelurahan berdasarkan kecamatan"""
-        statement = select(RefKelurahan).where(
-            RefKelurahan.KD_PROPINSI == kd_propinsi,
-            RefKelurahan.KD_DATI2 == kd_dati2,
-            RefKelurahan.KD_KECAMATAN == kd_kecamatan
-        ).order_by(RefKelurahan.NM_KELURAHAN)
-        result = await session.execute(statement)
-        return list(result.scalars().all())
+        tree = await ReferenceService.get_tree()
+        return list(tree.children(kd_propinsi, kd_dati2, kd_kecamatan))
@@ -0,0 +1,415 @@
+"""
+Impor pembayaran dari file rekonsiliasi bank (CSV atau fixed-width)
+
+File dibaca baris per baris (streaming) dan diproses per chunk. Satu chunk
+= satu transaksi: validasi NOP ke tabel sppt, satu INSERT multi-baris ke
+pembayaran_sppt (tanpa baris duplikat, lihat plan_chunk), lalu satu UPDATE
+status lunas untuk SPPT yang terdampak.
+Ringkasan pembayaran, sppt_latest dan rollup dashboard diperbarui oleh
+trigger MySQL pada kedua tabel tersebut.
+"""
+import csv
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, TextIO, Tuple
+
+from sqlalchemy import insert, tuple_
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel import and_, func, or_, select, update
+
+from app.models.nop import split_nop
+from app.models.pembayaran_sppt import PembayaranSppt
+from app.models.pembayaran_sppt_summary import PembayaranSpptSummary
+from app.models.sppt import Sppt
+
+# Layout default file fixed-width: (kolom, panjang)
+FIXED_WIDTH_LAYOUT: List[Tuple[str, int]] = [
+    ("NOP", 18),
+    ("THN_PAJAK_SPPT", 4),
+    ("TGL_PEMBAYARAN_SPPT", 8),
+    ("JML_SPPT_YG_DIBAYAR", 15),
+    ("DENDA_SPPT", 15),
+    ("NO_BUKTI", 20),
+]
+
+BANK_COLUMNS = ["KD_KANWIL_BANK", "KD_KPPBB_BANK", "KD_BANK_TUNGGAL", "KD_BANK_PERSEPSI", "KD_TP"]
+
+DATE_FORMATS = ["%Y%m%d", "%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"]
+
+# Kolom wajib di file; TGL + JML juga membentuk kunci duplikat jika tanpa NO_BUKTI
+REQUIRED_COLUMNS = ["NOP", "THN_PAJAK_SPPT", "TGL_PEMBAYARAN_SPPT", "JML_SPPT_YG_DIBAYAR"]
+
+# Batas kolom pembayaran_sppt (INT signed, NO_BUKTI VARCHAR(50), kode bank CHAR(2))
+MAX_INT = 2_147_483_647
+MAX_NO_BUKTI = 50
+BANK_CODE_LENGTH = 2
+
+# Jumlah baris ditolak yang disimpan detailnya (sisanya hanya dihitung)
+MAX_REJECT_DETAILS = 1000
+
+
+def check_columns(columns: Iterable[str]) -> None:
+    """ValueError jika header CSV / layout fixed-width tidak punya kolom wajib"""
+    columns = set(columns)
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"Kolom wajib tidak ada di file: {', '.join(missing)}")
+
+
+def parse_layout(spec: str) -> List[Tuple[str, int]]:
+    """"NOP:18,THN_PAJAK_SPPT:4,..." -> [("NOP", 18), ("THN_PAJAK_SPPT", 4), ...]"""
+    layout = []
+    for part in spec.split(","):
+        name, _, width = part.partition(":")
+        if not name.strip() or not width.strip().isdigit():
+            raise ValueError(f"Layout tidak valid: {part!r} (format KOLOM:PANJANG)")
+        layout.append((name.strip().upper(), int(width)))
+    return layout
+
+
+def read_csv(lines: TextIO, delimiter: str = ",") -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Baris CSV (dengan header) -> (nomor baris, {KOLOM: nilai}), nama kolom huruf besar"""
+    reader = csv.reader(lines, delimiter=delimiter)
+    header = [name.strip().upper() for name in next(reader, [])]
+    check_columns(header)
+    for row in reader:
+        if not any(value.strip() for value in row):
+            continue
+        yield reader.line_num, dict(zip(header, row))
+
+
+def read_fixed_width(lines: Iterable[str], layout: Sequence[Tuple[str, int]] = FIXED_WIDTH_LAYOUT) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Baris fixed-width -> (nomor baris, {KOLOM: nilai}) sesuai layout"""
+    check_columns(name for name, _ in layout)
+    for line_no, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        raw, start = {}, 0
+        for name, width in layout:
+            raw[name] = line[start:start + width]
+            start += width
+        yield line_no, raw
+
+
+def _parse_amount(value: Optional[str]) -> int:
+    value = (value or "").strip().replace(",", "")
+    if not value:
+        return 0
+    try:
+        amount = Decimal(value)
+        if amount != amount.to_integral_value():
+            raise ValueError
+        amount = int(amount)
+    except (InvalidOperation, OverflowError, ValueError):
+        raise ValueError(f"Nominal tidak valid: {value!r}")
+    if not 0 <= amount <= MAX_INT:
+        raise ValueError(f"Nominal di luar batas: {value!r}")
+    return amount
+
+
+def _parse_date(value: Optional[str]) -> date:
+    value = (value or "").strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Tanggal tidak valid: {value!r}")
+
+
+@dataclass
+class PaymentRecord:
+    line_no: int
+    nop: str
+    thn_pajak: str
+    jml_dibayar: int
+    denda: int
+    tgl_pembayaran: date
+    no_bukti: Optional[str]
+    pembayaran_ke: Optional[int]
+    bank: Dict[str, str]
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.nop, self.thn_pajak
+
+    @property
+    def natural_key(self) -> tuple:
+        return natural_key(self.nop, self.thn_pajak, self.tgl_pembayaran, self.jml_dibayar, self.bank.values())
+
+
+def natural_key(nop: str, thn_pajak: str, tgl: date, jml: int, bank: Iterable[str]) -> tuple:
+    """Kunci duplikat pembayaran tanpa NO_BUKTI: (NOP, tahun, tanggal, jumlah, kode bank)"""
+    return (nop, thn_pajak, tgl, jml, *bank)
+
+
+def parse_record(line_no: int, raw: Dict[str, str], bank_defaults: Dict[str, str]) -> PaymentRecord:
+    """Validasi satu baris mentah; ValueError jika tidak valid"""
+    nop = "".join(filter(str.isdigit, raw.get("NOP") or ""))
+    if len(nop) != 18:
+        raise ValueError("NOP harus 18 digit")
+    thn_pajak = (raw.get("THN_PAJAK_SPPT") or "").strip()
+    if len(thn_pajak) != 4 or not thn_pajak.isdigit():
+        raise ValueError(f"Tahun pajak tidak valid: {thn_pajak!r}")
+    jml_dibayar = _parse_amount(raw.get("JML_SPPT_YG_DIBAYAR"))
+    if jml_dibayar <= 0:
+        raise ValueError("Jumlah dibayar harus lebih dari 0")
+    pembayaran_ke = (raw.get("PEMBAYARAN_SPPT_KE") or "").strip()
+    if pembayaran_ke and not (pembayaran_ke.isdigit() and 0 < int(pembayaran_ke) <= MAX_INT):
+        raise ValueError(f"PEMBAYARAN_SPPT_KE tidak valid: {pembayaran_ke!r}")
+    no_bukti = (raw.get("NO_BUKTI") or "").strip() or None
+    if no_bukti and len(no_bukti) > MAX_NO_BUKTI:
+        raise ValueError(f"NO_BUKTI lebih dari {MAX_NO_BUKTI} karakter")
+    bank = {name: (raw.get(name) or "").strip() or bank_defaults[name] for name in BANK_COLUMNS}
+    for name, code in bank.items():
+        if len(code) > BANK_CODE_LENGTH:
+            raise ValueError(f"{name} lebih dari {BANK_CODE_LENGTH} karakter: {code!r}")
+    return PaymentRecord(
+        line_no=line_no,
+        nop=nop,
+        thn_pajak=thn_pajak,
+        jml_dibayar=jml_dibayar,
+        denda=_parse_amount(raw.get("DENDA_SPPT")),
+        tgl_pembayaran=_parse_date(raw.get("TGL_PEMBAYARAN_SPPT")),
+        no_bukti=no_bukti,
+        pembayaran_ke=int(pembayaran_ke) if pembayaran_ke else None,
+        bank=bank,
+    )
+
+
+@dataclass
+class IngestStats:
+    rows_read: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    sppt_lunas: int = 0
+    chunks: int = 0
+    rejects: List[Tuple[int, str]] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.elapsed if self.elapsed > 0 else 0.0
+
+    def reject(self, line_no: int, reason: str) -> None:
+        self.rejected += 1
+        if len(self.rejects) < MAX_REJECT_DETAILS:
+            self.rejects.append((line_no, reason))
+
+    def as_dict(self) -> dict:
+        return {
+            "rows_read": self.rows_read,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "sppt_lunas": self.sppt_lunas,
+            "chunks": self.chunks,
+            "elapsed": round(self.elapsed, 2),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+# Kolom pembayaran_sppt yang dibaca untuk deteksi duplikat, urutan = tuple di plan_chunk
+EXISTING_COLUMNS = [
+    PembayaranSppt.NOP, PembayaranSppt.THN_PAJAK_SPPT, PembayaranSppt.PEMBAYARAN_SPPT_KE,
+    PembayaranSppt.NO_BUKTI, PembayaranSppt.TGL_PEMBAYARAN_SPPT, PembayaranSppt.JML_SPPT_YG_DIBAYAR,
+    *(getattr(PembayaranSppt, name) for name in BANK_COLUMNS),
+]
+
+
+def plan_chunk(
+    chunk: Sequence[PaymentRecord],
+    known: Set[Tuple[str, str]],
+    existing: Iterable[Sequence],
+    stats: IngestStats,
+) -> List[Tuple[PaymentRecord, int]]:
+    """
+    Pilih baris chunk yang diposting beserta PEMBAYARAN_SPPT_KE-nya
+
+    Baris dianggap duplikat (dilewati) jika NO_BUKTI-nya sudah ada untuk
+    (NOP, tahun), atau jika tanpa NO_BUKTI dan kunci alami (tanggal, jumlah,
+    kode bank) sama dengan pembayaran yang sudah ada / baris sebelumnya di
+    file, sehingga file yang sama aman diimpor ulang. Primary key yang bentrok
+    tanpa duplikat (PEMBAYARAN_SPPT_KE eksplisit) ditolak, bukan dilewati.
+
+    Args:
+        known: (NOP, tahun) yang punya SPPT
+        existing: Baris pembayaran_sppt untuk (NOP, tahun) chunk, urutan EXISTING_COLUMNS
+    """
+    last_ke: Dict[Tuple[str, str], int] = {}
+    primary_keys: Set[tuple] = set()
+    bukti: Set[tuple] = set()
+    natural_all: Set[tuple] = set()  # semua pembayaran
+    natural_tanpa_bukti: Set[tuple] = set()  # pembayaran tanpa NO_BUKTI
+
+    def remember(nop, thn, ke, no_bukti, natural, bank):
+        last_ke[(nop, thn)] = max(ke, last_ke.get((nop, thn), 0))
+        primary_keys.add((nop, thn, ke, *bank))
+        natural_all.add(natural)
+        if no_bukti:
+            bukti.add((nop, thn, no_bukti))
+        else:
+            natural_tanpa_bukti.add(natural)
+
+    for nop, thn, ke, no_bukti, tgl, jml, *bank in existing:
+        remember(nop, thn, ke, no_bukti, natural_key(nop, thn, tgl, jml, bank), bank)
+
+    planned = []
+    for record in chunk:
+        if record.key not in known:
+            stats.reject(record.line_no, f"SPPT {record.nop} tahun {record.thn_pajak} tidak ditemukan")
+            continue
+        natural = record.natural_key
+        if record.no_bukti:
+            # Baris lama bisa saja diposting tanpa NO_BUKTI
+            duplicate = (*record.key, record.no_bukti) in bukti or natural in natural_tanpa_bukti
+        else:
+            duplicate = natural in natural_all
+        if duplicate:
+            stats.duplicates += 1
+            continue
+        bank = list(record.bank.values())
+        ke = record.pembayaran_ke
+        if ke is None:
+            ke = last_ke.get(record.key, 0) + 1
+        elif (*record.key, ke, *bank) in primary_keys:
+            stats.reject(record.line_no, f"PEMBAYARAN_SPPT_KE {ke} sudah dipakai pembayaran lain")
+            continue
+        remember(record.nop, record.thn_pajak, ke, record.no_bukti, natural, bank)
+        planned.append((record, ke))
+    return planned
+
+
+class PaymentIngestService:
+    """Posting pembayaran bank ke pembayaran_sppt per chunk"""
+
+    @staticmethod
+    async def ingest(
+        conn: AsyncConnection,
+        rows: Iterable[Tuple[int, Dict[str, str]]],
+        nip_rekam: str,
+        bank_defaults: Dict[str, str],
+        chunk_size: int = 2000,
+        dry_run: bool = False,
+        on_progress: Optional[Callable[[IngestStats], None]] = None,
+    ) -> IngestStats:
+        """
+        Proses semua baris; commit per chunk (rollback jika dry_run)
+
+        conn harus dalam mode transaksi (bukan autocommit), lihat
+        commands/ingest_payments.py.
+        """
+        stats = IngestStats()
+        chunk: List[PaymentRecord] = []
+        for line_no, raw in rows:
+            stats.rows_read += 1
+            try:
+                chunk.append(parse_record(line_no, raw, bank_defaults))
+            except ValueError as e:
+                stats.reject(line_no, str(e))
+            if len(chunk) >= chunk_size:
+                await PaymentIngestService._run_chunk(conn, chunk, nip_rekam, stats, dry_run)
+                chunk = []
+                if on_progress:
+                    on_progress(stats)
+        if chunk:
+            await PaymentIngestService._run_chunk(conn, chunk, nip_rekam, stats, dry_run)
+        if on_progress:
+            on_progress(stats)
+        return stats
+
+    @staticmethod
+    async def _run_chunk(
+        conn: AsyncConnection, chunk: List[PaymentRecord], nip_rekam: str,
+        stats: IngestStats, dry_run: bool,
+    ) -> None:
+        try:
+            await PaymentIngestService._ingest_chunk(conn, chunk, nip_rekam, stats)
+        except Exception:
+            await conn.rollback()
+            raise
+        if dry_run:
+            await conn.rollback()
+        else:
+            await conn.commit()
+        stats.chunks += 1
+
+    @staticmethod
+    async def _ingest_chunk(
+        conn: AsyncConnection, chunk: List[PaymentRecord], nip_rekam: str, stats: IngestStats,
+    ) -> None:
+        keys = list({record.key for record in chunk})
+
+        # Hanya (NOP, tahun) yang punya SPPT; lookup lewat index unik (NOP, THN_PAJAK_SPPT)
+        result = await conn.execute(
+            select(Sppt.NOP, Sppt.THN_PAJAK_SPPT)
+            .where(tuple_(Sppt.NOP, Sppt.THN_PAJAK_SPPT).in_(keys))
+        )
+        known = {(row.NOP, row.THN_PAJAK_SPPT) for row in result}
+
+        # Pembayaran yang sudah ada untuk (NOP, tahun) chunk, untuk deteksi duplikat
+        result = await conn.execute(
+            select(*EXISTING_COLUMNS)
+            .where(tuple_(PembayaranSppt.NOP, PembayaranSppt.THN_PAJAK_SPPT).in_(keys))
+        )
+        planned = plan_chunk(chunk, known, result.all(), stats)
+        if not planned:
+            return
+
+        now = datetime.now()
+        values = [
+            {
+                **split_nop(record.nop),
+                "THN_PAJAK_SPPT": record.thn_pajak,
+                "PEMBAYARAN_SPPT_KE": ke,
+                **record.bank,
+                "DENDA_SPPT": record.denda,
+                "JML_SPPT_YG_DIBAYAR": record.jml_dibayar,
+                "TGL_PEMBAYARAN_SPPT": record.tgl_pembayaran,
+                "TGL_REKAM_BYR_SPPT": now,
+                "NIP_REKAM_BYR_SPPT": nip_rekam,
+                "NO_BUKTI": record.no_bukti,
+            }
+            for record, ke in planned
+        ]
+        posted = {record.key for record, _ in planned}
+
+        # Satu INSERT multi-baris biasa (bukan IGNORE): duplikat sudah disaring
+        # plan_chunk, jadi bentrok primary key (mis. impor lain berjalan bersamaan)
+        # atau nilai tidak valid menggagalkan chunk, bukan dibuang diam-diam
+        await conn.execute(insert(PembayaranSppt.__table__).values(values))
+        stats.inserted += len(values)
+
+        # SPPT terdampak yang total bayarnya (ringkasan baru diperbarui trigger) sudah
+        # menutup PBB yang harus dibayar. Dipilih dulu lalu di-UPDATE by key: trigger
+        # sppt menulis ke pembayaran_sppt_summary, jadi tabel itu tidak boleh dibaca
+        # di statement UPDATE yang sama (MySQL error 1442)
+        result = await conn.execute(
+            select(Sppt.NOP, Sppt.THN_PAJAK_SPPT)
+            .join(
+                PembayaranSpptSummary,
+                and_(
+                    PembayaranSpptSummary.NOP == Sppt.NOP,
+                    PembayaranSpptSummary.THN_PAJAK_SPPT == Sppt.THN_PAJAK_SPPT,
+                ),
+            )
+            .where(tuple_(Sppt.NOP, Sppt.THN_PAJAK_SPPT).in_(list(posted)))
+            .where(or_(Sppt.STATUS_PEMBAYARAN_SPPT.is_(None), Sppt.STATUS_PEMBAYARAN_SPPT == False))  # noqa: E712
+            .where(PembayaranSpptSummary.TOTAL_DIBAYAR >= func.coalesce(Sppt.PBB_YG_HARUS_DIBAYAR_SPPT, 0))
+        )
+        lunas = [tuple(row) for row in result]
+        if lunas:
+            result = await conn.execute(
+                update(Sppt)
+                .where(tuple_(Sppt.NOP, Sppt.THN_PAJAK_SPPT).in_(lunas))
+                .values(STATUS_PEMBAYARAN_SPPT=True)
+            )
+            stats.sppt_lunas += result.rowcount
@@ -17,6 +17,7 @@ from pydantic import BaseModel
 
 from app.auth import service
 from app.auth.service import retry_db_operation
+from app.auth.ownership import OwnershipService
 from app.auth.oauth_google import get_google_oauth_url, handle_google_callback
 from app.core import security
 from app.auth.exceptions import credentials_exception
@@ -26,11 +27,10 @@ from app.models.base import APIMessage
 from app.models.schemas import ErrorResponse
 from app.models.spop import Spop
 from app.models.sppt import Sppt
-from app.models.pembayaran_sppt import PembayaranSppt
+from app.models.sppt_latest import SpptLatest
+from app.models.pembayaran_sppt_summary import PembayaranSpptSummary
 from app.models.dat_subjek_pajak import DatSubjekPajak
 from app.models.user import User
-from app.models.ref_kecamatan import RefKecamatan
-from app.models.ref_kelurahan import RefKelurahan
 from app.models.dat_op_bangunan import DatOpBangunan
 from app.models.kelas_bumi import KelasBumi
 from app.models.kelas_bangunan import KelasBangunan
@@ -51,8 +51,14 @@ from .schemas import (
     SpptObjectPaginatedResponse,
     SpptPaymentResponse,
     ObjectInfoResponse,
+    ObjectOverviewResponse,
+    SpptYearOverviewResponse,
 )
-from app.core.database import get_async_session
+from app.core.database import get_async_session, run_concurrently
+from app.core.pagination import decode_cursor, keyset_condition, keyset_order, keyset_page
+from app.spop.service import NOP_COLUMNS as SPOP_NOP_COLUMNS
+from app.search.service import ListMatch, SearchService
+from app.reference import ReferenceService
 from sqlalchemy.dialects import mysql
 
 
@@ -99,14 +105,12 @@ async def verifikasi(
             Spop.SUBJEK_PAJAK_ID == DatSubjekPajak.SUBJEK_PAJAK_ID,
         )
         .where(
-            normalize_mysql5(DatSubjekPajak.NM_WP) == normalize(data.NM_WP),
-            Spop.KD_PROPINSI == data.KD_PROPINSI,
-            Spop.KD_DATI2 == data.KD_DATI2,
-            Spop.KD_KECAMATAN == data.KD_KECAMATAN,
-            Spop.KD_KELURAHAN == data.KD_KELURAHAN,
-            Spop.KD_BLOK == data.KD_BLOK,
-            Spop.NO_URUT == data.NO_URUT,
-            Spop.KD_JNS_OP == data.KD_JNS_OP,
+            DatSubjekPajak.NM_WP_NORMAL == normalize(data.NM_WP),
+            # Dari bagian kode, karena field NOP dari form bisa berisi titik/strip
+            Spop.NOP == (
+                f"{data.KD_PROPINSI}{data.KD_DATI2}{data.KD_KECAMATAN}{data.KD_KELURAHAN}"
+                f"{data.KD_BLOK}{data.NO_URUT}{data.KD_JNS_OP}"
+            ),
         )
         .limit(1)
     )
@@ -119,6 +123,8 @@ async def verifikasi(
     exists = spop_and_subjek is not None
     if exists:
         spop, subjek_pajak = spop_and_subjek
+        previous_email = subjek_pajak.EMAIL_WP
+        user_id, user_email = current_user.id, str(current_user.email)
 
         # Allow claiming/reclaiming verification regardless of existing EMAIL_WP value
         # Update email_wp and telp_wp in dat_subjek_pajak table for the found SUBJEK_PAJAK_ID
@@ -141,6 +147,11 @@ async def verifikasi(
         )
 
         await session.commit()
+        service.invalidate_user_cache(user_id)
+        # Objek subjek pajak ini pindah ke email user; pemilik lama juga berubah
+        OwnershipService.invalidate(user_email)
+        if previous_email:
+            OwnershipService.invalidate(previous_email)
 
     return ExistsResponse(exists=exists)
 
@@ -156,10 +167,31 @@ async def get_all_spop(
         "KD_PROPINSI"
     ),
     sort_order: Optional[Literal["asc", "desc"]] = Query("asc"),
+    cursor: Optional[str] = Query(None, description="meta.next_cursor dari halaman sebelumnya (mengabaikan page)"),
+    with_total: bool = Query(True, description="Hitung total data (COUNT); matikan untuk paging cepat"),
 ):
     """
     List all objects (SPOP) for the current user. Use this endpoint to select an object (NOP) before choosing a year.
+
+    Mendukung keyset pagination: kirim meta.next_cursor sebagai `cursor`
+    untuk halaman berikutnya. Seek memakai index untuk urutan default (NOP),
+    JALAN_OP dan LUAS_BUMI; urutan relevansi saat search tetap diurutkan
+    MySQL (filesort), tetapi hanya atas hasil pencarian.
     """
+    # Objek milik user (cache kepemilikan), difilter lewat index NOP
+    ownership = await OwnershipService.resolve(session, current_user.email)
+    if not ownership.nops:
+        return {
+            "data": [],
+            "meta": {
+                "page": page,
+                "per_page": per_page,
+                "total": 0 if with_total else None,
+                "total_pages": 0 if with_total else None,
+                "next_cursor": None,
+            },
+        }
+
     # Base query
     query = (
         select(Spop, DatSubjekPajak)
@@ -167,36 +199,57 @@ async def get_all_spop(
             DatSubjekPajak,
             Spop.SUBJEK_PAJAK_ID == DatSubjekPajak.SUBJEK_PAJAK_ID,
         )
-        .where(
-            DatSubjekPajak.EMAIL_WP == str(current_user.email)
-        )  # Make sure this is str if it's UUID
+        .where(Spop.NOP.in_(ownership.nops))
     )
 
-    # Apply search
+    # Apply search (nama ternormalisasi lewat index + kandidat fuzzy index trigram)
+    match = None
     if search:
-        normalized_search = f"%{normalize(search)}%"
-        query = query.where(
-            normalize_mysql5(DatSubjekPajak.NM_WP).ilike(normalized_search)
-        )
-
-    # Sorting
-    sort_column = getattr(Spop, sort_by)
-    query = query.order_by(
-        sort_column.asc() if sort_order == "asc" else sort_column.desc()
-    )
+        match = await name_search_match(session, query, search, ownership.subjek_pajak_ids)
+        query = query.where(match.condition)
 
     # Total count (subquery required for accurate count with joins/filters)
-    total_query = select(func.count()).select_from(query.subquery())
-    total_result = await session.exec(total_query)
-    total = total_result.one() or 0
-
-    # Pagination
-    result = await session.exec(query.offset((page - 1) * per_page).limit(per_page))
-    items = result.all()
+    total = None
+    if with_total:
+        total_query = select(func.count()).select_from(query.subquery())
+        total_result = await session.exec(total_query)
+        total = total_result.one() or 0
+
+    # Sorting: kolom urut + NOP sebagai penentu urutan unik untuk keyset
+    descending = sort_order == "desc"
+    if sort_by == "KD_PROPINSI" and match is not None:
+        # Urutan default saat mencari: paling relevan dulu (rank dinegasikan)
+        query = query.add_columns(match.rank.label("search_rank"))
+        sort_columns = [-match.rank]
+        sort_values = [lambda row: -row.search_rank]
+    elif sort_by == "KD_PROPINSI":
+        sort_columns, sort_values = [], []
+    elif sort_by == "JALAN_OP":
+        # Kolom mentah (bukan COALESCE) agar seek memakai index; NULL ditangani keyset_condition
+        sort_columns = [Spop.JALAN_OP]
+        sort_values = [lambda row: row[0].JALAN_OP]
+    else:
+        sort_columns = [Spop.LUAS_BUMI]
+        sort_values = [lambda row: row[0].LUAS_BUMI]
+    sort_columns += SPOP_NOP_COLUMNS
+    query = query.order_by(*keyset_order(sort_columns, descending))
+
+    # Pagination: seek dari cursor jika ada, selain itu OFFSET biasa
+    if cursor:
+        values = decode_cursor(cursor, len(sort_columns))
+        query = query.where(keyset_condition(sort_columns, values, descending))
+    else:
+        query = query.offset((page - 1) * per_page)
+    result = await session.exec(query.limit(per_page + 1))
+    items, next_cursor = keyset_page(
+        result.all(),
+        per_page,
+        lambda row: [value(row) for value in sort_values] + spop_nop_values(row[0]),
+    )
 
     # Combine Spop and DatSubjekPajak data
     combined_data = []
-    for spop, dat_subjek_pajak in items:
+    for spop, dat_subjek_pajak, *_ in items:
         data = spop.model_dump()
         if dat_subjek_pajak:
             data.update(dat_subjek_pajak.model_dump(exclude_none=True))
@@ -208,7 +261,9 @@ async def get_all_spop(
             "page": page,
             "per_page": per_page,
             "total": total,
-            "total_pages": (total + per_page - 1) // per_page,
+            "total_pages": (total + per_page - 1) // per_page if total is not None else None,
+            "next_cursor": next_cursor,
+            "search_truncated": match is not None and match.truncated,
         },
     }
 
@@ -223,6 +278,11 @@ async def get_sppt(
     return True
 
 
+def spop_nop_values(spop: Spop) -> list:
+    """Nilai NOP baris spop, urutan sama dengan SPOP_NOP_COLUMNS (untuk cursor)"""
+    return [getattr(spop, column.key) for column in SPOP_NOP_COLUMNS]
+
+
 def parse_nop(nop: str):
     # Remove non-digit chars, then parse
     digits = "".join(filter(str.isdigit, nop))
@@ -236,6 +296,7 @@ def parse_nop(nop: str):
         "KD_BLOK": digits[10:13],
         "NO_URUT": digits[13:17],
         "KD_JNS_OP": digits[17:18],
+        "NOP": digits,
     }
 
 
@@ -253,33 +314,14 @@ async def get_sppt_years(
     Get available SPPT years for a specific object (NOP). Pass the NOP as JSON body.
     """
     key = parse_nop(req.nop)
+    ownership = await OwnershipService.resolve(session, current_user.email)
+    if not ownership.owns(key["NOP"]):
+        return {"available_years": []}
+
     query = (
         select(Sppt.THN_PAJAK_SPPT, func.count().label("count"))
-        .join(
-            Spop,
-            and_(
-                Sppt.KD_PROPINSI == Spop.KD_PROPINSI,
-                Sppt.KD_DATI2 == Spop.KD_DATI2,
-                Sppt.KD_KECAMATAN == Spop.KD_KECAMATAN,
-                Sppt.KD_KELURAHAN == Spop.KD_KELURAHAN,
-                Sppt.KD_BLOK == Spop.KD_BLOK,
-                Sppt.NO_URUT == Spop.NO_URUT,
-                Sppt.KD_JNS_OP == Spop.KD_JNS_OP,
-            ),
-        )
-        .join(
-            DatSubjekPajak,
-            Spop.SUBJEK_PAJAK_ID == DatSubjekPajak.SUBJEK_PAJAK_ID,
-        )
         .where(
-            DatSubjekPajak.EMAIL_WP == str(current_user.email),
-            Sppt.KD_PROPINSI == key["KD_PROPINSI"],
-            Sppt.KD_DATI2 == key["KD_DATI2"],
-            Sppt.KD_KECAMATAN == key["KD_KECAMATAN"],
-            Sppt.KD_KELURAHAN == key["KD_KELURAHAN"],
-            Sppt.KD_BLOK == key["KD_BLOK"],
-            Sppt.NO_URUT == key["NO_URUT"],
-            Sppt.KD_JNS_OP == key["KD_JNS_OP"],
+            Sppt.NOP == key["NOP"],
         )
         .group_by(Sppt.THN_PAJAK_SPPT)
     )
@@ -292,6 +334,23 @@ async def get_sppt_years(
     return {"available_years": [{"THN_PAJAK_SPPT": r[0], "count": r[1]} for r in rows]}
 
 
+def payment_response(key: dict, year: str, summary: Optional[PembayaranSpptSummary]) -> SpptPaymentResponse:
+    """SpptPaymentResponse dari baris pembayaran_sppt_summary (None = belum ada pembayaran)"""
+    return SpptPaymentResponse(
+        KD_PROPINSI=key["KD_PROPINSI"],
+        KD_DATI2=key["KD_DATI2"],
+        KD_KECAMATAN=key["KD_KECAMATAN"],
+        KD_KELURAHAN=key["KD_KELURAHAN"],
+        KD_BLOK=key["KD_BLOK"],
+        NO_URUT=key["NO_URUT"],
+        KD_JNS_OP=key["KD_JNS_OP"],
+        THN_PAJAK_SPPT=year,
+        total_denda=summary.TOTAL_DENDA if summary else 0,
+        total_dibayar=summary.TOTAL_DIBAYAR if summary else 0,
+        tanggal_pembayaran=summary.TANGGAL_PEMBAYARAN if summary else None,
+    )
+
+
 @router.get("/sppt/{year}/{nop}/payment", response_model=SpptPaymentResponse)
 async def get_sppt_payment_detail_v2(
     year: str,
@@ -303,116 +362,18 @@ async def get_sppt_payment_detail_v2(
     Get payment information for a specific SPPT. Returns grouped payment data with totals.
     """
     key = parse_nop(nop)
+    ownership = await OwnershipService.resolve(session, current_user.email)
 
-    # Query to get payment data grouped by NOP and year with access control
-    # Only sum denda when STATUS_PEMBAYARAN_SPPT = 1 (paid status)
-    query = (
-        select(
-            PembayaranSppt.KD_PROPINSI,
-            PembayaranSppt.KD_DATI2,
-            PembayaranSppt.KD_KECAMATAN,
-            PembayaranSppt.KD_KELURAHAN,
-            PembayaranSppt.KD_BLOK,
-            PembayaranSppt.NO_URUT,
-            PembayaranSppt.KD_JNS_OP,
-            PembayaranSppt.THN_PAJAK_SPPT,
-            func.sum(
-                case(
-                    (Sppt.STATUS_PEMBAYARAN_SPPT == 1, PembayaranSppt.DENDA_SPPT),
-                    else_=0
-                )
-            ).label("total_denda"),
-            func.sum(PembayaranSppt.JML_SPPT_YG_DIBAYAR).label("total_dibayar"),
-            func.group_concat(PembayaranSppt.TGL_PEMBAYARAN_SPPT.distinct()).label("tanggal_pembayaran")
-        )
-        .join(
-            Spop,
-            and_(
-                PembayaranSppt.KD_PROPINSI == Spop.KD_PROPINSI,
-                PembayaranSppt.KD_DATI2 == Spop.KD_DATI2,
-                PembayaranSppt.KD_KECAMATAN == Spop.KD_KECAMATAN,
-                PembayaranSppt.KD_KELURAHAN == Spop.KD_KELURAHAN,
-                PembayaranSppt.KD_BLOK == Spop.KD_BLOK,
-                PembayaranSppt.NO_URUT == Spop.NO_URUT,
-                PembayaranSppt.KD_JNS_OP == Spop.KD_JNS_OP,
-            ),
-        )
-        .join(
-            Sppt,
-            and_(
-                PembayaranSppt.KD_PROPINSI == Sppt.KD_PROPINSI,
-                PembayaranSppt.KD_DATI2 == Sppt.KD_DATI2,
-                PembayaranSppt.KD_KECAMATAN == Sppt.KD_KECAMATAN,
-                PembayaranSppt.KD_KELURAHAN == Sppt.KD_KELURAHAN,
-                PembayaranSppt.KD_BLOK == Sppt.KD_BLOK,
-                PembayaranSppt.NO_URUT == Sppt.NO_URUT,
-                PembayaranSppt.KD_JNS_OP == Sppt.KD_JNS_OP,
-                PembayaranSppt.THN_PAJAK_SPPT == Sppt.THN_PAJAK_SPPT,
-            ),
-        )
-        .join(
-            DatSubjekPajak,
-            Spop.SUBJEK_PAJAK_ID == DatSubjekPajak.SUBJEK_PAJAK_ID,
-        )
-        .where(
-            DatSubjekPajak.EMAIL_WP == str(current_user.email),
-            PembayaranSppt.THN_PAJAK_SPPT == year,
-            PembayaranSppt.KD_PROPINSI == key["KD_PROPINSI"],
-            PembayaranSppt.KD_DATI2 == key["KD_DATI2"],
-            PembayaranSppt.KD_KECAMATAN == key["KD_KECAMATAN"],
-            PembayaranSppt.KD_KELURAHAN == key["KD_KELURAHAN"],
-            PembayaranSppt.KD_BLOK == key["KD_BLOK"],
-            PembayaranSppt.NO_URUT == key["NO_URUT"],
-            PembayaranSppt.KD_JNS_OP == key["KD_JNS_OP"],
-        )
-        .group_by(
-            PembayaranSppt.KD_PROPINSI,
-            PembayaranSppt.KD_DATI2,
-            PembayaranSppt.KD_KECAMATAN,
-            PembayaranSppt.KD_KELURAHAN,
-            PembayaranSppt.KD_BLOK,
-            PembayaranSppt.NO_URUT,
-            PembayaranSppt.KD_JNS_OP,
-            PembayaranSppt.THN_PAJAK_SPPT,
-        )
-    )
+    # Objek bukan milik user diperlakukan sama dengan belum ada pembayaran
+    if not ownership.owns(key["NOP"]):
+        return payment_response(key, year, None)
 
-    # Add retry logic for complex database queries
+    # Ringkasan per (NOP, tahun) sudah dihitung trigger: satu lookup primary key
     async def execute_payment_query():
-        result = await session.exec(query)
-        return result.first()
+        return await session.get(PembayaranSpptSummary, (key["NOP"], year))
 
-    payment_data = await retry_db_operation(execute_payment_query)
-
-    if not payment_data:
-        # Return empty payment data if no payments found
-        return SpptPaymentResponse(
-            KD_PROPINSI=key["KD_PROPINSI"],
-            KD_DATI2=key["KD_DATI2"],
-            KD_KECAMATAN=key["KD_KECAMATAN"],
-            KD_KELURAHAN=key["KD_KELURAHAN"],
-            KD_BLOK=key["KD_BLOK"],
-            NO_URUT=key["NO_URUT"],
-            KD_JNS_OP=key["KD_JNS_OP"],
-            THN_PAJAK_SPPT=year,
-            total_denda=0,
-            total_dibayar=0,
-            tanggal_pembayaran=None
-        )
-
-    return SpptPaymentResponse(
-        KD_PROPINSI=payment_data[0],
-        KD_DATI2=payment_data[1],
-        KD_KECAMATAN=payment_data[2],
-        KD_KELURAHAN=payment_data[3],
-        KD_BLOK=payment_data[4],
-        NO_URUT=payment_data[5],
-        KD_JNS_OP=payment_data[6],
-        THN_PAJAK_SPPT=payment_data[7],
-        total_denda=payment_data[8] or 0,
-        total_dibayar=payment_data[9] or 0,
-        tanggal_pembayaran=payment_data[10]
-    )
+    summary = await retry_db_operation(execute_payment_query)
+    return payment_response(key, year, summary)
 
 
 @router.get("/sppt/batch/{nop}/payment", response_model=List[SpptPaymentResponse])
@@ -426,103 +387,50 @@ async def get_sppt_batch_payment(
     Much faster than calling /sppt/{year}/{nop}/payment multiple times.
     """
     key = parse_nop(nop)
+    ownership = await OwnershipService.resolve(session, current_user.email)
+    if not ownership.owns(key["NOP"]):
+        return []
 
-    # Query to get payment data for all years grouped by year
+    # Semua tahun untuk NOP ini: range scan pada primary key ringkasan
     query = (
-        select(
-            PembayaranSppt.KD_PROPINSI,
-            PembayaranSppt.KD_DATI2,
-            PembayaranSppt.KD_KECAMATAN,
-            PembayaranSppt.KD_KELURAHAN,
-            PembayaranSppt.KD_BLOK,
-            PembayaranSppt.NO_URUT,
-            PembayaranSppt.KD_JNS_OP,
-            PembayaranSppt.THN_PAJAK_SPPT,
-            func.sum(
-                case(
-                    (Sppt.STATUS_PEMBAYARAN_SPPT == 1, PembayaranSppt.DENDA_SPPT),
-                    else_=0
-                )
-            ).label("total_denda"),
-            func.sum(PembayaranSppt.JML_SPPT_YG_DIBAYAR).label("total_dibayar"),
-            func.group_concat(PembayaranSppt.TGL_PEMBAYARAN_SPPT.distinct()).label("tanggal_pembayaran")
-        )
-        .join(
-            Spop,
-            and_(
-                PembayaranSppt.KD_PROPINSI == Spop.KD_PROPINSI,
-                PembayaranSppt.KD_DATI2 == Spop.KD_DATI2,
-                PembayaranSppt.KD_KECAMATAN == Spop.KD_KECAMATAN,
-                PembayaranSppt.KD_KELURAHAN == Spop.KD_KELURAHAN,
-                PembayaranSppt.KD_BLOK == Spop.KD_BLOK,
-                PembayaranSppt.NO_URUT == Spop.NO_URUT,
-                PembayaranSppt.KD_JNS_OP == Spop.KD_JNS_OP,
-            ),
-        )
-        .join(
-            Sppt,
-            and_(
-                PembayaranSppt.KD_PROPINSI == Sppt.KD_PROPINSI,
-                PembayaranSppt.KD_DATI2 == Sppt.KD_DATI2,
-                PembayaranSppt.KD_KECAMATAN == Sppt.KD_KECAMATAN,
-                PembayaranSppt.KD_KELURAHAN == Sppt.KD_KELURAHAN,
-                PembayaranSppt.KD_BLOK == Sppt.KD_BLOK,
-                PembayaranSppt.NO_URUT == Sppt.NO_URUT,
-                PembayaranSppt.KD_JNS_OP == Sppt.KD_JNS_OP,
-                PembayaranSppt.THN_PAJAK_SPPT == Sppt.THN_PAJAK_SPPT,
-            ),
-        )
-        .join(
-            DatSubjekPajak,
-            Spop.SUBJEK_PAJAK_ID == DatSubjekPajak.SUBJEK_PAJAK_ID,
-        )
-        .where(
-            DatSubjekPajak.EMAIL_WP == str(current_user.email),
-            PembayaranSppt.KD_PROPINSI == key["KD_PROPINSI"],
-            PembayaranSppt.KD_DATI2 == key["KD_DATI2"],
-            PembayaranSppt.KD_KECAMATAN == key["KD_KECAMATAN"],
-            PembayaranSppt.KD_KELURAHAN == key["KD_KELURAHAN"],
-            PembayaranSppt.KD_BLOK == key["KD_BLOK"],
-            PembayaranSppt.NO_URUT == key["NO_URUT"],
-            PembayaranSppt.KD_JNS_OP == key["KD_JNS_OP"],
-        )
-        .group_by(
-            PembayaranSppt.KD_PROPINSI,
-            PembayaranSppt.KD_DATI2,
-            PembayaranSppt.KD_KECAMATAN,
-            PembayaranSppt.KD_KELURAHAN,
-            PembayaranSppt.KD_BLOK,
-            PembayaranSppt.NO_URUT,
-            PembayaranSppt.KD_JNS_OP,
-            PembayaranSppt.THN_PAJAK_SPPT,
-        )
-        .order_by(PembayaranSppt.THN_PAJAK_SPPT.desc())
+        select(PembayaranSpptSummary)
+        .where(PembayaranSpptSummary.NOP == key["NOP"])
+        .order_by(PembayaranSpptSummary.THN_PAJAK_SPPT.desc())
     )
 
     async def execute_batch_payment_query():
         result = await session.exec(query)
         return result.all()
 
-    payment_data_list = await retry_db_operation(execute_batch_payment_query)
-
-    # Convert to response format
-    responses = []
-    for payment_data in payment_data_list:
-        responses.append(SpptPaymentResponse(
-            KD_PROPINSI=payment_data[0],
-            KD_DATI2=payment_data[1],
-            KD_KECAMATAN=payment_data[2],
-            KD_KELURAHAN=payment_data[3],
-            KD_BLOK=payment_data[4],
-            NO_URUT=payment_data[5],
-            KD_JNS_OP=payment_data[6],
-            THN_PAJAK_SPPT=payment_data[7],
-            total_denda=payment_data[8] or 0,
-            total_dibayar=payment_data[9] or 0,
-            tanggal_pembayaran=payment_data[10]
-        ))
+    summaries = await retry_db_operation(execute_batch_payment_query)
+    return [payment_response(key, summary.THN_PAJAK_SPPT, summary) for summary in summaries]
 
-    return responses
+
+def object_info_payload(nop: str, data, njop_bumi_total, nm_kecamatan, nm_kelurahan) -> dict:
+    """Response GET /sppt/{nop}/info dari baris spop + dat_subjek_pajak"""
+    # For land: Convert total NJOP back to per-square-meter value
+    njop_bumi = None
+    if njop_bumi_total and data.LUAS_BUMI:
+        njop_bumi = int(njop_bumi_total / data.LUAS_BUMI)
+
+    # Building data not available (table doesn't exist)
+    njop_bangunan = 0
+    luas_bangunan = 0
+
+    return {
+        "nomor_objek_pajak": nop,
+        "nama_wajib_pajak": getattr(data, 'NM_WP', None),
+        "telpon_wajib_pajak": getattr(data, 'TELP_WP', None),
+        "alamat_wajib_pajak": getattr(data, 'JALAN_WP', None),
+        "alamat_objek_pajak": getattr(data, 'JALAN_OP', None),
+        "kecamatan": nm_kecamatan,
+        "kelurahan": nm_kelurahan,
+        "luas_tanah": getattr(data, 'LUAS_BUMI', None),
+        "luas_bangunan": luas_bangunan,
+        "njop_tanah": njop_bumi,
+        "njop_bangunan": njop_bangunan,
+        "total_njop": (njop_bumi or 0) + njop_bangunan,
+    }
 
 
 @router.get("/sppt/{nop}/info")
@@ -570,10 +478,6 @@ async def get_object_info(
             Spop.LUAS_BUMI,
             Spop.NILAI_SISTEM_BUMI,
 
-            # Reference data
-            RefKecamatan.NM_KECAMATAN,
-            RefKelurahan.NM_KELURAHAN,
-
             # NJOP Bumi from latest SPPT (most recent year)
             func.max(Sppt.NJOP_BUMI_SPPT).label("njop_bumi_total"),
         )
@@ -581,43 +485,12 @@ async def get_object_info(
             DatSubjekPajak,
             Spop.SUBJEK_PAJAK_ID == DatSubjekPajak.SUBJEK_PAJAK_ID,
         )
-        .outerjoin(
-            RefKecamatan,
-            and_(
-                Spop.KD_PROPINSI == RefKecamatan.KD_PROPINSI,
-                Spop.KD_DATI2 == RefKecamatan.KD_DATI2,
-                Spop.KD_KECAMATAN == RefKecamatan.KD_KECAMATAN,
-            ),
-        )
-        .outerjoin(
-            RefKelurahan,
-            and_(
-                Spop.KD_PROPINSI == RefKelurahan.KD_PROPINSI,
-                Spop.KD_DATI2 == RefKelurahan.KD_DATI2,
-                Spop.KD_KECAMATAN == RefKelurahan.KD_KECAMATAN,
-                Spop.KD_KELURAHAN == RefKelurahan.KD_KELURAHAN,
-            ),
-        )
         .outerjoin(
             Sppt,
-            and_(
-                Spop.KD_PROPINSI == Sppt.KD_PROPINSI,
-                Spop.KD_DATI2 == Sppt.KD_DATI2,
-                Spop.KD_KECAMATAN == Sppt.KD_KECAMATAN,
-                Spop.KD_KELURAHAN == Sppt.KD_KELURAHAN,
-                Spop.KD_BLOK == Sppt.KD_BLOK,
-                Spop.NO_URUT == Sppt.NO_URUT,
-                Spop.KD_JNS_OP == Sppt.KD_JNS_OP,
-            ),
+            Spop.NOP == Sppt.NOP,
         )
         .where(
-            Spop.KD_PROPINSI == key["KD_PROPINSI"],
-            Spop.KD_DATI2 == key["KD_DATI2"],
-            Spop.KD_KECAMATAN == key["KD_KECAMATAN"],
-            Spop.KD_KELURAHAN == key["KD_KELURAHAN"],
-            Spop.KD_BLOK == key["KD_BLOK"],
-            Spop.NO_URUT == key["NO_URUT"],
-            Spop.KD_JNS_OP == key["KD_JNS_OP"],
+            Spop.NOP == key["NOP"],
         )
         .group_by(
             Spop.KD_PROPINSI,
@@ -633,8 +506,6 @@ async def get_object_info(
             Spop.JALAN_OP,
             Spop.LUAS_BUMI,
             Spop.NILAI_SISTEM_BUMI,
-            RefKecamatan.NM_KECAMATAN,
-            RefKelurahan.NM_KELURAHAN,
         )
     )
     # Force reload
@@ -674,44 +545,140 @@ async def get_object_info(
             "total_njop": 0,
         }
 
-    # Calculate NJOP values
-    # For land: Convert total NJOP back to per-square-meter value
-    njop_bumi = None
-    if hasattr(object_data, 'njop_bumi_total') and object_data.njop_bumi_total and object_data.LUAS_BUMI:
-        njop_bumi = int(object_data.njop_bumi_total / object_data.LUAS_BUMI)
-
-    # Building data not available (table doesn't exist)
-    njop_bangunan = 0
-    luas_bangunan = 0
-
-    print(f"[DEBUG] NOP {nop}: Final returned njop_bangunan={njop_bangunan}")
+    # Nama kecamatan/kelurahan dari pohon referensi di memori (tanpa join)
+    tree = await ReferenceService.get_tree()
+    nm_kecamatan = tree.get_name(
+        object_data.KD_PROPINSI, object_data.KD_DATI2, object_data.KD_KECAMATAN
+    )
+    nm_kelurahan = tree.get_name(
+        object_data.KD_PROPINSI, object_data.KD_DATI2,
+        object_data.KD_KECAMATAN, object_data.KD_KELURAHAN,
+    )
 
     # Debug: Print actual object data fields
     print(f"[DEBUG] Object data fields: NM_WP={getattr(object_data, 'NM_WP', 'NOT_FOUND')}")
     print(f"[DEBUG] Object data fields: TELP_WP={getattr(object_data, 'TELP_WP', 'NOT_FOUND')}")
     print(f"[DEBUG] Object data fields: JALAN_WP={getattr(object_data, 'JALAN_WP', 'NOT_FOUND')}")
     print(f"[DEBUG] Object data fields: JALAN_OP={getattr(object_data, 'JALAN_OP', 'NOT_FOUND')}")
-    print(f"[DEBUG] Object data fields: NM_KECAMATAN={getattr(object_data, 'NM_KECAMATAN', 'NOT_FOUND')}")
-    print(f"[DEBUG] Object data fields: NM_KELURAHAN={getattr(object_data, 'NM_KELURAHAN', 'NOT_FOUND')}")
+    print(f"[DEBUG] Object data fields: NM_KECAMATAN={nm_kecamatan}")
+    print(f"[DEBUG] Object data fields: NM_KELURAHAN={nm_kelurahan}")
     print(f"[DEBUG] Object data fields: LUAS_BUMI={getattr(object_data, 'LUAS_BUMI', 'NOT_FOUND')}")
     print(f"[DEBUG] Object data fields: NILAI_SISTEM_BUMI={getattr(object_data, 'NILAI_SISTEM_BUMI', 'NOT_FOUND')}")
     print(f"[DEBUG] Object data fields: njop_bumi_total={getattr(object_data, 'njop_bumi_total', 'NOT_FOUND')}")
 
     # Return actual object information
-    return {
-        "nomor_objek_pajak": nop,
-        "nama_wajib_pajak": getattr(object_data, 'NM_WP', None),
-        "telpon_wajib_pajak": getattr(object_data, 'TELP_WP', None),
-        "alamat_wajib_pajak": getattr(object_data, 'JALAN_WP', None),
-        "alamat_objek_pajak": getattr(object_data, 'JALAN_OP', None),
-        "kecamatan": getattr(object_data, 'NM_KECAMATAN', None),
-        "kelurahan": getattr(object_data, 'NM_KELURAHAN', None),
-        "luas_tanah": getattr(object_data, 'LUAS_BUMI', None),
-        "luas_bangunan": luas_bangunan,
-        "njop_tanah": njop_bumi,
-        "njop_bangunan": njop_bangunan,
-        "total_njop": (njop_bumi or 0) + njop_bangunan,
-    }
+    return object_info_payload(
+        nop, object_data, getattr(object_data, 'njop_bumi_total', None), nm_kecamatan, nm_kelurahan
+    )
+
+
+async def _object_row(session: AsyncSession, nop: str):
+    """Baris spop + dat_subjek_pajak untuk NOP"""
+    result = await session.exec(
+        select(
+            Spop.KD_PROPINSI,
+            Spop.KD_DATI2,
+            Spop.KD_KECAMATAN,
+            Spop.KD_KELURAHAN,
+            DatSubjekPajak.NM_WP,
+            DatSubjekPajak.TELP_WP,
+            DatSubjekPajak.JALAN_WP,
+            Spop.JALAN_OP,
+            Spop.LUAS_BUMI,
+            Spop.NILAI_SISTEM_BUMI,
+        )
+        .outerjoin(
+            DatSubjekPajak,
+            Spop.SUBJEK_PAJAK_ID == DatSubjekPajak.SUBJEK_PAJAK_ID,
+        )
+        .where(Spop.NOP == nop)
+    )
+    return result.first()
+
+
+async def _sppt_rows(session: AsyncSession, nop: str) -> list:
+    """(Sppt, ringkasan pembayaran atau None) semua tahun, terbaru dulu"""
+    result = await session.exec(
+        select(Sppt, PembayaranSpptSummary)
+        .outerjoin(
+            PembayaranSpptSummary,
+            and_(
+                PembayaranSpptSummary.NOP == Sppt.NOP,
+                PembayaranSpptSummary.THN_PAJAK_SPPT == Sppt.THN_PAJAK_SPPT,
+            ),
+        )
+        .where(Sppt.NOP == nop)
+        .order_by(Sppt.THN_PAJAK_SPPT.desc())
+    )
+    return result.all()
+
+
+@router.get("/sppt/{nop}/overview", response_model=ObjectOverviewResponse)
+async def get_object_overview(
+    nop: str,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(service.get_current_user),
+):
+    """
+    Info objek, SPPT semua tahun dan ringkasan pembayaran per tahun dalam satu request.
+    Menggantikan /sppt/years + /sppt/{nop}/info + /sppt/batch/{nop} + /sppt/batch/{nop}/payment.
+
+    Kepemilikan objek dicek sekali (cache kepemilikan), lalu query info objek dan
+    query SPPT + ringkasan pembayaran berjalan bersamaan, masing-masing di koneksi sendiri.
+    """
+    key = parse_nop(nop)
+    ownership = await OwnershipService.resolve(session, current_user.email)
+    if not ownership.owns(key["NOP"]):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Objek pajak tidak ditemukan",
+        )
+    # Koneksi session request dilepas sebelum fan-out ke pool
+    await session.close()
+
+    async def execute_overview_queries():
+        return await run_concurrently(
+            (_object_row, key["NOP"]),
+            (_sppt_rows, key["NOP"]),
+        )
+
+    object_row, sppt_rows = await retry_db_operation(execute_overview_queries)
+
+    if object_row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Objek pajak tidak ditemukan",
+        )
+
+    tree = await ReferenceService.get_tree()
+    object_info = object_info_payload(
+        nop,
+        object_row,
+        # NJOP bumi dari SPPT (nilai terbesar), sama dengan /sppt/{nop}/info
+        max((s.NJOP_BUMI_SPPT for s, _ in sppt_rows if s.NJOP_BUMI_SPPT is not None), default=None),
+        tree.get_name(object_row.KD_PROPINSI, object_row.KD_DATI2, object_row.KD_KECAMATAN),
+        tree.get_name(
+            object_row.KD_PROPINSI, object_row.KD_DATI2,
+            object_row.KD_KECAMATAN, object_row.KD_KELURAHAN,
+        ),
+    )
+
+    sppt_list = []
+    for sppt, summary in sppt_rows:
+        sppt_list.append(SpptYearOverviewResponse(
+            **sppt.model_dump(),
+            total_denda=summary.TOTAL_DENDA if summary else 0,
+            total_dibayar=summary.TOTAL_DIBAYAR if summary else 0,
+            tanggal_pembayaran=summary.TANGGAL_PEMBAYARAN if summary else None,
+        ))
+
+    return ObjectOverviewResponse(
+        object_info=object_info,
+        available_years=[
+            SpptYearResponse(THN_PAJAK_SPPT=sppt.THN_PAJAK_SPPT, count=1) for sppt, _ in sppt_rows
+        ],
+        sppt=sppt_list,
+    )
 
 
 @router.get(
@@ -734,15 +701,7 @@ async def get_sppt_detail(
         select(Sppt)
         .join(
             Spop,
-            and_(
-                Sppt.KD_PROPINSI == Spop.KD_PROPINSI,
-                Sppt.KD_DATI2 == Spop.KD_DATI2,
-                Sppt.KD_KECAMATAN == Spop.KD_KECAMATAN,
-                Sppt.KD_KELURAHAN == Spop.KD_KELURAHAN,
-                Sppt.KD_BLOK == Spop.KD_BLOK,
-                Sppt.NO_URUT == Spop.NO_URUT,
-                Sppt.KD_JNS_OP == Spop.KD_JNS_OP,
-            ),
+            Sppt.NOP == Spop.NOP,
         )
         .join(
             DatSubjekPajak,
@@ -751,13 +710,7 @@ async def get_sppt_detail(
         .where(
             DatSubjekPajak.EMAIL_WP == str(current_user.email),
             Sppt.THN_PAJAK_SPPT == year,
-            Sppt.KD_PROPINSI == key["KD_PROPINSI"],
-            Sppt.KD_DATI2 == key["KD_DATI2"],
-            Sppt.KD_KECAMATAN == key["KD_KECAMATAN"],
-            Sppt.KD_KELURAHAN == key["KD_KELURAHAN"],
-            Sppt.KD_BLOK == key["KD_BLOK"],
-            Sppt.NO_URUT == key["NO_URUT"],
-            Sppt.KD_JNS_OP == key["KD_JNS_OP"],
+            Sppt.NOP == key["NOP"],
         )
     )
     # Add retry logic for complex database queries
@@ -774,13 +727,7 @@ async def get_sppt_detail(
             select(Sppt)
             .where(
                 Sppt.THN_PAJAK_SPPT == year,
-                Sppt.KD_PROPINSI == key["KD_PROPINSI"],
-                Sppt.KD_DATI2 == key["KD_DATI2"],
-                Sppt.KD_KECAMATAN == key["KD_KECAMATAN"],
-                Sppt.KD_KELURAHAN == key["KD_KELURAHAN"],
-                Sppt.KD_BLOK == key["KD_BLOK"],
-                Sppt.NO_URUT == key["NO_URUT"],
-                Sppt.KD_JNS_OP == key["KD_JNS_OP"],
+                Sppt.NOP == key["NOP"],
             )
         )
 
@@ -806,73 +753,30 @@ async def get_sppt_with_payments_by_nop(
 ):
     """
     Get all SPPT data with payment information in one optimized query.
-    Returns SPPT LEFT JOIN pembayaran_sppt for a specific NOP.
+    Returns SPPT LEFT JOIN pembayaran_sppt_summary for a specific NOP.
     This is much faster than making separate calls.
     """
     key = parse_nop(nop)
+    ownership = await OwnershipService.resolve(session, current_user.email)
+    if not ownership.owns(key["NOP"]):
+        return []
 
-    # Single query with LEFT JOIN to get SPPT and payment data together
+    # SPPT LEFT JOIN ringkasan pembayaran (per NOP + tahun), tanpa GROUP BY
     query = (
         select(
             Sppt,
-            func.sum(
-                case(
-                    (Sppt.STATUS_PEMBAYARAN_SPPT == 1, PembayaranSppt.DENDA_SPPT),
-                    else_=0
-                )
-            ).label("total_denda"),
-            func.sum(PembayaranSppt.JML_SPPT_YG_DIBAYAR).label("total_dibayar"),
-            func.group_concat(PembayaranSppt.TGL_PEMBAYARAN_SPPT.distinct()).label("tanggal_pembayaran")
-        )
-        .join(
-            Spop,
-            and_(
-                Sppt.KD_PROPINSI == Spop.KD_PROPINSI,
-                Sppt.KD_DATI2 == Spop.KD_DATI2,
-                Sppt.KD_KECAMATAN == Spop.KD_KECAMATAN,
-                Sppt.KD_KELURAHAN == Spop.KD_KELURAHAN,
-                Sppt.KD_BLOK == Spop.KD_BLOK,
-                Sppt.NO_URUT == Spop.NO_URUT,
-                Sppt.KD_JNS_OP == Spop.KD_JNS_OP,
-            ),
-        )
-        .join(
-            DatSubjekPajak,
-            Spop.SUBJEK_PAJAK_ID == DatSubjekPajak.SUBJEK_PAJAK_ID,
+            PembayaranSpptSummary.TOTAL_DENDA,
+            PembayaranSpptSummary.TOTAL_DIBAYAR,
+            PembayaranSpptSummary.TANGGAL_PEMBAYARAN,
         )
         .outerjoin(
-            PembayaranSppt,
+            PembayaranSpptSummary,
             and_(
-                Sppt.KD_PROPINSI == PembayaranSppt.KD_PROPINSI,
-                Sppt.KD_DATI2 == PembayaranSppt.KD_DATI2,
-                Sppt.KD_KECAMATAN == PembayaranSppt.KD_KECAMATAN,
-                Sppt.KD_KELURAHAN == PembayaranSppt.KD_KELURAHAN,
-                Sppt.KD_BLOK == PembayaranSppt.KD_BLOK,
-                Sppt.NO_URUT == PembayaranSppt.NO_URUT,
-                Sppt.KD_JNS_OP == PembayaranSppt.KD_JNS_OP,
-                Sppt.THN_PAJAK_SPPT == PembayaranSppt.THN_PAJAK_SPPT,
+                Sppt.NOP == PembayaranSpptSummary.NOP,
+                Sppt.THN_PAJAK_SPPT == PembayaranSpptSummary.THN_PAJAK_SPPT,
             ),
         )
-        .where(
-            DatSubjekPajak.EMAIL_WP == str(current_user.email),
-            Sppt.KD_PROPINSI == key["KD_PROPINSI"],
-            Sppt.KD_DATI2 == key["KD_DATI2"],
-            Sppt.KD_KECAMATAN == key["KD_KECAMATAN"],
-            Sppt.KD_KELURAHAN == key["KD_KELURAHAN"],
-            Sppt.KD_BLOK == key["KD_BLOK"],
-            Sppt.NO_URUT == key["NO_URUT"],
-            Sppt.KD_JNS_OP == key["KD_JNS_OP"],
-        )
-        .group_by(
-            Sppt.KD_PROPINSI,
-            Sppt.KD_DATI2,
-            Sppt.KD_KECAMATAN,
-            Sppt.KD_KELURAHAN,
-            Sppt.KD_BLOK,
-            Sppt.NO_URUT,
-            Sppt.KD_JNS_OP,
-            Sppt.THN_PAJAK_SPPT,
-        )
+        .where(Sppt.NOP == key["NOP"])
         .order_by(Sppt.THN_PAJAK_SPPT.desc())
     )
 
@@ -903,38 +807,18 @@ async def get_sppt_batch_by_nop(
     """
     Get all SPPT data for all available years for a specific NOP in one request.
     Much faster than multiple individual requests.
+
+    Hanya objek milik user (cache kepemilikan); admin boleh melihat semua NOP.
     """
     key = parse_nop(nop)
+    if not current_user.is_admin:
+        ownership = await OwnershipService.resolve(session, current_user.email)
+        if not ownership.owns(key["NOP"]):
+            return []
 
-    # Get all SPPT records for this NOP with joins for access control
     query = (
         select(Sppt)
-        .join(
-            Spop,
-            and_(
-                Sppt.KD_PROPINSI == Spop.KD_PROPINSI,
-                Sppt.KD_DATI2 == Spop.KD_DATI2,
-                Sppt.KD_KECAMATAN == Spop.KD_KECAMATAN,
-                Sppt.KD_KELURAHAN == Spop.KD_KELURAHAN,
-                Sppt.KD_BLOK == Spop.KD_BLOK,
-                Sppt.NO_URUT == Spop.NO_URUT,
-                Sppt.KD_JNS_OP == Spop.KD_JNS_OP,
-            ),
-        )
-        .join(
-            DatSubjekPajak,
-            Spop.SUBJEK_PAJAK_ID == DatSubjekPajak.SUBJEK_PAJAK_ID,
-        )
-        .where(
-            DatSubjekPajak.EMAIL_WP == str(current_user.email),
-            Sppt.KD_PROPINSI == key["KD_PROPINSI"],
-            Sppt.KD_DATI2 == key["KD_DATI2"],
-            Sppt.KD_KECAMATAN == key["KD_KECAMATAN"],
-            Sppt.KD_KELURAHAN == key["KD_KELURAHAN"],
-            Sppt.KD_BLOK == key["KD_BLOK"],
-            Sppt.NO_URUT == key["NO_URUT"],
-            Sppt.KD_JNS_OP == key["KD_JNS_OP"],
-        )
+        .where(Sppt.NOP == key["NOP"])
         .order_by(Sppt.THN_PAJAK_SPPT.desc())
     )
 
@@ -945,24 +829,6 @@ async def get_sppt_batch_by_nop(
 
     sppts = await retry_db_operation(execute_batch_query)
 
-    if not sppts:
-        # Try direct query for older years without joins
-        direct_query = select(Sppt).where(
-            Sppt.KD_PROPINSI == key["KD_PROPINSI"],
-            Sppt.KD_DATI2 == key["KD_DATI2"],
-            Sppt.KD_KECAMATAN == key["KD_KECAMATAN"],
-            Sppt.KD_KELURAHAN == key["KD_KELURAHAN"],
-            Sppt.KD_BLOK == key["KD_BLOK"],
-            Sppt.NO_URUT == key["NO_URUT"],
-            Sppt.KD_JNS_OP == key["KD_JNS_OP"],
-        ).order_by(Sppt.THN_PAJAK_SPPT.desc())
-
-        async def execute_direct_batch_query():
-            result = await session.exec(direct_query)
-            return result.all()
-
-        sppts = await retry_db_operation(execute_direct_batch_query)
-
     return sppts
 
 
@@ -1035,17 +901,51 @@ async def get_sppt_batch_by_nop(
 #     }
 
 
-def normalize_mysql5(col):
-    chars_to_strip = [" ", "/", "\\", "-", "_", ".", ","]
-    for ch in chars_to_strip:
-        col = func.replace(col, ch, "")
-    return func.lower(col)
-
-
 def normalize(val: str) -> str:
+    """Sama dengan generated column DatSubjekPajak.NM_WP_NORMAL"""
     return re.sub(r"[ \\/\-_,.]", "", val.lower())
 
 
+def name_prefix_pattern(val: str) -> str:
+    """
+    Pola LIKE 'xxx%' untuk NM_WP_NORMAL. Pola konstan (bukan CONCAT) agar
+    MySQL memakai range scan di index; '_' dan '\\' sudah dibuang normalize().
+    """
+    return normalize(val).replace("%", "\\%") + "%"
+
+
+async def name_search_condition(session: AsyncSession, query, search: str):
+    """
+    Kondisi nama WP: prefix NM_WP_NORMAL dulu (range scan di index), jika tidak
+    ada hasil pada query baru substring '%xxx%' agar nama tengah/belakang
+    (mis. "wayan" pada "I Wayan ...") tetap ditemukan
+    """
+    prefix = name_prefix_pattern(search)
+    prefix_condition = DatSubjekPajak.NM_WP_NORMAL.like(prefix)
+    found = await session.scalar(
+        select(literal(1)).select_from(query.where(prefix_condition).limit(1).subquery())
+    )
+    if found:
+        return prefix_condition
+    return DatSubjekPajak.NM_WP_NORMAL.like("%" + prefix)
+
+
+async def name_search_match(
+    session: AsyncSession, query, search: str, subjek_pajak_ids=None
+) -> ListMatch:
+    """
+    Pencarian nama WP untuk list SPOP: LIKE pada NM_WP_NORMAL ditambah kandidat
+    typo-tolerant dari index trigram, dengan rank relevansi
+    """
+    return SearchService.list_match(
+        search,
+        Spop.NOP,
+        fields=["nm_wp"],
+        contains=[await name_search_condition(session, query, search)],
+        subjek_pajak_ids=subjek_pajak_ids,
+    )
+
+
 # ============================================
 # SPOP Admin Endpoints (Create, Read, Update)
 # ============================================
@@ -1059,119 +959,93 @@ async def get_spop_list(
     per_page: int = Query(10, ge=1, le=100),
     sort_by: Optional[Literal["NOP", "NM_WP", "LUAS_BUMI"]] = Query("NOP"),
     sort_order: Optional[Literal["asc", "desc"]] = Query("asc"),
+    cursor: Optional[str] = Query(None, description="meta.next_cursor dari halaman sebelumnya (mengabaikan page)"),
+    with_total: bool = Query(True, description="Hitung total data (COUNT); matikan untuk paging cepat"),
 ):
     """
     List all SPOP dengan info Nama WP dan Status Pembayaran.
     Menampilkan: NOP, Nama Wajib Pajak, Status Pembayaran
+
+    Mendukung keyset pagination: kirim meta.next_cursor sebagai `cursor`
+    untuk halaman berikutnya. Biaya konstan di halaman berapa pun hanya untuk
+    urutan NOP dan LUAS_BUMI (seek di index spop); NM_WP berasal dari tabel
+    join sehingga MySQL tetap mengurutkan (filesort) meski tanpa OFFSET.
     """
     
-    # Subquery untuk ambil SPPT tahun terbaru per NOP
-    latest_sppt_subquery = (
-        select(
-            Sppt.KD_PROPINSI,
-            Sppt.KD_DATI2,
-            Sppt.KD_KECAMATAN,
-            Sppt.KD_KELURAHAN,
-            Sppt.KD_BLOK,
-            Sppt.NO_URUT,
-            Sppt.KD_JNS_OP,
-            Sppt.THN_PAJAK_SPPT,
-            Sppt.STATUS_PEMBAYARAN_SPPT,
-            func.row_number()
-            .over(
-                partition_by=[
-                    Sppt.KD_PROPINSI,
-                    Sppt.KD_DATI2,
-                    Sppt.KD_KECAMATAN,
-                    Sppt.KD_KELURAHAN,
-                    Sppt.KD_BLOK,
-                    Sppt.NO_URUT,
-                    Sppt.KD_JNS_OP,
-                ],
-                order_by=Sppt.THN_PAJAK_SPPT.desc(),
-            )
-            .label("rn"),
-        )
-        .subquery()
-    )
-    
-    # Main query dengan join ke dat_subjek_pajak dan latest_sppt
+    # Main query dengan join ke dat_subjek_pajak dan sppt_latest
+    # (SPPT tahun terbaru per NOP, dijaga trigger; lihat app/models/sppt_latest.py)
     query = (
         select(
             Spop,
             DatSubjekPajak.NM_WP,
-            latest_sppt_subquery.c.STATUS_PEMBAYARAN_SPPT,
-            latest_sppt_subquery.c.THN_PAJAK_SPPT,
+            SpptLatest.STATUS_PEMBAYARAN_SPPT,
+            SpptLatest.THN_PAJAK_SPPT,
+            SpptLatest.TGL_PEMBAYARAN_TERAKHIR,
         )
         .outerjoin(
             DatSubjekPajak,
             Spop.SUBJEK_PAJAK_ID == DatSubjekPajak.SUBJEK_PAJAK_ID,
         )
         .outerjoin(
-            latest_sppt_subquery,
-            and_(
-                Spop.KD_PROPINSI == latest_sppt_subquery.c.KD_PROPINSI,
-                Spop.KD_DATI2 == latest_sppt_subquery.c.KD_DATI2,
-                Spop.KD_KECAMATAN == latest_sppt_subquery.c.KD_KECAMATAN,
-                Spop.KD_KELURAHAN == latest_sppt_subquery.c.KD_KELURAHAN,
-                Spop.KD_BLOK == latest_sppt_subquery.c.KD_BLOK,
-                Spop.NO_URUT == latest_sppt_subquery.c.NO_URUT,
-                Spop.KD_JNS_OP == latest_sppt_subquery.c.KD_JNS_OP,
-                latest_sppt_subquery.c.rn == 1,
-            ),
+            SpptLatest,
+            Spop.NOP == SpptLatest.NOP,
         )
     )
     
     # Apply search
+    match = None
     if search:
         # Search bisa untuk NOP atau Nama WP
         if search.isdigit() and len(search) <= 18:
-            # Search by NOP
-            nop_pattern = f"{search}%"
-            nop_concat = func.concat(
-                Spop.KD_PROPINSI,
-                Spop.KD_DATI2,
-                Spop.KD_KECAMATAN,
-                Spop.KD_KELURAHAN,
-                Spop.KD_BLOK,
-                Spop.NO_URUT,
-                Spop.KD_JNS_OP,
-            )
-            query = query.where(nop_concat.like(nop_pattern))
+            # Search by NOP (prefix pada kolom NOP ter-index)
+            query = query.where(Spop.NOP.like(f"{search}%"))
         else:
-            # Search by Nama WP
-            normalized_search = f"%{normalize(search)}%"
-            query = query.where(
-                normalize_mysql5(DatSubjekPajak.NM_WP).like(normalized_search)
-            )
+            # Search by Nama WP (LIKE NM_WP_NORMAL + kandidat fuzzy index trigram)
+            match = await name_search_match(session, query, search)
+            query = query.where(match.condition)
     
-    # Sorting
-    if sort_by == "NOP":
-        query = query.order_by(
-            Spop.KD_PROPINSI.asc() if sort_order == "asc" else Spop.KD_PROPINSI.desc(),
-            Spop.KD_DATI2.asc() if sort_order == "asc" else Spop.KD_DATI2.desc(),
-        )
+    # Total count
+    total = None
+    if with_total:
+        total_query = select(func.count()).select_from(query.subquery())
+        total_result = await session.exec(total_query)
+        total = total_result.one() or 0
+    
+    # Sorting: kolom urut + NOP sebagai penentu urutan unik untuk keyset
+    descending = sort_order == "desc"
+    if sort_by == "NOP" and match is not None:
+        # Urutan default saat mencari nama: paling relevan dulu (rank dinegasikan)
+        query = query.add_columns(match.rank.label("search_rank"))
+        sort_columns = [-match.rank]
+        sort_values = [lambda row: -row.search_rank]
     elif sort_by == "NM_WP":
-        query = query.order_by(
-            DatSubjekPajak.NM_WP.asc() if sort_order == "asc" else DatSubjekPajak.NM_WP.desc()
-        )
+        # Kolom mentah (bukan COALESCE); NULL ditangani keyset_condition
+        sort_columns = [DatSubjekPajak.NM_WP]
+        sort_values = [lambda row: row[1]]
     elif sort_by == "LUAS_BUMI":
-        query = query.order_by(
-            Spop.LUAS_BUMI.asc() if sort_order == "asc" else Spop.LUAS_BUMI.desc()
-        )
-    
-    # Total count
-    total_query = select(func.count()).select_from(query.subquery())
-    total_result = await session.exec(total_query)
-    total = total_result.one() or 0
+        sort_columns = [Spop.LUAS_BUMI]
+        sort_values = [lambda row: row[0].LUAS_BUMI]
+    else:
+        sort_columns, sort_values = [], []
+    sort_columns += SPOP_NOP_COLUMNS
+    query = query.order_by(*keyset_order(sort_columns, descending))
     
-    # Pagination
-    result = await session.exec(query.offset((page - 1) * per_page).limit(per_page))
-    items = result.all()
+    # Pagination: seek dari cursor jika ada, selain itu OFFSET biasa
+    if cursor:
+        values = decode_cursor(cursor, len(sort_columns))
+        query = query.where(keyset_condition(sort_columns, values, descending))
+    else:
+        query = query.offset((page - 1) * per_page)
+    result = await session.exec(query.limit(per_page + 1))
+    items, next_cursor = keyset_page(
+        result.all(),
+        per_page,
+        lambda row: [value(row) for value in sort_values] + spop_nop_values(row[0]),
+    )
     
     # Build response
     data_list = []
-    for spop, nm_wp, status_bayar, thn_pajak in items:
+    for spop, nm_wp, status_bayar, thn_pajak, tgl_bayar, *_ in items:
         # Buat NOP 18 digit
         nop = f"{spop.KD_PROPINSI}{spop.KD_DATI2}{spop.KD_KECAMATAN}{spop.KD_KELURAHAN}{spop.KD_BLOK}{spop.NO_URUT}{spop.KD_JNS_OP}"
         
@@ -1188,6 +1062,7 @@ async def get_spop_list(
                 NM_WP=nm_wp,
                 STATUS_PEMBAYARAN_SPPT=status_bayar,
                 THN_PAJAK_SPPT=thn_pajak,
+                TGL_PEMBAYARAN_TERAKHIR=tgl_bayar,
                 JALAN_OP=spop.JALAN_OP,
                 KELURAHAN_OP=spop.KELURAHAN_OP,
                 LUAS_BUMI=spop.LUAS_BUMI,
@@ -1200,7 +1075,9 @@ async def get_spop_list(
             page=page,
             per_page=per_page,
             total=total,
-            total_pages=(total + per_page - 1) // per_page,
+            total_pages=(total + per_page - 1) // per_page if total is not None else None,
+            next_cursor=next_cursor,
+            search_truncated=match is not None and match.truncated,
         ),
     )
 
@@ -1223,13 +1100,7 @@ async def get_spop_detail(
             Spop.SUBJEK_PAJAK_ID == DatSubjekPajak.SUBJEK_PAJAK_ID,
         )
         .where(
-            Spop.KD_PROPINSI == key["KD_PROPINSI"],
-            Spop.KD_DATI2 == key["KD_DATI2"],
-            Spop.KD_KECAMATAN == key["KD_KECAMATAN"],
-            Spop.KD_KELURAHAN == key["KD_KELURAHAN"],
-            Spop.KD_BLOK == key["KD_BLOK"],
-            Spop.NO_URUT == key["NO_URUT"],
-            Spop.KD_JNS_OP == key["KD_JNS_OP"],
+            Spop.NOP == key["NOP"],
         )
     )
     
@@ -1302,6 +1173,10 @@ async def create_spop(
             detail=f"Error creating SPOP: {str(e)}",
         )
     
+    await SearchService.index_spop(session, new_spop)
+    # Pemilik objek bisa bertambah/berubah: cache kepemilikan dihitung ulang
+    OwnershipService.invalidate()
+    
     # Build NOP
     nop = f"{new_spop.KD_PROPINSI}{new_spop.KD_DATI2}{new_spop.KD_KECAMATAN}{new_spop.KD_KELURAHAN}{new_spop.KD_BLOK}{new_spop.NO_URUT}{new_spop.KD_JNS_OP}"
     
@@ -1327,13 +1202,7 @@ async def update_spop(
     
     # Find existing SPOP
     query = select(Spop).where(
-        Spop.KD_PROPINSI == key["KD_PROPINSI"],
-        Spop.KD_DATI2 == key["KD_DATI2"],
-        Spop.KD_KECAMATAN == key["KD_KECAMATAN"],
-        Spop.KD_KELURAHAN == key["KD_KELURAHAN"],
-        Spop.KD_BLOK == key["KD_BLOK"],
-        Spop.NO_URUT == key["NO_URUT"],
-        Spop.KD_JNS_OP == key["KD_JNS_OP"],
+        Spop.NOP == key["NOP"],
     )
     
     result = await session.exec(query)
@@ -1358,6 +1227,10 @@ async def update_spop(
             detail=f"Error updating SPOP: {str(e)}",
         )
     
+    await SearchService.index_spop(session, existing_spop)
+    # Pemilik objek bisa bertambah/berubah: cache kepemilikan dihitung ulang
+    OwnershipService.invalidate()
+    
     return {
         "message": "SPOP updated successfully",
         "nop": nop,
@@ -1,6 +1,6 @@
 from sqlmodel import SQLModel, inspect
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import date, datetime
 
 
@@ -66,8 +66,11 @@ class SpopResponse(SQLModel):
 class PaginationMeta(SQLModel):
     page: int
     per_page: int
-    total: int
-    total_pages: int
+    total: Optional[int] = None  # None jika with_total=false
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # None jika sudah halaman terakhir
+    # True jika kandidat pencarian fuzzy terpotong (total/paging tidak lengkap)
+    search_truncated: bool = False
 
 
 class SpopPaginatedResponse(SQLModel):
@@ -179,6 +182,20 @@ class ObjectInfoResponse(SQLModel):
     njop_bangunan: Optional[int] = None
 
 
+class SpptYearOverviewResponse(SpptResponse):
+    """SPPT satu tahun beserta ringkasan pembayarannya"""
+    total_denda: int = 0
+    total_dibayar: int = 0
+    tanggal_pembayaran: Optional[str] = None  # GROUP_CONCAT result as string
+
+
+class ObjectOverviewResponse(SQLModel):
+    """Semua data satu objek untuk halaman wajib pajak dalam satu response"""
+    object_info: Dict[str, Any]  # sama dengan GET /sppt/{nop}/info
+    available_years: List[SpptYearResponse]
+    sppt: List[SpptYearOverviewResponse]  # terbaru dulu
+
+
 # ============================================
 # SPOP Schemas untuk Admin
 # ============================================
@@ -200,9 +217,10 @@ class SpopListResponse(SQLModel):
     # Nama Wajib Pajak (dari dat_subjek_pajak)
     NM_WP: Optional[str] = None
     
-    # Status Pembayaran (dari sppt tahun terbaru)
+    # Status Pembayaran (dari sppt tahun terbaru, tabel sppt_latest)
     STATUS_PEMBAYARAN_SPPT: Optional[bool] = None
     THN_PAJAK_SPPT: Optional[str] = None
+    TGL_PEMBAYARAN_TERAKHIR: Optional[date] = None
     
     # Info tambahan untuk display
     JALAN_OP: Optional[str] = None
@@ -0,0 +1,136 @@
+"""
+Impor file pembayaran harian bank ke pembayaran_sppt
+
+Contoh:
+    python -m commands.ingest_payments settlement_20261018.csv --nip 123456789
+    python -m commands.ingest_payments BPD_20261018.txt --format fixed \\
+        --layout NOP:18,THN_PAJAK_SPPT:4,TGL_PEMBAYARAN_SPPT:8,JML_SPPT_YG_DIBAYAR:15 \\
+        --nip 123456789 --kd-bank-persepsi 01
+
+CSV wajib punya header dengan nama kolom pembayaran_sppt (NOP,
+THN_PAJAK_SPPT, TGL_PEMBAYARAN_SPPT, JML_SPPT_YG_DIBAYAR, opsional
+DENDA_SPPT, NO_BUKTI, PEMBAYARAN_SPPT_KE dan kode bank). File tanpa
+kolom wajib ditolak seluruhnya.
+
+Impor ulang file yang sama aman: pembayaran yang NO_BUKTI-nya sudah ada,
+atau (tanpa NO_BUKTI) dengan NOP, tahun, tanggal, jumlah dan kode bank yang
+sama dengan pembayaran yang sudah ada, dilewati sebagai duplikat.
+
+Setelah ada pembayaran yang masuk (bukan --dry-run), cache dashboard
+dikosongkan jika CACHE_BACKEND=redis; dengan cache memory, kosongkan lewat
+POST /dashboard/cache/invalidate di API.
+"""
+import argparse
+import asyncio
+import sys
+
+from app.core.config import settings
+from app.core.database import engine
+from app.dashboard.service import dashboard_cache
+from app.sppt.ingest import (
+    BANK_COLUMNS,
+    FIXED_WIDTH_LAYOUT,
+    IngestStats,
+    PaymentIngestService,
+    parse_layout,
+    read_csv,
+    read_fixed_width,
+)
+
+
+def print_progress(stats: IngestStats) -> None:
+    print(
+        f"[INGEST] {stats.rows_read} baris | {stats.inserted} masuk | "
+        f"{stats.duplicates} duplikat | {stats.rejected} ditolak | "
+        f"{stats.rows_per_second:.0f} baris/detik",
+        flush=True,
+    )
+
+
+async def ingest_file(args: argparse.Namespace) -> IngestStats:
+    file_format = args.format or ("csv" if args.path.lower().endswith(".csv") else "fixed")
+    bank_defaults = {name: getattr(args, name.lower()) for name in BANK_COLUMNS}
+
+    with open(args.path, encoding=args.encoding, newline="") as f:
+        if file_format == "csv":
+            rows = read_csv(f, delimiter=args.delimiter)
+        else:
+            layout = parse_layout(args.layout) if args.layout else FIXED_WIDTH_LAYOUT
+            rows = read_fixed_width(f, layout)
+
+        # Engine aplikasi memakai autocommit; isolation level eksplisit
+        # mematikannya di koneksi ini sehingga setiap chunk satu transaksi
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="READ COMMITTED")
+            stats = await PaymentIngestService.ingest(
+                conn,
+                rows,
+                nip_rekam=args.nip,
+                bank_defaults=bank_defaults,
+                chunk_size=args.chunk_size,
+                dry_run=args.dry_run,
+                on_progress=print_progress,
+            )
+
+    if stats.inserted and not args.dry_run:
+        await invalidate_dashboard_cache()
+    return stats
+
+
+async def invalidate_dashboard_cache() -> None:
+    """Kosongkan cache dashboard setelah pembayaran masuk (rollup sudah diperbarui trigger)"""
+    if settings.CACHE_BACKEND != "redis":
+        # Cache memory hidup di proses API, tidak terjangkau dari command ini
+        print(
+            "[INGEST] Cache dashboard per proses (CACHE_BACKEND=memory): panggil "
+            "POST /dashboard/cache/invalidate di API agar angka terbaru langsung tampil"
+        )
+        return
+
+    await dashboard_cache.invalidate()
+    print("[INGEST] Cache dashboard dikosongkan")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Impor file pembayaran bank ke pembayaran_sppt")
+    parser.add_argument("path", help="File CSV atau fixed-width")
+    parser.add_argument("--format", choices=["csv", "fixed"], help="Default dari ekstensi file (.csv = csv)")
+    parser.add_argument("--delimiter", default=",", help="Pemisah kolom CSV")
+    parser.add_argument("--layout", help="Layout fixed-width, mis. NOP:18,THN_PAJAK_SPPT:4,...")
+    parser.add_argument("--encoding", default="utf-8-sig")
+    parser.add_argument("--nip", required=True, help="NIP_REKAM_BYR_SPPT (maks. 9 karakter)")
+    parser.add_argument("--chunk-size", type=int, default=settings.PAYMENT_INGEST_CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Validasi saja, semua chunk di-rollback")
+    for name in BANK_COLUMNS:
+        parser.add_argument(
+            f"--{name.lower().replace('_', '-')}", dest=name.lower(), default="00",
+            help=f"Default {name} jika tidak ada di file",
+        )
+    args = parser.parse_args()
+
+    if len(args.nip) > 9:
+        parser.error("--nip maksimal 9 karakter")
+
+    try:
+        stats = asyncio.run(ingest_file(args))
+    except ValueError as e:
+        # Header / layout tanpa kolom wajib
+        print(f"[INGEST] File ditolak: {e}", file=sys.stderr)
+        return 2
+
+    for line_no, reason in stats.rejects:
+        print(f"[INGEST] Baris {line_no} ditolak: {reason}", file=sys.stderr)
+    if stats.rejected > len(stats.rejects):
+        print(f"[INGEST] ... dan {stats.rejected - len(stats.rejects)} baris ditolak lainnya", file=sys.stderr)
+    summary = stats.as_dict()
+    print(
+        f"[INGEST] Selesai{' (dry run)' if args.dry_run else ''}: {summary['rows_read']} baris, "
+        f"{summary['inserted']} masuk, {summary['duplicates']} duplikat, {summary['rejected']} ditolak, "
+        f"{summary['sppt_lunas']} SPPT lunas, {summary['chunks']} chunk, "
+        f"{summary['elapsed']}s ({summary['rows_per_second']} baris/detik)"
+    )
+    return 1 if stats.rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,8 +2,11 @@
 Script untuk membaca dan menganalisis file Shapefile
 Tanpa dependency library GIS yang berat
 """
+import math
+import mmap
 import struct
 import os
+from functools import lru_cache
 
 def read_dbf_header(dbf_path):
     """Membaca header file DBF untuk mengetahui struktur kolom"""
@@ -74,6 +77,442 @@ def read_dbf_records(dbf_path, max_records=5):
         
         return records
 
+
+# ---------------------------------------------------------------------------
+# Streaming reader (.shp + .shx + .dbf) berbasis mmap
+# ---------------------------------------------------------------------------
+
+SHP_FILE_HEADER = struct.Struct('>I20xI')   # file code, panjang file (big endian)
+SHP_MAIN_HEADER = struct.Struct('<2i4d')     # versi, tipe shape, bbox (little endian)
+SHP_RECORD_HEADER = struct.Struct('>2I')    # nomor record, panjang konten (word 16-bit)
+SHX_RECORD = struct.Struct('>2I')           # offset (word), panjang konten (word)
+SHP_SHAPE_TYPE = struct.Struct('<i')
+SHP_POINT = struct.Struct('<2d')
+SHP_BBOX = struct.Struct('<4d')
+SHP_COUNTS = struct.Struct('<2i')           # jumlah part, jumlah point
+SHP_COUNT = struct.Struct('<i')
+DBF_HEADER = struct.Struct('<4BIHH')
+
+SHP_HEADER_SIZE = 100
+
+NULL_SHAPE = 0
+POINT_TYPES = {1, 11, 21}
+POLYLINE_TYPES = {3, 13, 23}
+POLYGON_TYPES = {5, 15, 25}
+MULTIPOINT_TYPES = {8, 18, 28}
+
+
+@lru_cache(maxsize=256)
+def _array_struct(fmt, count):
+    """Struct untuk array `count` elemen, dicache per panjang array"""
+    return struct.Struct(f'<{count}{fmt}')
+
+
+def _mmap_file(path):
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _ring_area(ring):
+    """Signed area (shoelace); negatif = searah jarum jam (outer ring di shapefile)"""
+    area = 0.0
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+        area += x1 * y2 - x2 * y1
+    return area / 2.0
+
+
+class ShapefileReader:
+    """
+    Reader shapefile streaming tanpa GDAL/geopandas
+
+    File .shp, .shx dan .dbf di-memory-map, sehingga hanya halaman yang dibaca
+    yang dimuat OS ke memori. Offset di .shx dipakai untuk akses acak per
+    record, dan layout record DBF di-compile sekali sebagai struct.Struct.
+    Geometry dikembalikan sebagai dict GeoJSON (koordinat asli, tanpa reproyeksi).
+
+    Contoh:
+        with ShapefileReader("gis_data/5102051011") as reader:
+            for feature in reader.iter_features():
+                print(feature["properties"]["D_NOP"])
+    """
+
+    def __init__(self, base_path, encoding=None):
+        base_path = os.path.splitext(base_path)[0] if base_path.lower().endswith('.shp') else base_path
+        self.base_path = base_path
+
+        self._shp = _mmap_file(base_path + '.shp')
+        self._shx = _mmap_file(base_path + '.shx')
+        self._dbf = _mmap_file(base_path + '.dbf') if os.path.exists(base_path + '.dbf') else None
+
+        file_code, _ = SHP_FILE_HEADER.unpack_from(self._shp, 0)
+        _, self.shape_type, *bbox = SHP_MAIN_HEADER.unpack_from(self._shp, SHP_FILE_HEADER.size)
+        if file_code != 9994:
+            raise ValueError(f"Bukan file shapefile: {base_path}.shp")
+        self.bbox = tuple(bbox)
+        self.num_shapes = (len(self._shx) - SHP_HEADER_SIZE) // SHX_RECORD.size
+
+        if encoding is None:
+            cpg_path = base_path + '.cpg'
+            if os.path.exists(cpg_path):
+                with open(cpg_path, 'r') as f:
+                    encoding = f.read().strip() or None
+        self.encoding = encoding or 'latin-1'
+
+        self.fields = []
+        if self._dbf is not None:
+            self._init_dbf()
+
+        self._sbn = False  # dibuka saat pertama kali dipakai
+
+    def _init_dbf(self):
+        _, _, _, _, self.num_records, self._dbf_header_length, self._dbf_record_length = \
+            DBF_HEADER.unpack_from(self._dbf, 0)
+
+        offset = 32
+        while self._dbf[offset] != 0x0D:
+            descriptor = self._dbf[offset:offset + 32]
+            self.fields.append({
+                'name': descriptor[:11].split(b'\x00', 1)[0].decode('ascii', errors='ignore'),
+                'type': chr(descriptor[11]),
+                'length': descriptor[16],
+                'decimal': descriptor[17],
+            })
+            offset += 32
+
+        # Layout satu record: deletion flag + setiap field sebagai bytes mentah
+        layout = '<c' + ''.join(f"{field['length']}s" for field in self.fields)
+        self._dbf_record = struct.Struct(layout)
+
+    def close(self):
+        for mm in (self._shp, self._shx, self._dbf):
+            if mm is not None:
+                mm.close()
+        if self._sbn:
+            self._sbn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.num_shapes
+
+    # --- .shx / .shp -------------------------------------------------------
+
+    def _shape_offset(self, index):
+        """Offset (byte) konten record ke-`index` di .shp, dari .shx"""
+        if not 0 <= index < self.num_shapes:
+            raise IndexError(f"Record {index} di luar rentang 0..{self.num_shapes - 1}")
+        offset_words, _ = SHX_RECORD.unpack_from(self._shx, SHP_HEADER_SIZE + index * SHX_RECORD.size)
+        return offset_words * 2 + SHP_RECORD_HEADER.size
+
+    def shape_bbox(self, index):
+        """Bounding box (xmin, ymin, xmax, ymax) shape ke-`index`, atau None untuk Null/Point"""
+        offset = self._shape_offset(index)
+        shape_type = SHP_SHAPE_TYPE.unpack_from(self._shp, offset)[0]
+        if shape_type == NULL_SHAPE:
+            return None
+        if shape_type in POINT_TYPES:
+            x, y = SHP_POINT.unpack_from(self._shp, offset + 4)
+            return (x, y, x, y)
+        return SHP_BBOX.unpack_from(self._shp, offset + 4)
+
+    def shape(self, index):
+        """Geometry GeoJSON (dict) shape ke-`index`, atau None untuk Null Shape"""
+        buf = self._shp
+        offset = self._shape_offset(index)
+        shape_type = SHP_SHAPE_TYPE.unpack_from(buf, offset)[0]
+        offset += 4
+
+        if shape_type == NULL_SHAPE:
+            return None
+
+        if shape_type in POINT_TYPES:
+            return {'type': 'Point', 'coordinates': SHP_POINT.unpack_from(buf, offset)}
+
+        offset += SHP_BBOX.size
+        if shape_type in MULTIPOINT_TYPES:
+            num_points = SHP_COUNT.unpack_from(buf, offset)[0]
+            flat = _array_struct('d', num_points * 2).unpack_from(buf, offset + 4)
+            return {'type': 'MultiPoint', 'coordinates': list(zip(flat[0::2], flat[1::2]))}
+
+        if shape_type not in POLYLINE_TYPES and shape_type not in POLYGON_TYPES:
+            raise ValueError(f"Shape type {shape_type} belum didukung")
+
+        num_parts, num_points = SHP_COUNTS.unpack_from(buf, offset)
+        offset += SHP_COUNTS.size
+        parts = _array_struct('i', num_parts).unpack_from(buf, offset) + (num_points,)
+        offset += 4 * num_parts
+        flat = _array_struct('d', num_points * 2).unpack_from(buf, offset)
+        points = list(zip(flat[0::2], flat[1::2]))
+        rings = [points[start:end] for start, end in zip(parts, parts[1:])]
+
+        if shape_type in POLYLINE_TYPES:
+            if len(rings) == 1:
+                return {'type': 'LineString', 'coordinates': rings[0]}
+            return {'type': 'MultiLineString', 'coordinates': rings}
+
+        # Polygon: outer ring searah jarum jam, hole berlawanan (spesifikasi ESRI)
+        polygons = []
+        for ring in rings:
+            if _ring_area(ring) <= 0 or not polygons:
+                polygons.append([ring])
+            else:
+                polygons[-1].append(ring)
+
+        if len(polygons) == 1:
+            return {'type': 'Polygon', 'coordinates': polygons[0]}
+        return {'type': 'MultiPolygon', 'coordinates': polygons}
+
+    # --- .dbf --------------------------------------------------------------
+
+    def _decode_value(self, field, raw):
+        field_type = field['type']
+        if field_type in ('C', 'D'):
+            value = raw.decode(self.encoding, errors='replace').strip()
+            return value or None
+        if field_type in ('N', 'F'):
+            value = raw.strip(b' \x00*')
+            if not value:
+                return None
+            if field_type == 'N' and field['decimal'] == 0:
+                try:
+                    return int(value)
+                except ValueError:
+                    pass
+            try:
+                return float(value)
+            except ValueError:
+                return None
+        if field_type == 'L':
+            value = raw[:1].upper()
+            if value in (b'T', b'Y'):
+                return True
+            if value in (b'F', b'N'):
+                return False
+            return None
+        return raw.decode(self.encoding, errors='replace').strip() or None
+
+    def is_deleted(self, index):
+        """True jika record DBF ke-`index` ditandai dihapus ('*')"""
+        offset = self._dbf_header_length + index * self._dbf_record_length
+        return self._dbf[offset] == 0x2A
+
+    def record(self, index, fields=None):
+        """
+        Atribut DBF record ke-`index` sebagai dict
+
+        Args:
+            fields: Nama kolom yang di-decode (default semua kolom)
+        """
+        if self._dbf is None:
+            return {}
+        if not 0 <= index < self.num_records:
+            raise IndexError(f"Record {index} di luar rentang 0..{self.num_records - 1}")
+
+        values = self._dbf_record.unpack_from(
+            self._dbf, self._dbf_header_length + index * self._dbf_record_length
+        )
+        return {
+            field['name']: self._decode_value(field, raw)
+            for field, raw in zip(self.fields, values[1:])
+            if fields is None or field['name'] in fields
+        }
+
+    # --- Feature -----------------------------------------------------------
+
+    def feature(self, index, fields=None):
+        """Feature GeoJSON (geometry + properties) record ke-`index`"""
+        return {
+            'type': 'Feature',
+            'id': index,
+            'geometry': self.shape(index),
+            'properties': self.record(index, fields),
+        }
+
+    def iter_features(self, fields=None, skip_deleted=True, bbox=None):
+        """
+        Generator feature GeoJSON satu per satu, hanya record yang sedang
+        di-yield yang di-decode
+
+        Args:
+            bbox: (xmin, ymin, xmax, ymax) dalam CRS shapefile; hanya feature
+                yang bounding box-nya beririsan yang di-yield
+        """
+        indices = range(self.num_shapes) if bbox is None else self.intersecting(bbox)
+        for index in indices:
+            if skip_deleted and self._dbf is not None and self.is_deleted(index):
+                continue
+            yield self.feature(index, fields)
+
+    # --- Spatial index -------------------------------------------------------
+
+    @property
+    def spatial_index(self):
+        """SbnIndex dari file .sbn/.sbx di samping shapefile, atau None jika tidak ada"""
+        if self._sbn is False:
+            sbn_path = self.base_path + '.sbn'
+            self._sbn = SbnIndex(sbn_path) if os.path.exists(sbn_path) else None
+        return self._sbn
+
+    def intersecting(self, bbox):
+        """
+        Index (0-based, terurut) shape yang bounding box-nya beririsan dengan `bbox`
+
+        Kandidat diambil dari .sbn jika ada (tanpa membaca seluruh record .shp),
+        lalu dicek ulang dengan bounding box asli di .shp.
+        """
+        xmin, ymin, xmax, ymax = bbox
+        index = self.spatial_index
+        candidates = index.search(bbox) if index is not None else range(self.num_shapes)
+
+        result = []
+        for i in candidates:
+            shape_bbox = self.shape_bbox(i)
+            if shape_bbox is None:
+                continue
+            if shape_bbox[0] <= xmax and shape_bbox[2] >= xmin and shape_bbox[1] <= ymax and shape_bbox[3] >= ymin:
+                result.append(i)
+        return result
+
+
+
+# ---------------------------------------------------------------------------
+# Spatial index ESRI (.sbn/.sbx)
+# ---------------------------------------------------------------------------
+
+SBN_HEADER = struct.Struct('>I20xII4d')      # file code, panjang, jumlah shape, bbox
+SBN_BIN_HEADER = struct.Struct('>2i')        # id bin, ukuran (word 16-bit)
+SBN_NODE = struct.Struct('>2i')              # bin pertama (-1 = kosong), jumlah feature
+SBN_FEATURE = struct.Struct('>4Bi')          # bbox terkuantisasi 0..255, nomor shape (1-based)
+
+
+class SbnIndex:
+    """
+    Reader spatial index .sbn/.sbx (format ESRI, sama dengan sbnsearch GDAL)
+
+    Index berupa binary tree di atas grid 256x256 yang menutupi bbox
+    shapefile. Root adalah node 1, anak node n adalah 2n (setengah atas) dan
+    2n+1 (setengah bawah), dibagi bergantian pada X (depth genap) dan Y.
+    Setiap feature disimpan di node terdalam yang selnya memuat bbox-nya.
+    Bin pertama .sbn berisi deskriptor node; .sbx berisi offset setiap bin.
+    """
+
+    def __init__(self, sbn_path):
+        base_path = os.path.splitext(sbn_path)[0]
+        self._sbn = _mmap_file(base_path + '.sbn')
+
+        file_code, _, self.num_shapes, *bbox = SBN_HEADER.unpack_from(self._sbn, 0)
+        if file_code != 9994:
+            raise ValueError(f"Bukan file spatial index: {sbn_path}")
+        self.bbox = tuple(bbox)
+
+        # Bin 1: deskriptor node
+        _, size = SBN_BIN_HEADER.unpack_from(self._sbn, SHP_HEADER_SIZE)
+        descriptor_start = SHP_HEADER_SIZE + SBN_BIN_HEADER.size
+        self.nodes = [
+            SBN_NODE.unpack_from(self._sbn, descriptor_start + i * SBN_NODE.size)
+            for i in range(size * 2 // SBN_NODE.size)
+        ]
+
+        self._bin_offsets = self._read_bin_offsets(base_path + '.sbx')
+
+    def _read_bin_offsets(self, sbx_path):
+        """Offset byte setiap bin (key: id bin), dari .sbx atau dengan menelusuri .sbn"""
+        offsets = {}
+        if os.path.exists(sbx_path):
+            with open(sbx_path, 'rb') as f:
+                sbx = f.read()
+            for pos in range(SHP_HEADER_SIZE, len(sbx) - SBN_BIN_HEADER.size + 1, SBN_BIN_HEADER.size):
+                offset_words, _ = SBN_BIN_HEADER.unpack_from(sbx, pos)
+                bin_id, _ = SBN_BIN_HEADER.unpack_from(self._sbn, offset_words * 2)
+                offsets[bin_id] = offset_words * 2
+            return offsets
+
+        offset = SHP_HEADER_SIZE
+        while offset + SBN_BIN_HEADER.size <= len(self._sbn):
+            bin_id, size = SBN_BIN_HEADER.unpack_from(self._sbn, offset)
+            offsets[bin_id] = offset
+            offset += SBN_BIN_HEADER.size + size * 2
+        return offsets
+
+    def close(self):
+        self._sbn.close()
+
+    def _node_features(self, node_id):
+        """Feature (bbox terkuantisasi, nomor shape) milik node, dibaca dari bin berurutan"""
+        first_bin, count = self.nodes[node_id - 1]
+        if first_bin < 0 or count <= 0:
+            return
+        bin_id = first_bin
+        while count > 0:
+            _, size = SBN_BIN_HEADER.unpack_from(self._sbn, self._bin_offsets[bin_id])
+            offset = self._bin_offsets[bin_id] + SBN_BIN_HEADER.size
+            for _ in range(min(count, size * 2 // SBN_FEATURE.size)):
+                yield SBN_FEATURE.unpack_from(self._sbn, offset)
+                offset += SBN_FEATURE.size
+                count -= 1
+            bin_id += 1
+
+    def _quantize(self, bbox):
+        """Konversi bbox ke koordinat grid 0..255 (floor untuk min, ceil untuk max)"""
+        xmin, ymin, xmax, ymax = self.bbox
+        width = (xmax - xmin) or 1.0
+        height = (ymax - ymin) or 1.0
+
+        def clamp(value):
+            return max(0, min(255, value))
+
+        return (
+            clamp(math.floor((bbox[0] - xmin) * 255 / width)),
+            clamp(math.floor((bbox[1] - ymin) * 255 / height)),
+            clamp(math.ceil((bbox[2] - xmin) * 255 / width)),
+            clamp(math.ceil((bbox[3] - ymin) * 255 / height)),
+        )
+
+    def search(self, bbox):
+        """
+        Index shape (0-based, terurut) yang KEMUNGKINAN beririsan dengan `bbox`
+
+        Hasil bersifat konservatif karena bbox di index dibulatkan ke grid
+        256x256; cek ulang dengan bbox asli (ShapefileReader.intersecting).
+        """
+        xmin, ymin, xmax, ymax = self.bbox
+        if bbox[2] < xmin or bbox[0] > xmax or bbox[3] < ymin or bbox[1] > ymax:
+            return []
+
+        qxmin, qymin, qxmax, qymax = self._quantize(bbox)
+        found = []
+        # (node id, depth, sel grid node)
+        stack = [(1, 0, 0, 0, 255, 255)]
+        while stack:
+            node_id, depth, x0, y0, x1, y1 = stack.pop()
+            if node_id > len(self.nodes):
+                continue
+
+            for fxmin, fymin, fxmax, fymax, shape_id in self._node_features(node_id):
+                if fxmin <= qxmax and fxmax >= qxmin and fymin <= qymax and fymax >= qymin:
+                    found.append(shape_id - 1)
+
+            # Sel anak berbagi garis batas di titik tengah
+            if depth % 2 == 0:
+                mid = (x0 + x1 + 1) // 2
+                if qxmax >= mid:
+                    stack.append((2 * node_id, depth + 1, mid, y0, x1, y1))
+                if qxmin <= mid:
+                    stack.append((2 * node_id + 1, depth + 1, x0, y0, mid, y1))
+            else:
+                mid = (y0 + y1 + 1) // 2
+                if qymax >= mid:
+                    stack.append((2 * node_id, depth + 1, x0, mid, x1, y1))
+                if qymin <= mid:
+                    stack.append((2 * node_id + 1, depth + 1, x0, y0, x1, mid))
+
+        return sorted(found)
+
+
 def analyze_shapefile(base_path):
     """Analisis lengkap file shapefile"""
     print("="*80)
@@ -182,6 +621,19 @@ def analyze_shapefile(base_path):
             print(f"  Width : {xmax - xmin:,.6f}")
             print(f"  Height: {ymax - ymin:,.6f}")
 
+    # Info spatial index (.sbn/.sbx)
+    if files_exist['.sbn']:
+        print("\n" + "="*80)
+        print("INFORMASI SBN (Spatial Index)")
+        print("="*80)
+
+        index = SbnIndex(base_path + '.sbn')
+        terisi = sum(1 for first_bin, count in index.nodes if first_bin > 0 and count > 0)
+        print(f"\nJumlah shape   : {index.num_shapes:,}")
+        print(f"Jumlah node    : {len(index.nodes)} ({terisi} berisi feature)")
+        print(f"Jumlah bin     : {len(index._bin_offsets)}")
+        index.close()
+
 if __name__ == "__main__":
     # Path ke shapefile (tanpa extension)
     shapefile_base = r"d:\Project\ipbb\gis_data\5102051011"
@@ -1,181 +1,556 @@
 """
 Script untuk import Shapefile ke MySQL
 Membaca shapefile dan insert ke tabel dat_peta_objek_pajak
+
+Feature dibaca satu per satu (streaming) dan ditulis per batch ke tabel
+bayangan dat_peta_objek_pajak_baru. Setelah selesai, tabel bayangan ditukar
+dengan tabel aktif memakai RENAME TABLE (atomik), sehingga peta tetap bisa
+diakses selama import berjalan dan memori tidak tergantung ukuran shapefile.
+
+Penggunaan:
+    python import_shapefile_to_mysql.py                      # default /app/gis_data/5102051011.shp
+    python import_shapefile_to_mysql.py /app/gis_data/       # semua .shp di direktori
+    python import_shapefile_to_mysql.py "/data/510205*.shp" --workers 8
+
+Nama file = kode kelurahan (PR+D2+KC+KL, mis. 5102051011.shp). Hanya data
+kelurahan yang diimport yang diganti; kelurahan lain disalin dari tabel aktif.
 """
-import geopandas as gpd
-from sqlalchemy import create_engine, text
+import argparse
+import glob
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional
+
+import fiona
+import numpy as np
+import shapely
 from dotenv import load_dotenv
+from pyproj import CRS, Transformer
+from shapely.geometry import shape
+from sqlalchemy import create_engine, text
 
 # Load environment variables
 load_dotenv()
 
-def import_shapefile_to_mysql(shapefile_path: str):
-    """Import shapefile ke MySQL database"""
-    
-    print("="*80)
-    print("IMPORT SHAPEFILE KE MYSQL")
-    print("="*80)
-    
-    # 1. Baca shapefile dengan geopandas
-    print(f"\n[1/5] Membaca shapefile: {shapefile_path}")
-    gdf = gpd.read_file(shapefile_path)
-    
-    print(f"      ✓ Berhasil membaca {len(gdf)} polygon")
-    print(f"      ✓ Coordinate Reference System: {gdf.crs}")
-    print(f"      ✓ Kolom: {list(gdf.columns)}")
-    
-    # 2. Konversi ke WGS84 (EPSG:4326) untuk Leaflet
-    print(f"\n[2/5] Konversi koordinat ke WGS84 (Lat/Long)...")
-    if gdf.crs:
-        print(f"      ℹ CRS awal: {gdf.crs}")
-        if gdf.crs.to_string() != "EPSG:4326":
-            gdf = gdf.to_crs(epsg=4326)
-            print(f"      ✓ Koordinat dikonversi ke EPSG:4326 (WGS84)")
-        else:
-            print(f"      ℹ Sudah dalam format WGS84")
-    else:
-        # Shapefile tidak punya CRS - berdasarkan koordinat, set manual UTM 50S
-        print(f"      ⚠ Shapefile tidak punya CRS definition!")
-        print(f"      ℹ Berdasarkan koordinat, diasumsikan UTM Zone 50S (EPSG:32750)")
-        sample_coords = list(gdf.geometry.iloc[0].exterior.coords)[0]
-        print(f"      ℹ Sample koordinat awal (UTM): {sample_coords}")
-        
-        # Set CRS ke UTM 50S lalu konversi ke WGS84
-        gdf = gdf.set_crs(epsg=32750)  # UTM Zone 50S untuk Indonesia (Kalimantan Selatan)
-        gdf = gdf.to_crs(epsg=4326)  # Konversi ke WGS84
-        sample_coords_wgs84 = list(gdf.geometry.iloc[0].exterior.coords)[0]
-        print(f"      ✓ CRS diset ke EPSG:32750 dan dikonversi ke WGS84")
-        print(f"      ℹ Sample koordinat WGS84: {sample_coords_wgs84}")
-    
-    # 3. Konversi geometry ke WKT (Well-Known Text)
-    print(f"\n[3/5] Konversi geometry ke WKT format...")
-    gdf['geometry_wkt'] = gdf['geometry'].apply(lambda geom: geom.wkt)
-    print(f"      ✓ Geometry dikonversi ke WKT")
-    
-    # Drop original geometry column (akan pakai geometry_wkt)
-    gdf = gdf.drop(columns=['geometry'])
-    
-    # Rename kolom agar sesuai standar
-    print(f"\n[4/5] Rename kolom...")
-    column_mapping = {
-        'D_NOP': 'nop',
-        'D_LUAS': 'luas',
-        'PR': 'kd_propinsi',
-        'D2': 'kd_dati2',
-        'KC': 'kd_kecamatan',
-        'KL': 'kd_kelurahan',
-        'BL': 'kd_blok',
-        'UR': 'no_urut',
-        'KH': 'kd_jns_op',
-        'SHM': 'shm',
-        'NIB_': 'nib',
-        'GS': 'guna_tanah',
-        'SU': 'status',
-        'ZNT': 'znt',
-        'HARGA_TRAN': 'harga_transaksi',
-        'NO_PEL': 'no_pelayanan',
-        'geometry_wkt': 'geometry'  # Rename dari geometry_wkt ke geometry
-    }
-    
-    gdf_renamed = gdf.rename(columns=column_mapping)
-    
-    # Pilih kolom yang akan diimport
-    columns_to_import = list(column_mapping.values())
-    gdf_final = gdf_renamed[columns_to_import].copy()
-    
-    # Trim whitespace dari kolom NOP
-    gdf_final['nop'] = gdf_final['nop'].astype(str).str.strip()
-    
-    print(f"      ✓ Kolom direname dan dipilih")
-    
-    # 5. Koneksi ke MySQL dan import
-    print(f"\n[5/5] Import ke MySQL...")
-    
+TABLE_NAME = "dat_peta_objek_pajak"
+SHADOW_TABLE = "dat_peta_objek_pajak_baru"
+OLD_TABLE = "dat_peta_objek_pajak_lama"
+
+# Batas satu INSERT multi-row: jumlah record dan perkiraan ukuran statement.
+# Satu record membawa WKT penuh 2x (geometry + ST_GeomFromText) plus 3 WKT LOD,
+# polygon detail bisa puluhan KB, jadi 1000 record bisa melewati
+# max_allowed_packet default MySQL 5.7 (4 MB). Batch di-flush mana yang lebih dulu.
+BATCH_SIZE = 1000
+BATCH_MAX_BYTES = 2 * 1024 * 1024
+
+# Shapefile dari BPN umumnya tanpa .prj, koordinatnya UTM Zone 50S
+DEFAULT_CRS = "EPSG:32750"
+
+# Toleransi simplifikasi (derajat, WGS84) untuk kolom geometry_lod1..3.
+# ~0.5 m, ~2 m, ~11 m; dipakai /peta untuk zoom rendah. Harus sama dengan
+# GEOMETRY_LOD_TOLERANCES di app/peta/service.py
+LOD_TOLERANCES = {
+    1: 0.000005,
+    2: 0.00002,
+    3: 0.0001,
+}
+# Jumlah desimal koordinat WKT per level (7 ~ 1 cm, 6 ~ 10 cm), cukup di bawah
+# toleransinya sehingga polygon tetap valid tapi teks WKT jauh lebih pendek
+LOD_DECIMALS = {
+    1: 7,
+    2: 6,
+    3: 6,
+}
+LOD_COLUMNS = [f'geometry_lod{level}' for level in LOD_TOLERANCES]
+
+COLUMN_MAPPING = {
+    'D_NOP': 'nop',
+    'D_LUAS': 'luas',
+    'PR': 'kd_propinsi',
+    'D2': 'kd_dati2',
+    'KC': 'kd_kecamatan',
+    'KL': 'kd_kelurahan',
+    'BL': 'kd_blok',
+    'UR': 'no_urut',
+    'KH': 'kd_jns_op',
+    'SHM': 'shm',
+    'NIB_': 'nib',
+    'GS': 'guna_tanah',
+    'SU': 'status',
+    'ZNT': 'znt',
+    'HARGA_TRAN': 'harga_transaksi',
+    'NO_PEL': 'no_pelayanan',
+}
+
+INSERT_COLUMNS = list(COLUMN_MAPPING.values()) + ['geometry'] + LOD_COLUMNS
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE {table} (
+        nop VARCHAR(50) NOT NULL,
+        luas DOUBLE NULL,
+        kd_propinsi VARCHAR(50) NULL,
+        kd_dati2 VARCHAR(50) NULL,
+        kd_kecamatan VARCHAR(50) NULL,
+        kd_kelurahan VARCHAR(50) NULL,
+        kd_blok VARCHAR(50) NULL,
+        no_urut VARCHAR(50) NULL,
+        kd_jns_op VARCHAR(50) NULL,
+        shm VARCHAR(50) NULL,
+        nib VARCHAR(50) NULL,
+        guna_tanah VARCHAR(50) NULL,
+        status VARCHAR(50) NULL,
+        znt VARCHAR(50) NULL,
+        harga_transaksi VARCHAR(50) NULL,
+        no_pelayanan VARCHAR(50) NULL,
+        geometry LONGTEXT NOT NULL,
+        geometry_lod1 LONGTEXT NULL,
+        geometry_lod2 LONGTEXT NULL,
+        geometry_lod3 LONGTEXT NULL,
+        geom GEOMETRY NOT NULL{srid},
+        INDEX idx_nop (nop),
+        INDEX idx_wilayah (kd_propinsi, kd_dati2, kd_kecamatan, kd_kelurahan),
+        SPATIAL INDEX idx_geom (geom)
+    )
+"""
+
+
+def get_engine(verbose: bool = True):
+    """Buat engine SQLAlchemy (sync) dari environment variables"""
     # Buat connection string - gunakan mysql container name untuk Docker
     db_host = os.getenv("DATABASE_HOST", "mysql")
     db_port = os.getenv("DATABASE_PORT", "3306")
     db_user = os.getenv("DATABASE_USER", "ipbb_user")  # Changed from root
     db_password = os.getenv("DATABASE_PASSWORD", "ipbb_password")  # Changed from root
     db_name = os.getenv("DATABASE_NAME", "ipbb")
-    
-    print(f"      ℹ Connecting to: {db_user}@{db_host}:{db_port}/{db_name}")
-    
+
+    if verbose:
+        print(f"      ℹ Connecting to: {db_user}@{db_host}:{db_port}/{db_name}")
+
     connection_string = f"mysql+pymysql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
-    
-    try:
-        engine = create_engine(connection_string)
-        
-        # Drop table jika sudah ada
-        with engine.connect() as conn:
-            conn.execute(text("DROP TABLE IF EXISTS dat_peta_objek_pajak"))
+    return create_engine(connection_string)
+
+
+def create_shadow_table(engine):
+    """
+    Buat ulang tabel bayangan dat_peta_objek_pajak_baru (kosong) lengkap dengan
+    kolom GEOMETRY `geom` dan SPATIAL INDEX yang dipakai PetaService
+    """
+    with engine.connect() as conn:
+        # Sisa import sebelumnya yang gagal di tengah jalan
+        conn.execute(text(f"DROP TABLE IF EXISTS {SHADOW_TABLE}"))
+
+        # MySQL 8 butuh atribut SRID agar SPATIAL INDEX dipakai optimizer;
+        # MySQL 5.7 tidak mengenal atribut ini.
+        try:
+            conn.execute(text(CREATE_TABLE_SQL.format(table=SHADOW_TABLE, srid=" SRID 0")))
+        except Exception:
+            conn.rollback()
+            conn.execute(text(CREATE_TABLE_SQL.format(table=SHADOW_TABLE, srid="")))
+        conn.commit()
+        print(f"      ✓ Tabel bayangan '{SHADOW_TABLE}' dibuat")
+
+
+def build_transformer(crs, verbose: bool = True) -> Optional[Transformer]:
+    """
+    Transformer ke WGS84 (EPSG:4326) untuk Leaflet, atau None jika data sudah WGS84
+
+    Dicek per file: shapefile tanpa CRS definition diasumsikan UTM Zone 50S (EPSG:32750).
+    """
+    log = print if verbose else (lambda *args: None)
+
+    if crs:
+        source = CRS.from_user_input(crs)
+        log(f"      ℹ CRS awal: {source.to_string()}")
+        if source.to_epsg() == 4326:
+            log(f"      ℹ Sudah dalam format WGS84")
+            return None
+    else:
+        # Shapefile tidak punya CRS - berdasarkan koordinat, set manual UTM 50S
+        log(f"      ⚠ Shapefile tidak punya CRS definition!")
+        log(f"      ℹ Berdasarkan koordinat, diasumsikan UTM Zone 50S ({DEFAULT_CRS})")
+        source = CRS.from_user_input(DEFAULT_CRS)
+
+    log(f"      ✓ Koordinat akan dikonversi ke EPSG:4326 (WGS84)")
+    return Transformer.from_crs(source, "EPSG:4326", always_xy=True)
+
+
+def record_size(record: Dict) -> int:
+    """Perkiraan byte record di statement INSERT (WKT geometry terkirim 2x)"""
+    size = len(record['geometry'])
+    for column in INSERT_COLUMNS:
+        value = record[column]
+        size += len(value) if isinstance(value, str) else 24
+    return size
+
+
+def iter_feature_batches(
+    shapefile_path: str,
+    batch_size: int = BATCH_SIZE,
+    max_bytes: int = BATCH_MAX_BYTES,
+    verbose: bool = True,
+) -> Iterator[List[Dict]]:
+    """
+    Baca shapefile feature per feature dan hasilkan list record per batch
+
+    Setiap record berisi kolom sesuai COLUMN_MAPPING plus `geometry` (WKT, WGS84)
+    dan geometry_lod1..3 (versi sederhana sesuai LOD_TOLERANCES).
+    Batch ditutup saat mencapai batch_size record atau max_bytes (perkiraan
+    record_size), sehingga satu INSERT tidak melewati max_allowed_packet.
+    Hanya satu batch yang ada di memori pada satu waktu.
+    """
+    with fiona.open(shapefile_path) as src:
+        transformer = build_transformer(src.crs, verbose=verbose)
+
+        def to_wgs84(coords: np.ndarray) -> np.ndarray:
+            lon, lat = transformer.transform(coords[:, 0], coords[:, 1])
+            return np.column_stack([lon, lat])
+
+        batch: List[Dict] = []
+        batch_bytes = 0
+        for feature in src:
+            if feature.geometry is None:
+                continue
+
+            geom = shape(feature.geometry)
+            if transformer is not None:
+                geom = shapely.transform(geom, to_wgs84)
+
+            properties = feature.properties
+            record = {
+                column: properties.get(field)
+                for field, column in COLUMN_MAPPING.items()
+            }
+            # Trim whitespace dari kolom NOP
+            record['nop'] = str(record['nop']).strip()
+            record['geometry'] = geom.wkt
+            for level, tolerance in LOD_TOLERANCES.items():
+                simplified = geom.simplify(tolerance, preserve_topology=True)
+                record[f'geometry_lod{level}'] = shapely.to_wkt(
+                    simplified, rounding_precision=LOD_DECIMALS[level], trim=True
+                )
+            size = record_size(record)
+            if batch and batch_bytes + size > max_bytes:
+                yield batch
+                batch, batch_bytes = [], 0
+            if size > max_bytes and verbose:
+                print(f"      ⚠ NOP {record['nop']}: geometry {size} byte, dikirim sebagai INSERT tersendiri")
+            batch.append(record)
+            batch_bytes += size
+
+            if len(batch) >= batch_size:
+                yield batch
+                batch, batch_bytes = [], 0
+
+        if batch:
+            yield batch
+
+
+def insert_batch(conn, table: str, records: List[Dict]):
+    """INSERT multi-row satu batch record; kolom `geom` diisi dari WKT di sisi MySQL"""
+    row_placeholder = "(" + ", ".join(["%s"] * len(INSERT_COLUMNS)) + ", ST_GeomFromText(%s))"
+    sql = (
+        f"INSERT INTO {table} ({', '.join(INSERT_COLUMNS)}, geom) VALUES "
+        + ", ".join([row_placeholder] * len(records))
+    )
+
+    params = []
+    for record in records:
+        params.extend(record[column] for column in INSERT_COLUMNS)
+        params.append(record['geometry'])
+
+    conn.exec_driver_sql(sql, tuple(params))
+
+
+def load_shapefile(
+    engine, shapefile_path: str, table: str = SHADOW_TABLE, verbose: bool = True
+) -> int:
+    """Stream seluruh feature shapefile ke `table`, commit per batch. Return jumlah record."""
+    total = 0
+    with engine.connect() as conn:
+        for batch in iter_feature_batches(shapefile_path, verbose=verbose):
+            insert_batch(conn, table, batch)
             conn.commit()
-            print(f"      ℹ Tabel lama dihapus (jika ada)")
-        
-        # Import data ke MySQL
-        gdf_final.to_sql(
-            'dat_peta_objek_pajak',
-            con=engine,
-            if_exists='replace',
-            index=False,
-            chunksize=100,
-            method='multi'
+            total += len(batch)
+            if verbose:
+                print(f"      ℹ {total} record ditulis...")
+    return total
+
+
+def kelurahan_code(shapefile_path: str) -> Optional[str]:
+    """Kode kelurahan (10 digit PR+D2+KC+KL) dari nama file, mis. 5102051011.shp"""
+    stem = os.path.splitext(os.path.basename(shapefile_path))[0]
+    if len(stem) == 10 and stem.isdigit():
+        return stem
+    return None
+
+
+def resolve_shapefiles(paths: List[str]) -> List[str]:
+    """Expand argumen CLI (file, direktori, atau glob) menjadi list file .shp unik"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(glob.glob(os.path.join(path, "*.shp")))
+        elif glob.has_magic(path):
+            found.extend(p for p in glob.glob(path) if p.lower().endswith(".shp"))
+        else:
+            found.append(path)
+    return sorted(set(found))
+
+
+def seed_from_live(engine, exclude_codes: List[str]) -> int:
+    """
+    Salin data kelurahan yang TIDAK ikut diimport dari tabel aktif ke tabel
+    bayangan, sehingga import per kelurahan tidak menghapus wilayah lain
+    """
+    if any(not code for code in exclude_codes):
+        # NOT IN (..., NULL) tidak cocok dengan baris mana pun: seluruh wilayah lain terhapus
+        raise ValueError("Kode kelurahan kosong tidak boleh dikecualikan")
+    columns = ", ".join(INSERT_COLUMNS)
+    with engine.connect() as conn:
+        exists = conn.execute(text(f"SHOW TABLES LIKE '{TABLE_NAME}'")).first()
+        if not exists:
+            return 0
+
+        # Tabel dari importer lama belum punya kolom LOD: pakai geometry penuh
+        live_columns = {row[0] for row in conn.execute(text(f"SHOW COLUMNS FROM {TABLE_NAME}"))}
+        select_columns = ", ".join(
+            column if column in live_columns else "geometry"
+            for column in INSERT_COLUMNS
+        )
+
+        params = {f"kode_{i}": code for i, code in enumerate(exclude_codes)}
+        placeholders = ", ".join(f":{key}" for key in params)
+        # NULL-safe: CONCAT bernilai NULL jika salah satu kode NULL, dan
+        # NULL NOT IN (...) tidak pernah benar sehingga baris itu hilang saat swap
+        where = (
+            f"WHERE COALESCE(CONCAT(kd_propinsi, kd_dati2, kd_kecamatan, kd_kelurahan), '') "
+            f"NOT IN ({placeholders})"
+            if params else ""
         )
-        
-        print(f"      ✓ Berhasil import {len(gdf_final)} record ke tabel 'dat_peta_objek_pajak'")
-        
-        # Tambahkan index untuk NOP (skip primary key, cukup index biasa)
-        with engine.connect() as conn:
-            # Coba tambahkan index biasa saja (bukan primary key)
-            try:
-                conn.execute(text("ALTER TABLE dat_peta_objek_pajak ADD INDEX idx_nop (nop(50))"))
-                conn.commit()
-                print(f"      ✓ Index untuk kolom 'nop' ditambahkan")
-            except Exception as idx_error:
-                print(f"      ⚠ Warning: Tidak bisa menambahkan index: {idx_error}")
-                # Tidak masalah jika index gagal, data sudah terimport
-        
-        # Tampilkan info tabel
-        with engine.connect() as conn:
-            result = conn.execute(text("DESCRIBE dat_peta_objek_pajak"))
-            print(f"\n" + "="*80)
-            print("STRUKTUR TABEL dat_peta_objek_pajak")
-            print("="*80)
-            for row in result:
-                print(f"  {row[0]:<20} {row[1]:<30} {row[2]:<10}")
-        
-        # Sample data
-        with engine.connect() as conn:
-            result = conn.execute(text("SELECT nop, kd_propinsi, kd_dati2, kd_kecamatan, kd_kelurahan, LEFT(geometry, 50) as geom_preview FROM dat_peta_objek_pajak LIMIT 3"))
-            print(f"\n" + "="*80)
-            print("SAMPLE DATA (3 record)")
-            print("="*80)
-            for i, row in enumerate(result, 1):
-                print(f"\nRecord {i}:")
-                print(f"  NOP          : {row[0]}")
-                print(f"  Provinsi     : {row[1]}")
-                print(f"  Kab/Kota     : {row[2]}")
-                print(f"  Kecamatan    : {row[3]}")
-                print(f"  Kelurahan    : {row[4]}")
-                print(f"  Geometry     : {row[5]}...")
-        
+        # geom dibangun ulang dari WKT: tabel dari importer lama belum punya kolom geom
+        result = conn.execute(text(f"""
+            INSERT INTO {SHADOW_TABLE} ({columns}, geom)
+            SELECT {select_columns}, ST_GeomFromText(geometry)
+            FROM {TABLE_NAME}
+            {where}
+        """), params)
+        conn.commit()
+        return result.rowcount
+
+
+def _import_worker(shapefile_path: str):
+    """Dijalankan di process pool: reproyeksi + insert satu file ke tabel bayangan"""
+    start = time.perf_counter()
+    engine = get_engine(verbose=False)
+    try:
+        jumlah = load_shapefile(engine, shapefile_path, verbose=False)
+    finally:
+        engine.dispose()
+    return shapefile_path, jumlah, time.perf_counter() - start
+
+
+def swap_tables(engine):
+    """
+    Tukar tabel bayangan dengan tabel aktif dalam satu RENAME TABLE (atomik),
+    lalu hapus tabel lama
+    """
+    with engine.connect() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {OLD_TABLE}"))
+        exists = conn.execute(text(f"SHOW TABLES LIKE '{TABLE_NAME}'")).first()
+        if exists:
+            conn.execute(text(
+                f"RENAME TABLE {TABLE_NAME} TO {OLD_TABLE}, {SHADOW_TABLE} TO {TABLE_NAME}"
+            ))
+            conn.execute(text(f"DROP TABLE {OLD_TABLE}"))
+        else:
+            conn.execute(text(f"RENAME TABLE {SHADOW_TABLE} TO {TABLE_NAME}"))
+        conn.commit()
+        print(f"      ✓ Tabel '{SHADOW_TABLE}' ditukar menjadi '{TABLE_NAME}'")
+
+
+def record_import(engine, shapefile_path: str, jumlah_record: int):
+    """
+    Catat import ke tabel dat_peta_import. Backend memantau MAX(id) tabel ini
+    untuk mengosongkan cache geometry/tile setelah data peta dimuat ulang.
+    """
+    with engine.connect() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS dat_peta_import (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                shapefile VARCHAR(255) NOT NULL,
+                jumlah_record INT NOT NULL,
+                imported_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        conn.execute(
+            text("INSERT INTO dat_peta_import (shapefile, jumlah_record) VALUES (:shapefile, :jumlah)"),
+            {"shapefile": os.path.basename(shapefile_path), "jumlah": jumlah_record},
+        )
+        conn.commit()
+        print(f"      ✓ Import dicatat di dat_peta_import (cache backend akan di-refresh)")
+
+
+def print_summary(engine):
+    """Tampilkan struktur tabel dan sample data setelah import"""
+    # Tampilkan info tabel
+    with engine.connect() as conn:
+        result = conn.execute(text(f"DESCRIBE {TABLE_NAME}"))
+        print(f"\n" + "="*80)
+        print(f"STRUKTUR TABEL {TABLE_NAME}")
+        print("="*80)
+        for row in result:
+            print(f"  {row[0]:<20} {row[1]:<30} {row[2]:<10}")
+
+    # Sample data
+    with engine.connect() as conn:
+        result = conn.execute(text(f"SELECT nop, kd_propinsi, kd_dati2, kd_kecamatan, kd_kelurahan, LEFT(geometry, 50) as geom_preview FROM {TABLE_NAME} LIMIT 3"))
         print(f"\n" + "="*80)
-        print("✓ IMPORT SELESAI!")
+        print("SAMPLE DATA (3 record)")
         print("="*80)
-        
+        for i, row in enumerate(result, 1):
+            print(f"\nRecord {i}:")
+            print(f"  NOP          : {row[0]}")
+            print(f"  Provinsi     : {row[1]}")
+            print(f"  Kab/Kota     : {row[2]}")
+            print(f"  Kecamatan    : {row[3]}")
+            print(f"  Kelurahan    : {row[4]}")
+            print(f"  Geometry     : {row[5]}...")
+
+
+def import_shapefiles_to_mysql(shapefile_paths: List[str], workers: int = 1, replace_all: bool = False):
+    """
+    Import satu atau banyak shapefile (per kelurahan) ke MySQL database
+
+    Setiap file direproyeksi dan di-insert oleh process pool ke tabel bayangan
+    yang sama, lalu seluruhnya ditukar ke tabel aktif dalam satu swap.
+
+    Args:
+        shapefile_paths: List path file .shp
+        workers: Jumlah proses paralel
+        replace_all: Ganti seluruh isi tabel (tanpa menyalin kelurahan lain)
+
+    Raises:
+        ValueError: Nama file bukan kode kelurahan dan replace_all tidak aktif
+    """
+    # Tanpa kode kelurahan, data yang harus diganti tidak bisa ditentukan
+    invalid = [path for path in shapefile_paths if kelurahan_code(path) is None]
+    if invalid and not replace_all:
+        raise ValueError(
+            "Nama file bukan kode kelurahan 10 digit: " + ", ".join(invalid)
+            + " (gunakan --replace-all untuk mengganti seluruh isi tabel)"
+        )
+
+    print("="*80)
+    print("IMPORT SHAPEFILE KE MYSQL")
+    print("="*80)
+
+    total_start = time.perf_counter()
+
+    try:
+        # 1. Koneksi ke MySQL
+        print(f"\n[1/5] Koneksi ke MySQL...")
+        engine = get_engine()
+
+        # 2. Siapkan tabel bayangan, tabel aktif tetap melayani request
+        print(f"\n[2/5] Menyiapkan tabel bayangan...")
+        create_shadow_table(engine)
+        if not replace_all:
+            codes = [kelurahan_code(path) for path in shapefile_paths]
+            disalin = seed_from_live(engine, codes)
+            print(f"      ✓ {disalin} record kelurahan lain disalin dari tabel aktif")
+
+        # 3. Baca shapefile secara streaming, konversi ke WGS84 + WKT, insert per batch
+        print(f"\n[3/5] Membaca dan import {len(shapefile_paths)} shapefile ({workers} worker)...")
+        jumlah = 0
+        if len(shapefile_paths) == 1:
+            start = time.perf_counter()
+            jumlah = load_shapefile(engine, shapefile_paths[0])
+            elapsed = time.perf_counter() - start
+            print(f"      ✓ {os.path.basename(shapefile_paths[0])}: {jumlah} record ({elapsed:.1f} detik)")
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_import_worker, path) for path in shapefile_paths]
+                for i, future in enumerate(as_completed(futures), 1):
+                    path, count, elapsed = future.result()
+                    jumlah += count
+                    print(
+                        f"      ✓ [{i}/{len(shapefile_paths)}] {os.path.basename(path)}: "
+                        f"{count} record ({elapsed:.1f} detik)"
+                    )
+        print(f"      ✓ Berhasil import {jumlah} record ke tabel '{SHADOW_TABLE}'")
+
+        # 4. Swap atomik ke tabel aktif
+        print(f"\n[4/5] Menukar tabel...")
+        swap_tables(engine)
+
+        # 5. Catat import agar cache backend di-refresh
+        print(f"\n[5/5] Mencatat import...")
+        label = (
+            shapefile_paths[0] if len(shapefile_paths) == 1
+            else f"{len(shapefile_paths)} shapefile"
+        )
+        record_import(engine, label, jumlah)
+
+        print_summary(engine)
+
+        print(f"\n" + "="*80)
+        print(f"✓ IMPORT SELESAI! ({time.perf_counter() - total_start:.1f} detik)")
+        print("="*80)
+
     except Exception as e:
         print(f"\n✗ ERROR: {e}")
         raise
 
-if __name__ == "__main__":
-    # Path ke shapefile (di dalam container)
-    shapefile_path = "/app/gis_data/5102051011.shp"
-    
+
+def import_shapefile_to_mysql(shapefile_path: str):
+    """Import satu shapefile ke MySQL database"""
+    import_shapefiles_to_mysql([shapefile_path])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import shapefile objek pajak ke MySQL")
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        # Path ke shapefile (di dalam container)
+        default=["/app/gis_data/5102051011.shp"],
+        help="File .shp, direktori, atau glob (mis. '/app/gis_data/510205*.shp')",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Jumlah proses paralel (default: jumlah CPU)",
+    )
+    parser.add_argument(
+        "--replace-all",
+        action="store_true",
+        help="Ganti seluruh isi tabel, bukan hanya kelurahan yang diimport",
+    )
+    args = parser.parse_args()
+
+    shapefile_paths = resolve_shapefiles(args.paths)
+
     # Cek apakah file ada
-    if not os.path.exists(shapefile_path):
-        print(f"ERROR: File tidak ditemukan: {shapefile_path}")
+    missing = [path for path in shapefile_paths if not os.path.exists(path)]
+    if not shapefile_paths or missing:
+        for path in missing or args.paths:
+            print(f"ERROR: File tidak ditemukan: {path}")
         print(f"Cek file di /app/gis_data/")
         exit(1)
-    
-    # Import
-    import_shapefile_to_mysql(shapefile_path)
+
+    # Import (nama file harus kode kelurahan kecuali --replace-all, dicek di sana)
+    try:
+        import_shapefiles_to_mysql(
+            shapefile_paths,
+            workers=max(1, min(args.workers, len(shapefile_paths))),
+            replace_all=args.replace_all,
+        )
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
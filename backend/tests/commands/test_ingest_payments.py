@@ -0,0 +1,210 @@
+import io
+from datetime import date
+
+import pytest
+
+from app.sppt.ingest import (
+    BANK_COLUMNS,
+    IngestStats,
+    parse_layout,
+    parse_record,
+    plan_chunk,
+    read_csv,
+    read_fixed_width,
+)
+from commands import ingest_payments
+
+NOP = "510201000100100010"
+BANK = {name: "00" for name in BANK_COLUMNS}
+
+
+def raw_row(**overrides):
+    row = {
+        "NOP": NOP,
+        "THN_PAJAK_SPPT": "2025",
+        "TGL_PEMBAYARAN_SPPT": "20250801",
+        "JML_SPPT_YG_DIBAYAR": "150000",
+        "DENDA_SPPT": "0",
+    }
+    row.update(overrides)
+    return row
+
+
+def record(line_no=1, **overrides):
+    return parse_record(line_no, raw_row(**overrides), BANK)
+
+
+def existing_row(ke=1, no_bukti=None, tgl=date(2025, 8, 1), jml=150000):
+    return (NOP, "2025", ke, no_bukti, tgl, jml, *BANK.values())
+
+
+# parse_layout / read_fixed_width / read_csv
+
+def test_parse_layout():
+    assert parse_layout("nop:18, THN_PAJAK_SPPT:4") == [("NOP", 18), ("THN_PAJAK_SPPT", 4)]
+
+
+@pytest.mark.parametrize("spec", ["NOP", "NOP:x", ":4", "NOP:18,,"])
+def test_parse_layout_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_layout(spec)
+
+
+def test_read_fixed_width():
+    line = NOP + "2025" + "20250801" + "150000".rjust(15) + "0".rjust(15) + "B-1"
+    rows = list(read_fixed_width(io.StringIO(line + "\r\n\n   \n" + line + "\n")))
+    assert [line_no for line_no, _ in rows] == [1, 4]
+    line_no, raw = rows[0]
+    assert raw["NOP"] == NOP
+    assert raw["THN_PAJAK_SPPT"] == "2025"
+    assert raw["JML_SPPT_YG_DIBAYAR"].strip() == "150000"
+    assert raw["NO_BUKTI"] == "B-1"
+
+
+def test_read_fixed_width_short_line_gives_empty_fields():
+    _, raw = next(read_fixed_width(io.StringIO(NOP + "2025\n")))
+    assert raw["TGL_PEMBAYARAN_SPPT"] == ""
+    assert raw["NO_BUKTI"] == ""
+
+
+def test_read_fixed_width_requires_columns():
+    with pytest.raises(ValueError, match="TGL_PEMBAYARAN_SPPT"):
+        list(read_fixed_width(io.StringIO(NOP + "\n"), [("NOP", 18), ("THN_PAJAK_SPPT", 4), ("JML_SPPT_YG_DIBAYAR", 15)]))
+
+
+def test_read_csv_uppercases_header_and_skips_blank_lines():
+    data = "nop;thn_pajak_sppt;tgl_pembayaran_sppt;jml_sppt_yg_dibayar\n" + f"{NOP};2025;2025-08-01;1000\n;;;\n"
+    rows = list(read_csv(io.StringIO(data), delimiter=";"))
+    assert rows == [(2, {
+        "NOP": NOP, "THN_PAJAK_SPPT": "2025", "TGL_PEMBAYARAN_SPPT": "2025-08-01", "JML_SPPT_YG_DIBAYAR": "1000",
+    })]
+
+
+def test_read_csv_requires_columns():
+    with pytest.raises(ValueError, match="JML_SPPT_YG_DIBAYAR"):
+        list(read_csv(io.StringIO("NOP,THN_PAJAK_SPPT,TGL_PEMBAYARAN_SPPT\n")))
+
+
+# parse_record
+
+def test_parse_record():
+    rec = record(NOP="51.02.010.001.001.0001.0", JML_SPPT_YG_DIBAYAR="150,000.00", NO_BUKTI=" B1 ",
+                 KD_BANK_PERSEPSI="07")
+    assert rec.nop == NOP
+    assert rec.jml_dibayar == 150000
+    assert rec.tgl_pembayaran == date(2025, 8, 1)
+    assert rec.no_bukti == "B1"
+    assert rec.pembayaran_ke is None
+    assert rec.bank["KD_BANK_PERSEPSI"] == "07"
+    assert rec.bank["KD_TP"] == "00"
+
+
+@pytest.mark.parametrize("overrides", [
+    {"NOP": "51020100010010001"},
+    {"THN_PAJAK_SPPT": "25"},
+    {"JML_SPPT_YG_DIBAYAR": "0"},
+    {"JML_SPPT_YG_DIBAYAR": "abc"},
+    {"JML_SPPT_YG_DIBAYAR": "1e400"},
+    {"JML_SPPT_YG_DIBAYAR": "Infinity"},
+    {"JML_SPPT_YG_DIBAYAR": "NaN"},
+    {"JML_SPPT_YG_DIBAYAR": "1000.5"},
+    {"JML_SPPT_YG_DIBAYAR": "2147483648"},
+    {"DENDA_SPPT": "-1"},
+    {"TGL_PEMBAYARAN_SPPT": "2025-13-01"},
+    {"PEMBAYARAN_SPPT_KE": "0"},
+    {"PEMBAYARAN_SPPT_KE": "x"},
+    {"NO_BUKTI": "B" * 51},
+    {"KD_TP": "123"},
+])
+def test_parse_record_rejects(overrides):
+    with pytest.raises(ValueError):
+        record(**overrides)
+
+
+# plan_chunk
+
+def test_plan_chunk_assigns_next_pembayaran_ke():
+    stats = IngestStats()
+    chunk = [record(1, NO_BUKTI="B2"), record(2, NO_BUKTI="B3")]
+    planned = plan_chunk(chunk, {(NOP, "2025")}, [existing_row(ke=4, no_bukti="B1")], stats)
+    assert [ke for _, ke in planned] == [5, 6]
+    assert stats.duplicates == 0
+
+
+def test_plan_chunk_rejects_unknown_sppt():
+    stats = IngestStats()
+    assert plan_chunk([record(7, THN_PAJAK_SPPT="2024")], {(NOP, "2025")}, [], stats) == []
+    assert stats.rejected == 1
+    assert stats.rejects[0][0] == 7
+
+
+def test_plan_chunk_skips_posted_no_bukti():
+    stats = IngestStats()
+    planned = plan_chunk([record(NO_BUKTI="B1", JML_SPPT_YG_DIBAYAR="999")], {(NOP, "2025")},
+                         [existing_row(no_bukti="B1")], stats)
+    assert planned == []
+    assert stats.duplicates == 1
+
+
+def test_plan_chunk_reimport_without_no_bukti_is_idempotent():
+    # Impor ulang file tanpa kolom NO_BUKTI tidak boleh memposting ulang
+    stats = IngestStats()
+    chunk = [record(1), record(2, JML_SPPT_YG_DIBAYAR="5000")]
+    planned = plan_chunk(chunk, {(NOP, "2025")}, [existing_row(ke=1)], stats)
+    assert [(r.line_no, ke) for r, ke in planned] == [(2, 2)]
+    assert stats.duplicates == 1
+
+
+def test_plan_chunk_dedups_within_file():
+    stats = IngestStats()
+    chunk = [
+        record(1),
+        record(2),
+        record(3, NO_BUKTI="B1", TGL_PEMBAYARAN_SPPT="20250802"),
+        record(4, NO_BUKTI="B1", TGL_PEMBAYARAN_SPPT="20250803"),
+    ]
+    planned = plan_chunk(chunk, {(NOP, "2025")}, [], stats)
+    assert [(r.line_no, ke) for r, ke in planned] == [(1, 1), (3, 2)]
+    assert stats.duplicates == 2
+
+
+def test_plan_chunk_no_bukti_matches_payment_posted_without_it():
+    stats = IngestStats()
+    planned = plan_chunk([record(NO_BUKTI="B9")], {(NOP, "2025")}, [existing_row()], stats)
+    assert planned == []
+    assert stats.duplicates == 1
+
+
+def test_plan_chunk_different_no_bukti_same_natural_key_is_posted():
+    stats = IngestStats()
+    planned = plan_chunk([record(NO_BUKTI="B2")], {(NOP, "2025")}, [existing_row(no_bukti="B1")], stats)
+    assert [ke for _, ke in planned] == [2]
+
+
+def test_plan_chunk_rejects_pembayaran_ke_conflict():
+    stats = IngestStats()
+    planned = plan_chunk([record(PEMBAYARAN_SPPT_KE="1", JML_SPPT_YG_DIBAYAR="5000")], {(NOP, "2025")},
+                         [existing_row(ke=1)], stats)
+    assert planned == []
+    assert stats.duplicates == 0
+    assert stats.rejected == 1
+
+
+# invalidate_dashboard_cache
+
+class FakeCache:
+    def __init__(self):
+        self.invalidated = 0
+
+    async def invalidate(self):
+        self.invalidated += 1
+
+
+@pytest.mark.parametrize("backend, expected", [("redis", 1), ("memory", 0)])
+async def test_invalidate_dashboard_cache(monkeypatch, capsys, backend, expected):
+    cache = FakeCache()
+    monkeypatch.setattr(ingest_payments, "dashboard_cache", cache)
+    monkeypatch.setattr(ingest_payments.settings, "CACHE_BACKEND", backend)
+    await ingest_payments.invalidate_dashboard_cache()
+    assert cache.invalidated == expected
+    assert ("POST /dashboard/cache/invalidate" in capsys.readouterr().out) == (backend == "memory")
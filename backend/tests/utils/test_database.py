@@ -0,0 +1,31 @@
+import asyncio
+
+from app.core import database
+
+
+async def test_run_concurrently_bounds_connections(monkeypatch):
+    active = 0
+    peak = 0
+
+    async def fake_in_own_session(func, *args):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        try:
+            return await func(None, *args)
+        finally:
+            active -= 1
+
+    async def query(session, value):
+        await asyncio.sleep(0.01)
+        return value
+
+    monkeypatch.setattr(database, "in_own_session", fake_in_own_session)
+    monkeypatch.setattr(database, "_fanout_slots", asyncio.Semaphore(2))
+
+    results = await asyncio.gather(
+        database.run_concurrently(*[(query, i) for i in range(4)]),
+        database.run_concurrently(*[(query, i) for i in range(4, 8)]),
+    )
+    assert results == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert peak == 2
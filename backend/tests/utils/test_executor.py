@@ -0,0 +1,56 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.executor import BoundedExecutor, ExecutorBusy
+
+
+async def test_run_returns_result_and_counts():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0)
+    assert await executor.run(sum, [1, 2]) == 3
+    with pytest.raises(ZeroDivisionError):
+        await executor.run(divmod, 1, 0)
+    stats = executor.stats()
+    assert (stats["completed"], stats["failed"], executor.pending) == (1, 1, 0)
+    executor.shutdown()
+
+
+async def test_rejects_when_queue_full():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0)
+    release = threading.Event()
+    running = asyncio.ensure_future(executor.run(release.wait, 5))
+    await asyncio.sleep(0.05)
+    with pytest.raises(ExecutorBusy):
+        await executor.run(sum, [1])
+    assert executor.stats()["rejected"] == 1
+    release.set()
+    await running
+    executor.shutdown()
+
+
+async def test_cancelled_request_keeps_pending_until_work_finishes():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+    running = asyncio.ensure_future(executor.run(release.wait, 5))
+    queued = asyncio.ensure_future(executor.run(sum, [1]))
+    await asyncio.sleep(0.05)
+
+    # Request yang masih mengantre dibatalkan: pekerjaannya ikut batal
+    queued.cancel()
+    await asyncio.sleep(0.05)
+    assert executor.pending == 1
+
+    # Request yang pekerjaannya sedang berjalan dibatalkan: tetap terhitung
+    running.cancel()
+    await asyncio.sleep(0.05)
+    assert executor.pending == 1
+
+    release.set()
+    for _ in range(50):
+        if executor.pending == 0:
+            break
+        await asyncio.sleep(0.01)
+    assert executor.pending == 0
+    assert executor.stats()["completed"] == 1
+    executor.shutdown()
@@ -0,0 +1,105 @@
+import base64
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+
+from app.core.pagination import (
+    decode_cursor,
+    encode_cursor,
+    keyset_condition,
+    keyset_order,
+    keyset_page,
+)
+
+metadata = MetaData()
+items = Table(
+    "items",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String(20), nullable=True),
+)
+
+
+def sql(condition) -> str:
+    return str(condition.compile(compile_kwargs={"literal_binds": True}))
+
+
+# encode_cursor / decode_cursor
+
+def test_cursor_roundtrip():
+    cursor = encode_cursor(["Jl Kenanga", Decimal("12.5"), None, 3])
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 4) == ["Jl Kenanga", 12.5, None, 3]
+
+
+@pytest.mark.parametrize("cursor", [
+    "bukan-cursor!!",
+    base64.urlsafe_b64encode(b"{\"a\": 1}").decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+    encode_cursor([1, 2]),
+])
+def test_decode_cursor_invalid(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, 3)
+    assert exc.value.status_code == 400
+
+
+# keyset_condition
+
+def test_keyset_condition_asc():
+    condition = keyset_condition([items.c.name, items.c.id], ["b", 2])
+    assert sql(condition) == "items.name > 'b' OR items.name = 'b' AND items.id > 2"
+
+
+def test_keyset_condition_desc_nullable_includes_nulls():
+    condition = keyset_condition([items.c.name, items.c.id], ["b", 2], descending=True)
+    assert sql(condition) == (
+        "items.name < 'b' OR items.name IS NULL OR items.name = 'b' AND items.id < 2"
+    )
+
+
+def test_keyset_condition_null_value():
+    assert sql(keyset_condition([items.c.name, items.c.id], [None, 2])) == (
+        "items.name IS NOT NULL OR items.name IS NULL AND items.id > 2"
+    )
+    assert sql(keyset_condition([items.c.name, items.c.id], [None, 2], descending=True)) == (
+        "items.name IS NULL AND items.id < 2"
+    )
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_keyset_pages_cover_all_rows(descending):
+    # NULL paling awal di ASC dan paling akhir di DESC, sama seperti MySQL
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    names = ["b", None, "a", "b", None, "c", "a"]
+    with engine.begin() as conn:
+        conn.execute(insert(items), [{"id": i, "name": name} for i, name in enumerate(names, 1)])
+
+    columns = [items.c.name, items.c.id]
+    query = select(items).order_by(*keyset_order(columns, descending))
+    with engine.connect() as conn:
+        expected = conn.execute(query).all()
+        seen, cursor = [], None
+        while True:
+            page_query = query
+            if cursor:
+                values = decode_cursor(cursor, len(columns))
+                page_query = query.where(keyset_condition(columns, values, descending))
+            rows, cursor = keyset_page(
+                conn.execute(page_query.limit(3)).all(), 2, lambda row: [row.name, row.id]
+            )
+            seen += rows
+            if cursor is None:
+                break
+    assert seen == expected
+    assert len(seen) == len(names)
+
+
+def test_keyset_page():
+    assert keyset_page([1, 2], 2, lambda row: [row]) == ([1, 2], None)
+    rows, cursor = keyset_page([1, 2, 3], 2, lambda row: [row])
+    assert rows == [1, 2]
+    assert decode_cursor(cursor, 1) == [2]
@@ -0,0 +1,119 @@
+import asyncio
+import importlib.util
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings
+from app.core.response_cache import MemoryCacheBackend, ResponseCache
+
+
+class SlowFactory:
+    """Factory yang menunggu gate dan menghitung berapa kali dijalankan"""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        value = self.calls
+        await self.gate.wait()
+        return {"value": value}
+
+
+async def test_memory_clear_honours_prefix():
+    backend = MemoryCacheBackend(maxsize=10)
+    await backend.set("dashboard:a", b"1", ttl=60)
+    await backend.set("dashboard:b", b"2", ttl=60)
+    await backend.set("laporan:a", b"3", ttl=60)
+    await backend.clear("dashboard:")
+    assert await backend.get("dashboard:a") is None
+    assert await backend.get("dashboard:b") is None
+    assert await backend.get("laporan:a") == b"3"
+
+
+def test_redis_backend_requires_url():
+    with pytest.raises(ValidationError, match="REDIS_URL"):
+        Settings(CACHE_BACKEND="redis", REDIS_URL=None)
+
+
+def test_redis_backend_requires_package(monkeypatch):
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+    with pytest.raises(ValidationError, match="pip install redis"):
+        Settings(CACHE_BACKEND="redis", REDIS_URL="redis://localhost:6379/0")
+
+
+def test_unknown_cache_backend_rejected():
+    with pytest.raises(ValidationError):
+        Settings(CACHE_BACKEND="memcached")
+
+
+# ResponseCache.get_or_set
+
+async def test_concurrent_misses_run_factory_once():
+    cache = ResponseCache("test", ttl=60, maxsize=10)
+    factory = SlowFactory()
+    requests = [asyncio.create_task(cache.get_or_set("stats", {"tahun": 2025}, factory)) for _ in range(3)]
+    await asyncio.sleep(0)
+    factory.gate.set()
+    assert await asyncio.gather(*requests) == [{"value": 1}] * 3
+    assert factory.calls == 1
+    assert cache.stats()["inflight"] == 0
+    # Hit mengembalikan bentuk yang sama dengan miss
+    assert await cache.get_or_set("stats", {"tahun": 2025}, factory) == {"value": 1}
+
+
+async def test_miss_returns_decoded_json():
+    cache = ResponseCache("test", ttl=60, maxsize=10)
+
+    async def factory():
+        return {"tahun": (2024, 2025)}
+
+    assert await cache.get_or_set("stats", {}, factory) == {"tahun": [2024, 2025]}
+
+
+async def test_leader_cancellation_does_not_fail_followers():
+    cache = ResponseCache("test", ttl=60, maxsize=10)
+    factory = SlowFactory()
+    leader = asyncio.create_task(cache.get_or_set("stats", {}, factory))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(cache.get_or_set("stats", {}, factory))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    factory.gate.set()
+    assert await follower == {"value": 1}
+    assert leader.cancelled()
+    assert factory.calls == 1
+
+
+async def test_invalidate_during_compute_skips_store():
+    cache = ResponseCache("test", ttl=60, maxsize=10)
+    factory = SlowFactory()
+    stale = asyncio.create_task(cache.get_or_set("stats", {}, factory))
+    await asyncio.sleep(0)
+
+    await cache.invalidate()
+    factory.gate.set()
+    # Request yang sudah menunggu tetap mendapat hasilnya, tetapi tidak disimpan
+    assert await stale == {"value": 1}
+    assert await cache.get_or_set("stats", {}, factory) == {"value": 2}
+    assert factory.calls == 2
+
+
+async def test_factory_error_reaches_all_waiters():
+    cache = ResponseCache("test", ttl=60, maxsize=10)
+
+    async def factory():
+        await asyncio.sleep(0)
+        raise RuntimeError("db down")
+
+    results = await asyncio.gather(
+        cache.get_or_set("stats", {}, factory),
+        cache.get_or_set("stats", {}, factory),
+        return_exceptions=True,
+    )
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+    assert cache.stats()["inflight"] == 0
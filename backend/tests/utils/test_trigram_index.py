@@ -0,0 +1,123 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.search import service as search_service
+from app.search.index import TrigramIndex, normalize_text, trigrams
+from app.search.service import SEARCH_FIELDS, SearchService
+
+FIELDS = {"nm_wp": 1.0, "jalan_op": 0.9}
+
+
+def make_index():
+    index = TrigramIndex(FIELDS)
+    index.add("A", {"nm_wp": "I Wayan Sudra", "jalan_op": "Jalan Gatot Subroto"})
+    index.add("B", {"nm_wp": "Ni Made Murniasih", "jalan_op": "Jl. Teuku Umar"})
+    return index
+
+
+# normalize_text / trigrams
+
+def test_normalize_text_spelling_and_stopwords():
+    assert normalize_text("Jalan Soekarno No. 5") == ["sukarno", "5"]
+    assert normalize_text(None) == []
+
+
+def test_trigrams_padding():
+    assert trigrams("abc") == {"  a", " ab", "abc", "bc "}
+
+
+# TrigramIndex
+
+def test_search_exact_and_typo():
+    index = make_index()
+    hits = index.search("I Wayan Sudra")
+    assert [hit.key for hit in hits] == ["A"]
+    assert hits[0].field == "nm_wp"
+    assert hits[0].score == 1.0
+    assert [hit.key for hit in index.search("wayan sudr")] == ["A"]
+
+
+def test_search_fields_and_allow():
+    index = make_index()
+    assert index.search("teuku umar", fields=["nm_wp"]) == []
+    hit, = index.search("teuku umar", fields=["jalan_op"])
+    assert (hit.key, hit.field) == ("B", "jalan_op")
+    assert index.search("teuku umar", allow=lambda key: key != "B") == []
+
+
+def test_search_ranks_and_limits():
+    index = make_index()
+    index.add("C", {"nm_wp": "I Wayan Sudra Putra"})
+    assert [hit.key for hit in index.search("wayan sudra")] == ["A", "C"]
+    assert [hit.key for hit in index.search("wayan sudra", limit=1)] == ["A"]
+
+
+def test_readd_replaces_document():
+    index = make_index()
+    index.search("gatot subroto")  # isi cache array posting
+    index.add("A", {"nm_wp": "I Wayan Sudra", "jalan_op": "Jalan Diponegoro"})
+    assert len(index) == 2
+    assert index.search("gatot subroto") == []
+    assert [hit.key for hit in index.search("diponegoro")] == ["A"]
+
+
+def test_remove():
+    index = make_index()
+    index.search("murniasih")
+    index.remove("B")
+    index.remove("tidak-ada")
+    assert len(index) == 1
+    assert index.search("murniasih") == []
+    assert [hit.key for hit in index.search("wayan")] == ["A"]
+
+
+def test_search_empty_query():
+    assert make_index().search("jl. no") == []
+
+
+# SearchService.rebuild
+
+class FakeSession:
+    def __init__(self, rows=None, gate=None):
+        self.rows = rows or []
+        self.gate = gate
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        if self.gate is not None:
+            await self.gate.wait()
+        return SimpleNamespace(all=lambda: self.rows)
+
+    async def scalar(self, statement):
+        return "Wayan Baru"
+
+
+async def test_rebuild_replays_updates_made_during_rebuild(monkeypatch):
+    row = SimpleNamespace(NOP="1" * 18, SUBJEK_PAJAK_ID="S1", NM_WP="Made Lama",
+                          JALAN_OP="Jl Kenanga", NO_FORMULIR_SPOP="F1")
+    gate = asyncio.Event()
+    monkeypatch.setattr(search_service, "_index", TrigramIndex(SEARCH_FIELDS))
+    monkeypatch.setattr(search_service, "_documents", {})
+    monkeypatch.setattr(search_service, "_ready", False)
+    monkeypatch.setattr(search_service, "async_session_maker", lambda: FakeSession([row], gate))
+
+    rebuild = asyncio.create_task(SearchService.rebuild())
+    await asyncio.sleep(0)
+    spop = SimpleNamespace(
+        KD_PROPINSI="22", KD_DATI2="22", KD_KECAMATAN="222", KD_KELURAHAN="222",
+        KD_BLOK="222", NO_URUT="2222", KD_JNS_OP="2",
+        SUBJEK_PAJAK_ID="S2", JALAN_OP="Jl Melati", NO_FORMULIR_SPOP="F2",
+    )
+    await SearchService.index_spop(FakeSession(), spop)
+    gate.set()
+    assert await rebuild == 1
+
+    assert SearchService.is_ready()
+    assert [hit["nop"] for hit in SearchService.search("wayan baru")] == ["2" * 18]
+    assert [hit["nop"] for hit in SearchService.search("made lama")] == ["1" * 18]
+    assert search_service._pending_updates == []